@@ -0,0 +1,1528 @@
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import typer
+from sqlalchemy import create_engine
+
+from db_utils import Base
+
+# The server code lives in src/hms_agent and imports its modules top-level
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "hms_agent"))
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Performance benchmarks for the HMS tool layer.
+    """
+
+
+BASE_DATE = date(2026, 1, 1)
+
+
+def build_database(
+    path: Path,
+    num_hotels: int,
+    rooms_per_hotel: int,
+    num_bookings: int,
+    num_customers: int = 1000,
+    seed: int = 42,
+    num_locations: int = 1,
+) -> None:
+    """Create a schema-complete database filled with synthetic data.
+
+    Hotels are dealt round-robin over ``num_locations`` locations.
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO locations (id, city, country) VALUES (?, ?, 'France')",
+        [
+            (loc, "Paris" if loc == 1 else f"City {loc}")
+            for loc in range(1, num_locations + 1)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO hotels (id, name, location_id) VALUES (?, ?, ?)",
+        [
+            (h, f"Hotel {h}", (h - 1) % num_locations + 1)
+            for h in range(1, num_hotels + 1)
+        ],
+    )
+    conn.executemany(
+        """
+        INSERT INTO rooms (hotel_id, room_number, room_type, price_per_night, capacity)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            (h, str(r), t, rng.randint(50, 500) * 100, c)
+            for h in range(1, num_hotels + 1)
+            for r in range(1, rooms_per_hotel + 1)
+            for t, c in [rng.choice([("Single", 1), ("Double", 2), ("Suite", 4)])]
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO customers (id, name, phone_number) VALUES (?, ?, ?)",
+        [(c, f"Customer {c}", f"555-{c:07d}") for c in range(1, num_customers + 1)],
+    )
+    num_rooms = num_hotels * rooms_per_hotel
+    bookings = []
+    for _ in range(num_bookings):
+        check_in = BASE_DATE + timedelta(days=rng.randint(0, 729))
+        check_out = check_in + timedelta(days=rng.randint(1, 10))
+        bookings.append(
+            (
+                rng.randint(1, num_customers),
+                rng.randint(1, num_rooms),
+                check_in.isoformat(),
+                check_out.isoformat(),
+                rng.choice(["confirmed"] * 9 + ["cancelled"]),
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        bookings,
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> str:
+    ms = [s * 1000 for s in samples]
+    return (
+        f"n={len(ms):5d}  p50={percentile(ms, 50):8.2f}ms  "
+        f"p95={percentile(ms, 95):8.2f}ms  p99={percentile(ms, 99):8.2f}ms  "
+        f"mean={statistics.fmean(ms) if ms else 0:8.2f}ms"
+    )
+
+
+async def _run_sessions(
+    calls: dict,
+    sessions: int,
+    calls_per_session: int,
+    rate: float,
+    num_hotels: int,
+    seed: int,
+) -> dict[str, list[float]]:
+    """
+    Replays an open-loop mix of tool calls. Each call has a scheduled arrival
+    time and its latency is measured from that time, so a blocked event loop
+    shows up as queueing delay on every session rather than being hidden.
+    """
+    latencies: dict[str, list[float]] = {name: [] for name in calls}
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def session(session_id: int):
+        rng = random.Random(seed + session_id)
+        scheduled = start
+        for _ in range(calls_per_session):
+            scheduled += rng.expovariate(rate / sessions)
+            op = rng.choices(
+                ["search_rooms", "search_customers", "search_hotels", "create"],
+                weights=[2, 5, 2, 1],
+            )[0]
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, 700))
+            check_out = check_in + timedelta(days=rng.randint(1, 7))
+            if op == "search_rooms":
+                args = (
+                    rng.randint(1, num_hotels),
+                    check_in.isoformat(),
+                    check_out.isoformat(),
+                    2,
+                )
+            elif op == "search_customers":
+                args = (None, f"555-{rng.randint(1, 1000):07d}")
+            elif op == "search_hotels":
+                args = (1,)
+            else:
+                args = (
+                    rng.randint(1, 1000),
+                    rng.randint(1, 50),
+                    check_in.isoformat(),
+                    check_out.isoformat(),
+                )
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+            await calls[op](*args)
+            latencies[op].append(loop.time() - scheduled)
+
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return latencies
+
+
+@app.command()
+def concurrency(
+    sessions: int = typer.Option(32, help="Number of concurrent sessions"),
+    calls_per_session: int = typer.Option(25, help="Tool calls per session"),
+    rate: float = typer.Option(100.0, help="Target tool calls per second overall"),
+    num_hotels: int = typer.Option(20, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    num_bookings: int = typer.Option(100_000, help="Bookings to generate"),
+    read_concurrency: int = typer.Option(8, help="Read lane workers"),
+    write_concurrency: int = typer.Option(8, help="Write lane workers"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Compares tool latency for mixed concurrent sessions when SQLite calls run
+    inline on the event loop versus on the executor's read/write lanes.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        print(f"Building database with {num_bookings} bookings...")
+        build_database(path, num_hotels, rooms_per_hotel, num_bookings, seed=seed)
+
+        # Point the server module at the benchmark database before importing it
+        os.environ["HMS_DB_PATH"] = str(path)
+        import mcp_server
+        from db.connector import set_db_path
+        from db.executor import configure_executor
+        from db.writer import start_writer, stop_writer
+        from db.models import (
+            CreateBookingInput,
+            CustomerSearchInput,
+            HotelsInput,
+            SearchRoomsInput,
+        )
+        from tools.bookings import create_booking
+        from tools.customers import get_customer
+        from tools.hotels import get_hotels
+        from tools.rooms import get_available_rooms
+
+        def inline(fn, model, fields):
+            async def call(*args):
+                try:
+                    return fn(model(**dict(zip(fields, args))))
+                except Exception as e:
+                    return {"error": str(e)}
+
+            return call
+
+        room_fields = ["hotel_id", "check_in_date", "check_out_date", "min_capacity"]
+        booking_fields = ["customer_id", "room_id", "check_in_date", "check_out_date"]
+        modes = {
+            # Plain synchronous calls, as the tools ran before the executor
+            "inline": {
+                "search_rooms": inline(
+                    get_available_rooms, SearchRoomsInput, room_fields
+                ),
+                "search_customers": inline(
+                    get_customer, CustomerSearchInput, ["name", "phone_number"]
+                ),
+                "search_hotels": inline(get_hotels, HotelsInput, ["location_id"]),
+                "create": inline(create_booking, CreateBookingInput, booking_fields),
+            },
+            "offload": {
+                "search_rooms": mcp_server.search_rooms,
+                "search_customers": mcp_server.search_customers,
+                "search_hotels": mcp_server.search_hotels,
+                "create": mcp_server.create_reservation,
+            },
+        }
+        configure_executor(read_concurrency, write_concurrency)
+
+        for mode, calls in modes.items():
+            # Every mode starts from an identical copy of the database
+            mode_path = Path(tmp) / f"{mode}.db"
+            shutil.copy(path, mode_path)
+            set_db_path(mode_path, pool_size=read_concurrency + write_concurrency)
+            if mode == "offload":
+                start_writer()
+            else:
+                stop_writer()
+            start = time.perf_counter()
+            latencies = asyncio.run(
+                _run_sessions(
+                    calls, sessions, calls_per_session, rate, num_hotels, seed
+                )
+            )
+            elapsed = time.perf_counter() - start
+            total = sum(len(v) for v in latencies.values())
+            print(
+                f"\n[{mode}] {total} calls in {elapsed:.2f}s ({total / elapsed:.0f}/s)"
+            )
+            for name, samples in latencies.items():
+                print(f"  {name:17s} {summarize(samples)}")
+            everything = [s for samples in latencies.values() for s in samples]
+            print(f"  {'all':17s} {summarize(everything)}")
+
+
+@app.command()
+def occupancy(
+    num_hotels: int = typer.Option(200, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    num_bookings: int = typer.Option(500_000, help="Bookings to generate"),
+    days: int = typer.Option(730, help="Occupancy horizon in days"),
+    searches: int = typer.Option(2000, help="Availability searches to time"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Measures build time, memory footprint and search latency of the in-memory
+    occupancy bitmap against the indexed SQL availability query.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        print(f"Building database with {num_bookings} bookings...")
+        build_database(path, num_hotels, rooms_per_hotel, num_bookings, seed=seed)
+
+        from db.connector import connection, set_db_path
+        from db.migrations import apply_migrations
+        from db.models import SearchRoomsInput
+        from db.occupancy import disable_occupancy, enable_occupancy
+        from tools.rooms import get_available_rooms
+
+        set_db_path(path)
+        with connection() as conn:
+            apply_migrations(conn)
+
+        start = time.perf_counter()
+        index = enable_occupancy(days=days, start=BASE_DATE)
+        build_time = time.perf_counter() - start
+
+        usage = index.memory_usage()
+        print(
+            f"\nBuilt index for {usage['rooms']} rooms x {usage['days']} days "
+            f"in {build_time:.2f}s"
+        )
+        print(f"  bitmap:     {usage['bitmap_bytes'] / 1024:10.1f} KiB")
+        print(f"  catalogue:  {usage['catalogue_bytes'] / 1024:10.1f} KiB")
+
+        rng = random.Random(seed)
+        queries = []
+        for _ in range(searches):
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, days - 15))
+            check_out = check_in + timedelta(days=rng.randint(1, 14))
+            queries.append(
+                SearchRoomsInput(
+                    hotel_id=rng.randint(1, num_hotels),
+                    check_in_date=check_in.isoformat(),
+                    check_out_date=check_out.isoformat(),
+                    min_capacity=rng.randint(1, 4),
+                    limit=100,
+                )
+            )
+
+        results = {}
+        for mode in ("bitmap", "sql"):
+            samples = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                rooms = get_available_rooms(query)
+                samples.append(time.perf_counter() - start)
+                found.append(sorted(room.id for room in rooms))
+            results[mode] = found
+            print(f"  {mode:8s} {summarize(samples)}")
+            # The second pass runs with the engine off and goes to SQLite
+            disable_occupancy()
+
+        mismatches = sum(a != b for a, b in zip(results["sql"], results["bitmap"]))
+        with connection() as conn:
+            start = time.perf_counter()
+            drifted = index.verify(conn)
+            verify_time = time.perf_counter() - start
+        print(f"\nResult mismatches between SQL and bitmap: {mismatches}")
+        print(f"Consistency check: {len(drifted)} drifted rooms in {verify_time:.2f}s")
+
+
+@app.command()
+def day_numbers(
+    num_hotels: int = typer.Option(200, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    num_bookings: int = typer.Option(1_000_000, help="Bookings to generate"),
+    searches: int = typer.Option(5000, help="Availability searches to time"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Times the availability and overlap queries on text dates (schema version
+    5) against integer day numbers (version 6) and compares index sizes.
+    """
+    from db.migrations import apply_migrations
+    from db.models import day_number
+    from tools.bookings import OVERLAP_QUERY
+    from tools.rooms import AVAILABLE_ROOMS_QUERY
+
+    def on_text(query: str) -> str:
+        # The queries as they were before version 6
+        return query.replace("check_in_day", "check_in_date").replace(
+            "check_out_day", "check_out_date"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        print(f"Building database with {num_bookings} bookings...")
+        build_database(path, num_hotels, rooms_per_hotel, num_bookings, seed=seed)
+
+        rng = random.Random(seed)
+        stays = []
+        for _ in range(searches):
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, 715))
+            check_out = check_in + timedelta(days=rng.randint(1, 14))
+            stays.append(
+                (
+                    rng.randint(1, num_hotels),
+                    rng.randint(1, num_hotels * rooms_per_hotel),
+                    check_in.isoformat(),
+                    check_out.isoformat(),
+                )
+            )
+
+        results = {}
+        for mode, version, index in (
+            ("text", 5, "idx_bookings_room_status_dates"),
+            ("integer", 6, "idx_bookings_room_status_days"),
+        ):
+            mode_path = Path(tmp) / f"{mode}.db"
+            shutil.copy(path, mode_path)
+            conn = sqlite3.connect(mode_path)
+            start = time.perf_counter()
+            apply_migrations(conn, target=version)
+            migrate_time = time.perf_counter() - start
+            index_pages = conn.execute(
+                "SELECT COUNT(*) FROM dbstat WHERE name = ?", (index,)
+            ).fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            print(
+                f"\n[{mode}] migrated in {migrate_time:.2f}s, {index} is "
+                f"{index_pages * page_size / 2**20:.1f} MiB"
+            )
+
+            def bounds(check_in: str, check_out: str) -> tuple:
+                if mode == "text":
+                    return check_out, check_in
+                return day_number(check_out), day_number(check_in)
+
+            available, overlap = AVAILABLE_ROOMS_QUERY, OVERLAP_QUERY
+            if mode == "text":
+                available, overlap = on_text(available), on_text(overlap)
+            found, samples, overlap_samples = [], [], []
+            for hotel_id, room_id, check_in, check_out in stays:
+                start = time.perf_counter()
+                rows = conn.execute(
+                    available,
+                    (hotel_id, 1, 0, 0, *bounds(check_in, check_out), 101),
+                ).fetchall()
+                samples.append(time.perf_counter() - start)
+                found.append(rows)
+
+                start = time.perf_counter()
+                conn.execute(
+                    overlap, (room_id, *bounds(check_in, check_out))
+                ).fetchone()
+                overlap_samples.append(time.perf_counter() - start)
+            conn.close()
+            results[mode] = found
+            print(f"  search_rooms  {summarize(samples)}")
+            print(f"  overlap check {summarize(overlap_samples)}")
+
+        mismatches = sum(a != b for a, b in zip(results["text"], results["integer"]))
+        print(f"\nResult mismatches between text and integer queries: {mismatches}")
+
+
+@app.command()
+def daily_stats(
+    num_hotels: int = typer.Option(200, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    num_locations: int = typer.Option(10, help="Locations the hotels are spread over"),
+    num_bookings: int = typer.Option(1_000_000, help="Bookings to generate"),
+    reports: int = typer.Option(500, help="Reports of each kind to time"),
+    period_days: int = typer.Option(90, help="Days each report covers"),
+    writes: int = typer.Option(2000, help="Bookings and cancellations to time"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Times occupancy and revenue reports aggregated from the raw bookings
+    (schema version 6) against the maintained daily stats (version 7), and
+    what the stats triggers add to a booking and a cancellation.
+    """
+    from db.daily_stats import verify_daily_stats
+    from db.migrations import apply_migrations
+    from db.models import (
+        CancelBookingInput,
+        CreateBookingInput,
+        day_number,
+    )
+    from db.writer import execute_transaction
+    from tools.bookings import insert_booking, mark_booking_cancelled
+    from tools.reports import (
+        HOTEL_DAILY_STATS_QUERY,
+        HOTEL_QUERY,
+        LOCATION_REVENUE_QUERY,
+    )
+
+    # The same reports straight from the bookings: a hotel's nights are
+    # expanded per day, a location's are summed per booking
+    raw_hotel_query = """
+        WITH RECURSIVE nights (day, last, price) AS (
+          SELECT MAX(b.check_in_day, :start), MIN(b.check_out_day, :end),
+                 r.price_per_night
+          FROM rooms r
+          JOIN bookings b ON b.room_id = r.id
+          WHERE r.hotel_id = :hotel_id
+            AND b.status = 'confirmed'
+            AND b.check_in_day < :end
+            AND b.check_out_day > :start
+          UNION ALL
+          SELECT day + 1, last, price FROM nights WHERE day + 1 < last
+        )
+        SELECT day, COUNT(*), SUM(price) FROM nights GROUP BY day ORDER BY day
+    """
+    raw_location_query = """
+        SELECT h.location_id,
+               SUM(MIN(b.check_out_day, :end) - MAX(b.check_in_day, :start)),
+               SUM((MIN(b.check_out_day, :end) - MAX(b.check_in_day, :start))
+                   * r.price_per_night)
+        FROM hotels h
+        JOIN rooms r ON r.hotel_id = h.id
+        JOIN bookings b ON b.room_id = r.id
+        WHERE h.location_id = :location_id
+          AND b.status = 'confirmed'
+          AND b.check_in_day < :end
+          AND b.check_out_day > :start
+        GROUP BY h.location_id
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        print(f"Building database with {num_bookings} bookings...")
+        build_database(
+            path,
+            num_hotels,
+            rooms_per_hotel,
+            num_bookings,
+            seed=seed,
+            num_locations=num_locations,
+        )
+
+        rng = random.Random(seed)
+        periods = []
+        for _ in range(reports):
+            start = BASE_DATE + timedelta(days=rng.randint(0, 729 - period_days))
+            periods.append(
+                (
+                    rng.randint(1, num_hotels),
+                    rng.randint(1, num_locations),
+                    start.isoformat(),
+                    (start + timedelta(days=period_days)).isoformat(),
+                )
+            )
+        stays = []
+        for _ in range(writes):
+            check_in = BASE_DATE + timedelta(days=rng.randint(730, 1000))
+            check_out = check_in + timedelta(days=rng.randint(1, 10))
+            stays.append(
+                CreateBookingInput(
+                    customer_id=1,
+                    room_id=rng.randint(1, num_hotels * rooms_per_hotel),
+                    check_in_date=check_in.isoformat(),
+                    check_out_date=check_out.isoformat(),
+                )
+            )
+
+        results = {}
+        for mode, version in (("raw", 6), ("stats", 7)):
+            mode_path = Path(tmp) / f"{mode}.db"
+            shutil.copy(path, mode_path)
+            conn = sqlite3.connect(mode_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            apply_migrations(conn, target=6)
+            print(f"\n[{mode}]")
+            if version == 7:
+                start = time.perf_counter()
+                apply_migrations(conn)
+                elapsed = time.perf_counter() - start
+                size = conn.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = 'hotel_daily_stats'"
+                ).fetchone()[0]
+                print(
+                    f"  backfilled hotel_daily_stats in {elapsed:.2f}s, "
+                    f"{size / 2**20:.1f} MiB"
+                )
+
+            hotel_rows, location_rows = [], []
+            hotel_samples, location_samples = [], []
+            for hotel_id, location_id, start_date, end_date in periods:
+                bounds = {"start": day_number(start_date), "end": day_number(end_date)}
+                start = time.perf_counter()
+                if mode == "raw":
+                    rows = conn.execute(
+                        raw_hotel_query, bounds | {"hotel_id": hotel_id}
+                    ).fetchall()
+                else:
+                    conn.execute(HOTEL_QUERY, (hotel_id,)).fetchone()
+                    rows = conn.execute(
+                        HOTEL_DAILY_STATS_QUERY,
+                        (hotel_id, bounds["start"], bounds["end"]),
+                    ).fetchall()
+                hotel_samples.append(time.perf_counter() - start)
+                hotel_rows.append(rows)
+
+                start = time.perf_counter()
+                if mode == "raw":
+                    rows = conn.execute(
+                        raw_location_query, bounds | {"location_id": location_id}
+                    ).fetchall()
+                else:
+                    rows = [
+                        (row[0], row[5], row[6])
+                        for row in conn.execute(
+                            LOCATION_REVENUE_QUERY.format(
+                                location_filter="h.location_id = ?"
+                            ),
+                            (bounds["start"], bounds["end"], location_id),
+                        )
+                    ]
+                location_samples.append(time.perf_counter() - start)
+                location_rows.append(rows)
+            results[mode] = (hotel_rows, location_rows)
+            print(f"  hotel occupancy  {summarize(hotel_samples)}")
+            print(f"  location revenue {summarize(location_samples)}")
+
+            book_samples, cancel_samples = [], []
+            for data in stays:
+                start = time.perf_counter()
+                try:
+                    booking = execute_transaction(conn, insert_booking, data)
+                except ValueError:
+                    continue
+                book_samples.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                execute_transaction(
+                    conn,
+                    mark_booking_cancelled,
+                    CancelBookingInput(booking_id=booking.booking_id),
+                )
+                cancel_samples.append(time.perf_counter() - start)
+            print(f"  booking          {summarize(book_samples)}")
+            print(f"  cancellation     {summarize(cancel_samples)}")
+            if version == 7:
+                start = time.perf_counter()
+                drifted = verify_daily_stats(conn)
+                elapsed = time.perf_counter() - start
+                print(f"  verify: {len(drifted)} drifted hotel days in {elapsed:.2f}s")
+            conn.close()
+
+        mismatches = sum(
+            a != b
+            for raw, stats in zip(results["raw"], results["stats"])
+            for a, b in zip(raw, stats)
+        )
+        print(f"\nReport mismatches between raw and daily stats: {mismatches}")
+
+
+@app.command()
+def writes(
+    threads: int = typer.Option(32, help="Concurrent booking threads"),
+    bookings_per_thread: int = typer.Option(200, help="Bookings per thread"),
+    num_hotels: int = typer.Option(20, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    synchronous: str = typer.Option(
+        "NORMAL", help="PRAGMA synchronous for the run (NORMAL or FULL)"
+    ),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Measures booking throughput from many threads with each write in its own
+    transaction versus group-committed through the single writer.
+    """
+    from db import connector
+    from db.connector import connection, set_db_path
+    from db.migrations import apply_migrations
+    from db.models import CreateBookingInput
+    from db.writer import get_writer, start_writer, stop_writer
+    from tools.bookings import create_booking
+
+    connector.SYNCHRONOUS = synchronous
+    num_rooms = num_hotels * rooms_per_hotel
+
+    def guest(thread_id: int, counts: list):
+        rng = random.Random(seed + thread_id)
+        for _ in range(bookings_per_thread):
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, 729))
+            check_out = check_in + timedelta(days=rng.randint(1, 5))
+            try:
+                create_booking(
+                    CreateBookingInput(
+                        customer_id=1,
+                        room_id=rng.randint(1, num_rooms),
+                        check_in_date=check_in.isoformat(),
+                        check_out_date=check_out.isoformat(),
+                    )
+                )
+                counts[0] += 1
+            except ValueError:
+                counts[1] += 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_database(path, num_hotels, rooms_per_hotel, 0, seed=seed)
+
+        for mode in ("direct", "writer"):
+            mode_path = Path(tmp) / f"{mode}.db"
+            shutil.copy(path, mode_path)
+            set_db_path(mode_path, pool_size=threads)
+            with connection() as conn:
+                apply_migrations(conn)
+            if mode == "writer":
+                start_writer()
+
+            counts = [0, 0]
+            workers = [
+                threading.Thread(target=guest, args=(i, counts)) for i in range(threads)
+            ]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+
+            total = threads * bookings_per_thread
+            print(
+                f"[{mode}] {total} bookings in {elapsed:.2f}s "
+                f"({total / elapsed:.0f}/s), {counts[0]} booked, "
+                f"{counts[1]} conflicts"
+            )
+            if mode == "writer":
+                print(f"  writer stats: {get_writer().stats()}")
+                stop_writer()
+
+
+@app.command()
+def group_bookings(
+    groups: int = typer.Option(500, help="Group bookings per size"),
+    sizes: str = typer.Option("2,5,10,20", help="Comma-separated rooms per group"),
+    num_hotels: int = typer.Option(20, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    num_bookings: int = typer.Option(5000, help="Existing bookings"),
+    synchronous: str = typer.Option(
+        "NORMAL", help="PRAGMA synchronous for the run (NORMAL or FULL)"
+    ),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Books the same groups of rooms by looping create_booking, one transaction
+    per room, and with create_group_booking, one transaction per group.
+    Reports the latency of groups that were fully booked and how many groups
+    the loop left half-booked.
+    """
+    from db import connector
+    from db.connector import connection, set_db_path
+    from db.migrations import apply_migrations
+    from db.models import CreateBookingInput, GroupBookingInput
+    from db.writer import start_writer, stop_writer
+    from tools.bookings import create_booking, create_group_booking
+
+    connector.SYNCHRONOUS = synchronous
+
+    def requests(size: int) -> list[GroupBookingInput]:
+        rng = random.Random(seed + size)
+        batch = []
+        for _ in range(groups):
+            hotel = rng.randint(1, num_hotels)
+            first_room = (hotel - 1) * rooms_per_hotel + 1
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, 729))
+            check_out = check_in + timedelta(days=rng.randint(1, 5))
+            batch.append(
+                GroupBookingInput(
+                    customer_id=1,
+                    room_ids=rng.sample(
+                        range(first_room, first_room + rooms_per_hotel), size
+                    ),
+                    check_in_date=check_in.isoformat(),
+                    check_out_date=check_out.isoformat(),
+                )
+            )
+        return batch
+
+    def loop(data: GroupBookingInput) -> str:
+        booked = 0
+        for room_id in data.room_ids:
+            try:
+                create_booking(
+                    CreateBookingInput(
+                        customer_id=data.customer_id,
+                        room_id=room_id,
+                        check_in_date=data.check_in_date,
+                        check_out_date=data.check_out_date,
+                    )
+                )
+                booked += 1
+            except ValueError:
+                # A real client would stop at the first taken room
+                break
+        if booked == len(data.room_ids):
+            return "booked"
+        return "partial" if booked else "rejected"
+
+    def group(data: GroupBookingInput) -> str:
+        try:
+            create_group_booking(data)
+            return "booked"
+        except ValueError:
+            return "rejected"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_database(path, num_hotels, rooms_per_hotel, num_bookings, seed=seed)
+
+        for size in [int(size) for size in sizes.split(",")]:
+            batch = requests(size)
+            for mode, book in (("loop", loop), ("group", group)):
+                mode_path = Path(tmp) / f"{mode}{size}.db"
+                shutil.copy(path, mode_path)
+                set_db_path(mode_path, pool_size=2)
+                with connection() as conn:
+                    apply_migrations(conn)
+                start_writer()
+
+                outcomes = {"booked": 0, "partial": 0, "rejected": 0}
+                latencies = []
+                for data in batch:
+                    start = time.perf_counter()
+                    outcome = book(data)
+                    if outcome == "booked":
+                        latencies.append(time.perf_counter() - start)
+                    outcomes[outcome] += 1
+                stop_writer()
+                connector.get_pool().close()
+
+                print(
+                    f"[{size:2d} rooms, {mode:5s}] {summarize(latencies)}  "
+                    f"booked={outcomes['booked']} partial={outcomes['partial']} "
+                    f"rejected={outcomes['rejected']}"
+                )
+
+
+@app.command()
+def shards(
+    num_shards: int = typer.Option(4, "--shards", help="Shards to compare with one"),
+    threads: int = typer.Option(32, help="Concurrent booking threads"),
+    bookings_per_thread: int = typer.Option(200, help="Bookings per thread"),
+    num_hotels: int = typer.Option(20, help="Hotels in the benchmark database"),
+    rooms_per_hotel: int = typer.Option(50, help="Rooms per hotel"),
+    synchronous: str = typer.Option(
+        "FULL", help="PRAGMA synchronous for the run (NORMAL or FULL)"
+    ),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Measures booking throughput from many threads with all bookings in one
+    shard versus spread over location shards, each with its own writer.
+    """
+    from db import connector
+    from db.connector import set_db_path
+    from db.models import CreateBookingInput
+    from db.shards import disable_sharding, enable_sharding
+    from shard_db import split_database
+    from tools.bookings import create_booking
+
+    connector.SYNCHRONOUS = synchronous
+    num_rooms = num_hotels * rooms_per_hotel
+
+    def guest(thread_id: int, counts: list):
+        rng = random.Random(seed + thread_id)
+        for _ in range(bookings_per_thread):
+            check_in = BASE_DATE + timedelta(days=rng.randint(0, 729))
+            check_out = check_in + timedelta(days=rng.randint(1, 5))
+            try:
+                create_booking(
+                    CreateBookingInput(
+                        customer_id=1,
+                        room_id=rng.randint(1, num_rooms),
+                        check_in_date=check_in.isoformat(),
+                        check_out_date=check_out.isoformat(),
+                    )
+                )
+                counts[0] += 1
+            except ValueError:
+                counts[1] += 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_database(
+            path, num_hotels, rooms_per_hotel, 0, seed=seed, num_locations=num_shards
+        )
+
+        for count in (1, num_shards):
+            split_dir = Path(tmp) / f"split{count}"
+            split_database(path, split_dir, count)
+            set_db_path(split_dir / path.name, pool_size=threads)
+            router = enable_sharding(pool_size=threads)
+            router.start_writers()
+
+            counts = [0, 0]
+            workers = [
+                threading.Thread(target=guest, args=(i, counts)) for i in range(threads)
+            ]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+
+            total = threads * bookings_per_thread
+            print(
+                f"[{count} shard{'s' if count > 1 else ''}] {total} bookings in "
+                f"{elapsed:.2f}s ({total / elapsed:.0f}/s), {counts[0]} booked, "
+                f"{counts[1]} conflicts"
+            )
+            for shard in router.shards.values():
+                print(f"  shard {shard.id} writer stats: {shard.writer.stats()}")
+            disable_sharding()
+            connector.get_pool().close()
+
+
+@app.command()
+def conversations(
+    sessions: int = typer.Option(500, help="Concurrent guest conversations"),
+    messages: int = typer.Option(3, help="Messages per conversation"),
+    llm_latency: float = typer.Option(0.05, help="Seconds per mock LLM reply"),
+    llm_concurrency: int = typer.Option(8, help="LLM turns allowed at once"),
+    max_conversations: int = typer.Option(
+        100, help="Conversations kept in memory before eviction"
+    ),
+):
+    """
+    Load-tests the conversation service against a mock LLM: sessions per
+    second with LRU eviction to disk, and memory per loaded conversation.
+    """
+    import tracemalloc
+
+    from llama_index.core.tools import FunctionTool
+
+    from conversations import ConversationService
+    from mock_llm import MockLLM
+    from tool_cache import DEFAULT_TTLS, WRITE_TOOLS
+
+    async def noop(**kwargs):
+        return {}
+
+    # Stand-ins for the MCP tools, so each conversation wraps a full tool list
+    tools = [
+        FunctionTool.from_defaults(async_fn=noop, name=name, description=name)
+        for name in [*DEFAULT_TTLS, *WRITE_TOOLS]
+    ]
+
+    async def guest(service, session_id: int, latencies: list):
+        for i in range(messages):
+            start = time.perf_counter()
+            await service.handle(f"+3360{session_id:07d}", f"message {i}")
+            latencies.append(time.perf_counter() - start)
+
+    async def load(store_dir: Path):
+        service = ConversationService(
+            tools,
+            agent_llm=MockLLM(latency=llm_latency),
+            llm_concurrency=llm_concurrency,
+            max_conversations=max_conversations,
+            store_dir=store_dir,
+        )
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(guest(service, i, latencies) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+        await service.aclose()
+        return elapsed, latencies, service.stats()
+
+    async def footprint(count: int) -> float:
+        service = ConversationService(
+            tools, agent_llm=MockLLM(latency=0), max_conversations=count, store_dir=None
+        )
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            await service.handle(f"+3360{i:07d}", "hello")
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (after - before) / count
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed, latencies, stats = asyncio.run(load(Path(tmp)))
+        stored = list(Path(tmp).iterdir())
+        size = sum(path.stat().st_size for path in stored) / max(1, len(stored))
+
+    bound = llm_concurrency / llm_latency if llm_latency else float("inf")
+    print(
+        f"{sessions} sessions x {messages} messages in {elapsed:.2f}s: "
+        f"{sessions / elapsed:.1f} sessions/s, {sessions * messages / elapsed:.0f} "
+        f"messages/s (LLM bound {bound:.0f}/s)"
+    )
+    print(f"reply latency   {summarize(latencies)}")
+    print(f"service stats   {stats}")
+    print(f"on disk         {len(stored)} conversations, {size / 1024:.1f} KiB each")
+    per_session = asyncio.run(footprint(min(sessions, 200)))
+    print(f"in memory       {per_session / 1024:.1f} KiB per conversation")
+
+
+@app.command()
+def compaction(
+    turns: int = typer.Option(30, help="Conversation turns to simulate"),
+    rooms_per_result: int = typer.Option(20, help="Rooms in each search result"),
+    token_budget: int = typer.Option(2000, help="Compaction token budget"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Replays a long booking conversation and reports the chat history sent to
+    the LLM each turn with and without compaction, and the compaction cost.
+    """
+    from llama_index.core.base.llms.types import ChatMessage, MessageRole
+
+    from compaction import ContextCompactor
+
+    rng = random.Random(seed)
+    compactor = ContextCompactor(token_budget=token_budget)
+
+    def turn(i: int) -> list[ChatMessage]:
+        hotel_id = rng.randint(1, 50)
+        rooms = [
+            {
+                "id": rng.randint(1, 10_000),
+                "room_number": str(rng.randint(100, 999)),
+                "room_type": rng.choice(["Single", "Double", "Suite"]),
+                "price_per_night": rng.randint(50, 500) * 100,
+                "capacity": rng.choice([1, 2, 4]),
+            }
+            for _ in range(rooms_per_result)
+        ]
+        result = {"rooms": rooms, "next_cursor": "eyJjIjogMiwgImkiOiAyMH0"}
+        return [
+            ChatMessage(
+                role=MessageRole.USER,
+                content=f"Which rooms are free in hotel {hotel_id} next week?",
+            ),
+            ChatMessage(
+                role=MessageRole.ASSISTANT,
+                content="",
+                additional_kwargs={
+                    "tool_calls": [
+                        {
+                            "function": {
+                                "name": "search_rooms",
+                                "arguments": {"hotel_id": hotel_id},
+                            }
+                        }
+                    ]
+                },
+            ),
+            ChatMessage(
+                role=MessageRole.TOOL, content=json.dumps(result, separators=(",", ":"))
+            ),
+            ChatMessage(
+                role=MessageRole.ASSISTANT,
+                content=f"Hotel {hotel_id} has {len(rooms)} rooms free, from "
+                f"{min(r['price_per_night'] for r in rooms) / 100:.2f} per night.",
+            ),
+        ]
+
+    full: list = []
+    compacted: list = []
+    costs = []
+    print(f"{'turn':>4} {'full':>8} {'compacted':>10} {'saved':>8} {'cost':>9}")
+    for i in range(1, turns + 1):
+        start = time.perf_counter()
+        compacted = compactor.compact(compacted)
+        costs.append(time.perf_counter() - start)
+        if i == 1 or i % 5 == 0:
+            full_tokens = compactor.count(full)
+            print(
+                f"{i:>4} {full_tokens:>8} {compactor.last_tokens:>10} "
+                f"{full_tokens - compactor.last_tokens:>8} "
+                f"{costs[-1] * 1000:>7.2f}ms"
+            )
+        messages = turn(i)
+        full += messages
+        compacted = compacted + messages
+
+    print(f"compaction cost {summarize(costs)}")
+    print(f"compactor stats {compactor.stats()}")
+
+
+@app.command()
+def customers(
+    num_customers: int = typer.Option(1_000_000, help="Customers to generate"),
+    searches: int = typer.Option(200, help="Searches to time per query type"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    """
+    Compares the old LIKE '%name%' customer scan with the trigram FTS index,
+    and exact against normalized phone lookups.
+    """
+    from faker.providers.person.en_US import Provider as PersonProvider
+
+    from db.connector import connection, set_db_path
+    from db.migrations import apply_migrations
+    from db.models import CustomerSearchInput
+    from tools.customers import get_customer
+
+    def phone(c: int, dotted: bool = False) -> str:
+        area, exchange, line = 200 + c // 10_000_000, c // 10_000 % 1000, c % 10_000
+        if dotted:
+            return f"{area}.{exchange:03d}.{line:04d}"
+        return f"({area}) {exchange:03d}-{line:04d}"
+
+    rng = random.Random(seed)
+    first_names = sorted(set(PersonProvider.first_names))
+    last_names = sorted(set(PersonProvider.last_names))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_database(path, 1, 1, 0, num_customers=0, seed=seed)
+
+        start = time.perf_counter()
+        conn = sqlite3.connect(path)
+        conn.executemany(
+            "INSERT INTO customers (id, name, phone_number) VALUES (?, ?, ?)",
+            (
+                (
+                    c,
+                    f"{rng.choice(first_names)} {rng.choice(last_names)}",
+                    phone(c),
+                )
+                for c in range(1, num_customers + 1)
+            ),
+        )
+        conn.commit()
+        print(
+            f"Inserted {num_customers} customers in {time.perf_counter() - start:.1f}s"
+        )
+
+        fragments = [rng.choice(last_names)[:5] for _ in range(searches)]
+        phones = [rng.randint(1, num_customers) for _ in range(searches)]
+
+        def timed(run, items):
+            samples = []
+            for item in items:
+                begin = time.perf_counter()
+                run(item)
+                samples.append(time.perf_counter() - begin)
+            return summarize(samples)
+
+        like = "SELECT id, name, phone_number FROM customers WHERE name LIKE ?"
+        print(
+            "  name LIKE scan  ",
+            timed(lambda f: conn.execute(like, (f"%{f}%",)).fetchall(), fragments),
+        )
+        exact = "SELECT id, name, phone_number FROM customers WHERE phone_number = ?"
+        print(
+            "  phone exact     ",
+            timed(
+                lambda c: conn.execute(
+                    exact,
+                    (phone(c),),
+                ).fetchall(),
+                phones,
+            ),
+        )
+
+        start = time.perf_counter()
+        apply_migrations(conn)
+        conn.close()
+        print(
+            f"Migrations (FTS build + backfill) in {time.perf_counter() - start:.1f}s"
+        )
+
+        set_db_path(path)
+        print(
+            "  name FTS, 20    ",
+            timed(
+                lambda f: get_customer(CustomerSearchInput(name=f)),
+                fragments,
+            ),
+        )
+        print(
+            "  name FTS, 100   ",
+            timed(
+                lambda f: get_customer(CustomerSearchInput(name=f, limit=100)),
+                fragments,
+            ),
+        )
+        print(
+            "  phone normalized",
+            timed(
+                lambda c: get_customer(
+                    CustomerSearchInput(phone_number=phone(c, dotted=True))
+                ),
+                phones,
+            ),
+        )
+        with connection() as conn:
+            size = conn.execute(
+                "SELECT page_count * page_size FROM pragma_page_count, pragma_page_size"
+            ).fetchone()[0]
+        print(f"Database size with indexes: {size / 1024 / 1024:.1f} MiB")
+
+
+@app.command()
+def serialization(
+    rooms: int = typer.Option(5000, help="Rooms returned per call"),
+    repeats: int = typer.Option(50, help="Calls timed per path"),
+):
+    """
+    Compares a large room list built as one Pydantic model per row and encoded
+    by FastMCP's default path with row dicts encoded once. Uses a hotel's room
+    catalogue, since searches are paged.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        build_database(path, 1, rooms, 0, num_customers=0)
+
+        os.environ["HMS_DB_PATH"] = str(path)
+        import mcp_server
+        from db.connector import set_db_path
+        from db.models import HotelRoomsInput
+        from fastmcp import FastMCP
+        from tools.rooms import find_hotel_rooms, get_hotel_rooms
+
+        set_db_path(path)
+        data = HotelRoomsInput(hotel_id=1)
+        server = FastMCP("serialization")
+
+        # Models per row, model_dump, FastMCP's default encoding
+        @server.tool()
+        async def before(hotel_id: int):
+            rooms = get_hotel_rooms(HotelRoomsInput(hotel_id=hotel_id))
+            return {"rooms": [room.model_dump() for room in rooms]}
+
+        # Row dicts encoded once, as the server's tools do
+        @server.tool()
+        @mcp_server.json_result
+        async def after(hotel_id: int):
+            return {"rooms": find_hotel_rooms(HotelRoomsInput(hotel_id=hotel_id))}
+
+        def timed(run) -> list[float]:
+            run()
+            samples = []
+            for _ in range(repeats):
+                begin = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - begin)
+            return samples
+
+        async def tools():
+            return await server.get_tool("before"), await server.get_tool("after")
+
+        before_tool, after_tool = asyncio.run(tools())
+        arguments = {"hotel_id": 1}
+        print(f"{rooms} rooms per result, encoder: {mcp_server.JSON_ENCODER}")
+        print(
+            "  rows -> models -> dicts   ",
+            summarize(
+                timed(lambda: [room.model_dump() for room in get_hotel_rooms(data)])
+            ),
+        )
+        print(
+            "  rows -> dicts             ",
+            summarize(timed(lambda: find_hotel_rooms(data))),
+        )
+        print(
+            "  tool call, before         ",
+            summarize(timed(lambda: asyncio.run(before_tool.run(arguments)))),
+        )
+        print(
+            "  tool call, fast path      ",
+            summarize(timed(lambda: asyncio.run(after_tool.run(arguments)))),
+        )
+
+
+SUITE_TOOLS = (
+    "get_available_rooms",
+    "create_booking",
+    "cancel_booking",
+    "get_customer",
+    "get_hotels",
+    "get_locations",
+)
+
+
+def _measure(call, items) -> dict:
+    """Time ``call(item)`` sequentially; ValueErrors (conflicts) are counted."""
+    samples = []
+    errors = 0
+    start = time.perf_counter()
+    for item in items:
+        begin = time.perf_counter()
+        try:
+            call(item)
+        except ValueError:
+            errors += 1
+        samples.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "errors": errors,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "mean_ms": statistics.fmean(ms) if ms else 0.0,
+        "throughput_per_s": len(ms) / elapsed if elapsed else 0.0,
+    }
+
+
+def _run_suite_scale(
+    path: Path,
+    num_bookings: int,
+    iterations: int,
+    hotels_per_location: int,
+    rooms_per_hotel: int,
+    seed: int,
+    backend: str = "sqlite",
+) -> dict:
+    from db.connector import set_db_path
+    from db.migrations import apply_migrations
+    from db.models import (
+        CancelBookingInput,
+        CreateBookingInput,
+        CustomerSearchInput,
+        HotelsInput,
+        SearchRoomsInput,
+    )
+    from populate_db import generate_bulk
+    from tools.bookings import cancel_booking, create_booking
+    from tools.customers import get_customer
+    from tools.hotels import get_hotels
+    from tools.locations import get_locations
+    from tools.repository import open_repository
+    from tools.rooms import get_available_rooms
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    apply_migrations(conn)
+    report = generate_bulk(
+        conn,
+        seed=seed,
+        num_hotels_per_location=hotels_per_location,
+        num_rooms_per_hotel=rooms_per_hotel,
+        num_customers=max(100, num_bookings // 10),
+        num_bookings=num_bookings,
+        start_date=BASE_DATE,
+        end_date=BASE_DATE + timedelta(days=729),
+    )
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    location_ids = [row[0] for row in conn.execute("SELECT id FROM locations")]
+    hotel_ids = [row[0] for row in conn.execute("SELECT id FROM hotels")]
+    room_ids = [row[0] for row in conn.execute("SELECT id FROM rooms")]
+    customers = conn.execute("SELECT id, name, phone_number FROM customers").fetchall()
+    confirmed = [
+        row[0]
+        for row in conn.execute("SELECT id FROM bookings WHERE status = 'confirmed'")
+    ]
+    conn.close()
+
+    def stay() -> tuple[str, str]:
+        check_in = BASE_DATE + timedelta(days=rng.randint(0, 700))
+        check_out = check_in + timedelta(days=rng.randint(1, 7))
+        return check_in.isoformat(), check_out.isoformat()
+
+    def customer_search(customer) -> CustomerSearchInput:
+        # Alternate partial-name searches and (formatted) phone lookups
+        if rng.random() < 0.5:
+            return CustomerSearchInput(name=customer[1].split()[-1][:5])
+        return CustomerSearchInput(phone_number=customer[2])
+
+    inputs = {
+        "get_available_rooms": [
+            SearchRoomsInput(
+                hotel_id=rng.choice(hotel_ids),
+                check_in_date=check_in,
+                check_out_date=check_out,
+                min_capacity=rng.randint(1, 4),
+            )
+            for check_in, check_out in (stay() for _ in range(iterations))
+        ],
+        "create_booking": [
+            CreateBookingInput(
+                customer_id=rng.choice(customers)[0],
+                room_id=rng.choice(room_ids),
+                check_in_date=check_in,
+                check_out_date=check_out,
+            )
+            for check_in, check_out in (stay() for _ in range(iterations))
+        ],
+        "cancel_booking": [
+            CancelBookingInput(booking_id=booking_id)
+            for booking_id in rng.sample(confirmed, min(iterations, len(confirmed)))
+        ],
+        "get_customer": [
+            customer_search(rng.choice(customers)) for _ in range(iterations)
+        ],
+        "get_hotels": [
+            HotelsInput(location_id=rng.choice(location_ids + [None]))
+            for _ in range(iterations)
+        ],
+        "get_locations": [None] * iterations,
+    }
+    calls = {
+        "get_available_rooms": get_available_rooms,
+        "create_booking": create_booking,
+        "cancel_booking": cancel_booking,
+        "get_customer": get_customer,
+        "get_hotels": get_hotels,
+        "get_locations": lambda _: get_locations(),
+    }
+
+    set_db_path(path)
+    if backend != "sqlite":
+        # Same workload against the backend's repository methods
+        repository = open_repository(backend)
+        calls = {
+            "get_available_rooms": repository.find_available_rooms,
+            "create_booking": repository.create_booking,
+            "cancel_booking": repository.cancel_booking,
+            "get_customer": repository.find_customers,
+            "get_hotels": repository.find_hotels,
+            "get_locations": lambda _: repository.list_locations(),
+        }
+
+    # Warm the page cache and statement caches with the read tools first;
+    # writes are not replayed because they would change the data
+    for name in ("get_available_rooms", "get_customer", "get_hotels", "get_locations"):
+        for item in inputs[name][: max(1, iterations // 10)]:
+            calls[name](item)
+
+    tools = {}
+    for name in SUITE_TOOLS:
+        tools[name] = _measure(calls[name], inputs[name])
+        print(f"  {name:20s} {summarize_stats(tools[name])}")
+    return {
+        "build_seconds": build_seconds,
+        "rows": {table: rows for table, (rows, _) in report.items()},
+        "tools": tools,
+    }
+
+
+def summarize_stats(stats: dict) -> str:
+    return (
+        f"n={stats['n']:5d}  p50={stats['p50_ms']:8.3f}ms  "
+        f"p95={stats['p95_ms']:8.3f}ms  p99={stats['p99_ms']:8.3f}ms  "
+        f"{stats['throughput_per_s']:9.0f}/s  errors={stats['errors']}"
+    )
+
+
+@app.command()
+def suite(
+    scales: str = typer.Option(
+        "1000,100000,1000000", help="Comma-separated booking counts to test"
+    ),
+    iterations: int = typer.Option(500, help="Calls timed per tool and scale"),
+    hotels_per_location: int = typer.Option(10, help="Hotels per location"),
+    rooms_per_hotel: int = typer.Option(100, help="Rooms per hotel"),
+    output: Path = typer.Option(
+        Path("benchmark.json"), help="Where to write the JSON results"
+    ),
+    seed: int = typer.Option(42, help="Random seed"),
+    backend: str = typer.Option("sqlite", help="Storage backend (sqlite or memory)"),
+):
+    """
+    Times every tool function against temporary databases of several sizes
+    and writes p50/p95/p99 latency and throughput to a JSON file.
+    """
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": seed,
+        "backend": backend,
+        "iterations": iterations,
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in (int(value) for value in scales.split(",")):
+            print(f"[{scale} bookings]")
+            results["scales"][str(scale)] = _run_suite_scale(
+                Path(tmp) / f"suite_{scale}.db",
+                scale,
+                iterations,
+                hotels_per_location,
+                rooms_per_hotel,
+                seed,
+                backend,
+            )
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {output}")
+
+
+@app.command()
+def compare(
+    baseline: Path = typer.Argument(..., help="JSON results of the reference run"),
+    candidate: Path = typer.Argument(..., help="JSON results of the new run"),
+    metric: str = typer.Option(
+        "p50_ms", help="Metric to compare (p50_ms, p95_ms, p99_ms or mean_ms)"
+    ),
+    threshold: float = typer.Option(
+        0.10, help="Relative slowdown that counts as a regression"
+    ),
+    min_delta_ms: float = typer.Option(
+        0.05, help="Ignore absolute differences below this, to skip timer noise"
+    ),
+):
+    """
+    Compares two suite runs and exits non-zero when any tool got slower.
+    """
+    before = json.loads(baseline.read_text())["scales"]
+    after = json.loads(candidate.read_text())["scales"]
+    regressions = 0
+    for scale in before:
+        if scale not in after:
+            continue
+        print(f"[{scale} bookings]")
+        for name, old in before[scale]["tools"].items():
+            new = after[scale]["tools"].get(name)
+            if new is None:
+                continue
+            old_value, new_value = old[metric], new[metric]
+            ratio = new_value / old_value if old_value else float("inf")
+            regressed = ratio > 1 + threshold and new_value - old_value > min_delta_ms
+            regressions += regressed
+            print(
+                f"  {name:20s} {old_value:9.3f}ms -> {new_value:9.3f}ms "
+                f"({ratio - 1:+7.1%}){'  REGRESSION' if regressed else ''}"
+            )
+    if regressions:
+        print(f"{regressions} regression(s) above {threshold:.0%} on {metric}")
+        raise typer.Exit(code=1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    app()
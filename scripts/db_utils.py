@@ -1,3 +1,7 @@
+import sqlite3
+import sys
+from pathlib import Path
+
 from sqlalchemy import (
     create_engine,
     Column,
@@ -10,6 +14,10 @@ from sqlalchemy import (
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
+# Schema migrations live with the server code in src/hms_agent
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "hms_agent"))
+from db.migrations import apply_migrations  # noqa: E402
+
 Base = declarative_base()
 
 
@@ -95,8 +103,19 @@ DATABASE_URL = "sqlite:///./bookings.db"
 def create_database():
     engine = create_engine(DATABASE_URL)
     Base.metadata.create_all(engine)
+    migrate_database(engine.url.database)
     print("Database and tables created successfully.")
 
 
+def migrate_database(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        applied = apply_migrations(conn)
+    finally:
+        conn.close()
+    if applied:
+        print(f"Applied schema migrations: {', '.join(map(str, applied))}.")
+
+
 if __name__ == "__main__":
     create_database()
@@ -0,0 +1,420 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import typer
+
+from benchmark import BASE_DATE, percentile
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Drive a running MCP server over HTTP with concurrent sessions.
+    """
+
+
+# Weighted tool calls per traffic mix. "storm" books a few hot rooms over a
+# short window so most attempts conflict; "cancel" cancels the bookings the
+# run itself made.
+MIXES = {
+    "browse": {
+        "search_locations": 1,
+        "search_hotels": 2,
+        "list_hotel_rooms": 1,
+        "search_rooms": 4,
+        "search_rooms_by_location": 2,
+        "search_customers": 2,
+    },
+    "storm": {"search_rooms": 1, "create_reservation": 4},
+    "cancel": {"create_reservation": 1, "cancel_reservation": 2},
+    "mixed": {
+        "search_hotels": 2,
+        "search_rooms": 4,
+        "search_rooms_by_location": 2,
+        "search_customers": 2,
+        "create_reservation": 2,
+        "book_stay": 1,
+        "cancel_reservation": 1,
+    },
+}
+
+PROTOCOL_VERSION = "2025-03-26"
+
+
+def parse_sse(body: str) -> list[dict]:
+    """The JSON-RPC messages in the ``data:`` lines of an SSE body."""
+    messages = []
+    data: list[str] = []
+    for line in body.splitlines():
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif not line and data:
+            messages.append(json.loads("\n".join(data)))
+            data = []
+    if data:
+        messages.append(json.loads("\n".join(data)))
+    return messages
+
+
+def tool_payload(message: dict) -> dict:
+    """The dict a tool returned, from a tools/call reply; empty if there is none."""
+    result = message.get("result") or {}
+    if result.get("structuredContent") is not None:
+        return result["structuredContent"]
+    try:
+        payload = json.loads(result["content"][0]["text"])
+    except (KeyError, IndexError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def classify(message: dict) -> str:
+    """Whether a tools/call reply is "ok", a "conflict" or an "error"."""
+    if "error" in message:
+        return "error"
+    error = tool_payload(message).get("error")
+    # "Room is not available ...", "No matching room is available ..."
+    if error and "available for selected dates" in error:
+        return "conflict"
+    if error or (message.get("result") or {}).get("isError"):
+        return "error"
+    return "ok"
+
+
+class ToolStats:
+    """Latencies and outcomes of one tool's calls."""
+
+    __slots__ = ("latencies", "outcomes")
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.outcomes = {"ok": 0, "conflict": 0, "error": 0}
+
+    def summary(self) -> dict:
+        calls = len(self.latencies)
+        ms = [latency * 1000 for latency in self.latencies]
+        return {
+            "calls": calls,
+            "p50_ms": percentile(ms, 50),
+            "p99_ms": percentile(ms, 99),
+            "mean_ms": statistics.fmean(ms) if ms else 0.0,
+            "error_rate": self.outcomes["error"] / calls if calls else 0.0,
+            "conflict_rate": self.outcomes["conflict"] / calls if calls else 0.0,
+        }
+
+
+class MCPSession:
+    """One MCP session over streamable HTTP, as an agent would hold it."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+        self.session_id: Optional[str] = None
+        self.request_id = 0
+        self.parse_seconds = 0.0
+        self.bytes_received = 0
+
+    def _headers(self) -> dict:
+        headers = {"Accept": "application/json, text/event-stream"}
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+            headers["Mcp-Protocol-Version"] = PROTOCOL_VERSION
+        return headers
+
+    async def request(self, method: str, params: Optional[dict] = None) -> dict:
+        self.request_id += 1
+        payload = {"jsonrpc": "2.0", "id": self.request_id, "method": method}
+        if params is not None:
+            payload["params"] = params
+        response = await self.client.post(
+            self.url, json=payload, headers=self._headers()
+        )
+        response.raise_for_status()
+        if "mcp-session-id" in response.headers:
+            self.session_id = response.headers["mcp-session-id"]
+
+        body = response.text
+        self.bytes_received += len(body)
+        started = time.perf_counter()
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            messages = parse_sse(body)
+        else:
+            messages = [json.loads(body)]
+        self.parse_seconds += time.perf_counter() - started
+        # Notifications may come first; the reply carries our id
+        for message in messages:
+            if message.get("id") == self.request_id:
+                return message
+        raise RuntimeError(f"No reply to {method} in the response")
+
+    async def open(self) -> None:
+        await self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "hms-load-test", "version": "1.0.0"},
+            },
+        )
+        await self.client.post(
+            self.url,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers=self._headers(),
+        )
+
+    async def call_tool(self, name: str, arguments: dict) -> dict:
+        return await self.request("tools/call", {"name": name, "arguments": arguments})
+
+    async def close(self) -> None:
+        if self.session_id:
+            await self.client.delete(self.url, headers=self._headers())
+
+
+class Catalogue:
+    """Ids discovered from the server before the run, and bookings it made."""
+
+    def __init__(self, locations, hotels, rooms, hot_rooms):
+        self.locations: list[int] = locations
+        self.hotels: list[int] = hotels
+        self.rooms: list[int] = rooms
+        self.hot_rooms: list[int] = hot_rooms
+        self.bookings: list[int] = []
+
+    @classmethod
+    async def discover(
+        cls, session: MCPSession, max_hotels: int, hot_rooms: int, rng: random.Random
+    ) -> "Catalogue":
+        locations = tool_payload(await session.call_tool("search_locations", {}))
+        hotels = tool_payload(
+            await session.call_tool("search_hotels", {"limit": max_hotels})
+        )
+        hotel_ids = [hotel["id"] for hotel in hotels.get("hotels", [])]
+        rooms = []
+        for hotel_id in hotel_ids:
+            listed = tool_payload(
+                await session.call_tool("list_hotel_rooms", {"hotel_id": hotel_id})
+            )
+            rooms.extend(room["id"] for room in listed.get("rooms", []))
+        if not rooms:
+            raise RuntimeError("The server has no rooms to book")
+        return cls(
+            [location["id"] for location in locations.get("locations", [])],
+            hotel_ids,
+            rooms,
+            rng.sample(rooms, min(hot_rooms, len(rooms))),
+        )
+
+
+def _stay(rng: random.Random, days: int, max_nights: int = 5) -> dict:
+    check_in = BASE_DATE + timedelta(days=rng.randrange(days))
+    check_out = check_in + timedelta(days=rng.randint(1, max_nights))
+    return {
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+    }
+
+
+def tool_call(
+    tool: str, mix: str, catalogue: Catalogue, rng: random.Random
+) -> tuple[str, dict]:
+    """The tool and arguments of the next call of ``mix``."""
+    # Storms crowd a few rooms into two weeks; other mixes spread over a year
+    days = 14 if mix == "storm" else 365
+    if tool == "cancel_reservation":
+        if not catalogue.bookings:
+            tool = "create_reservation"
+        else:
+            booking_id = catalogue.bookings.pop(rng.randrange(len(catalogue.bookings)))
+            return tool, {"booking_id": booking_id}
+    if tool == "search_locations":
+        return tool, {}
+    if tool == "search_hotels":
+        return tool, {"location_id": rng.choice(catalogue.locations)}
+    if tool == "list_hotel_rooms":
+        return tool, {"hotel_id": rng.choice(catalogue.hotels)}
+    if tool == "search_rooms":
+        return tool, {
+            "hotel_id": rng.choice(catalogue.hotels),
+            "min_capacity": rng.randint(1, 4),
+            **_stay(rng, days),
+        }
+    if tool == "search_rooms_by_location":
+        return tool, {
+            "location_id": rng.choice(catalogue.locations),
+            "min_capacity": rng.randint(1, 4),
+            **_stay(rng, days),
+        }
+    if tool == "search_customers":
+        return tool, {"phone_number": f"555-{rng.randint(1, 1000):07d}"}
+    if tool == "create_reservation":
+        rooms = catalogue.hot_rooms if mix == "storm" else catalogue.rooms
+        return tool, {
+            "customer_id": 1,
+            "room_id": rng.choice(rooms),
+            **_stay(rng, days),
+        }
+    if tool == "book_stay":
+        guest = rng.randint(1, 1000)
+        return tool, {
+            "hotel_id": rng.choice(catalogue.hotels),
+            "name": f"Customer {guest}",
+            "phone_number": f"555-{guest:07d}",
+            "min_capacity": rng.randint(1, 2),
+            **_stay(rng, days),
+        }
+    raise ValueError(f"Unknown tool {tool!r}")
+
+
+async def run_load(
+    url: str,
+    mix: str,
+    sessions: int,
+    rate: float,
+    duration: float,
+    hot_rooms: int = 5,
+    max_hotels: int = 20,
+    seed: int = 42,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> dict:
+    """Replay ``mix`` at ``rate`` calls per second over ``sessions`` sessions.
+
+    Arrivals are open-loop: every call has a scheduled time and its latency
+    is measured from that time, so a saturated server shows up as queueing
+    delay instead of a lower offered rate.
+    """
+    weights = MIXES[mix]
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(
+        timeout=60.0, limits=limits, transport=transport
+    ) as client:
+        setup = MCPSession(client, url)
+        await setup.open()
+        catalogue = await Catalogue.discover(
+            setup, max_hotels, hot_rooms, random.Random(seed)
+        )
+        await setup.close()
+
+        stats: dict[str, ToolStats] = {}
+        opened = [MCPSession(client, url) for _ in range(sessions)]
+        await asyncio.gather(*(session.open() for session in opened))
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def drive(session_id: int, session: MCPSession) -> None:
+            rng = random.Random(seed + session_id)
+            scheduled = start
+            while True:
+                scheduled += rng.expovariate(rate / sessions)
+                if scheduled - start >= duration:
+                    return
+                tool, arguments = tool_call(
+                    rng.choices(list(weights), list(weights.values()))[0],
+                    mix,
+                    catalogue,
+                    rng,
+                )
+                await asyncio.sleep(max(0.0, scheduled - loop.time()))
+                try:
+                    message = await session.call_tool(tool, arguments)
+                    outcome = classify(message)
+                except (httpx.HTTPError, RuntimeError, ValueError):
+                    message, outcome = {}, "error"
+                tool_stats = stats.setdefault(tool, ToolStats())
+                tool_stats.latencies.append(loop.time() - scheduled)
+                tool_stats.outcomes[outcome] += 1
+                # Bookings made by the run are what cancellations cancel
+                if outcome == "ok" and tool != "cancel_reservation":
+                    booking_id = tool_payload(message).get("booking_id")
+                    if booking_id is not None:
+                        catalogue.bookings.append(booking_id)
+
+        await asyncio.gather(*(drive(i, session) for i, session in enumerate(opened)))
+        elapsed = loop.time() - start
+        await asyncio.gather(*(session.close() for session in opened))
+
+    total = ToolStats()
+    for tool_stats in stats.values():
+        total.latencies.extend(tool_stats.latencies)
+        for outcome, count in tool_stats.outcomes.items():
+            total.outcomes[outcome] += count
+    calls = len(total.latencies)
+    parse_seconds = sum(session.parse_seconds for session in opened)
+    return {
+        "mix": mix,
+        "sessions": sessions,
+        "target_rate": rate,
+        "elapsed_s": elapsed,
+        "throughput": calls / elapsed if elapsed else 0.0,
+        "tools": {tool: stats[tool].summary() for tool in sorted(stats)},
+        "all": total.summary(),
+        "sse": {
+            "parse_us_per_call": parse_seconds / calls * 1e6 if calls else 0.0,
+            "kib_per_call": (
+                sum(session.bytes_received for session in opened) / calls / 1024
+                if calls
+                else 0.0
+            ),
+            "share_of_latency": parse_seconds / sum(total.latencies) if calls else 0.0,
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"[{report['mix']}] {report['sessions']} sessions, "
+        f"target {report['target_rate']:.0f}/s: "
+        f"{report['throughput']:.0f} calls/s over {report['elapsed_s']:.1f}s"
+    )
+    rows = [*report["tools"].items(), ("all", report["all"])]
+    for tool, summary in rows:
+        print(
+            f"  {tool:25s} n={summary['calls']:6d}  p50={summary['p50_ms']:8.2f}ms  "
+            f"p99={summary['p99_ms']:8.2f}ms  errors={summary['error_rate']:6.1%}  "
+            f"conflicts={summary['conflict_rate']:6.1%}"
+        )
+    sse = report["sse"]
+    print(
+        f"  SSE parsing: {sse['parse_us_per_call']:.1f}us per call "
+        f"({sse['share_of_latency']:.2%} of latency), "
+        f"{sse['kib_per_call']:.2f} KiB per reply"
+    )
+
+
+@app.command()
+def run(
+    url: str = typer.Option("http://127.0.0.1:8000/mcp", help="MCP endpoint"),
+    mix: str = typer.Option("mixed", help=f"Traffic mix: {', '.join(MIXES)}"),
+    sessions: int = typer.Option(32, help="Concurrent MCP sessions"),
+    rate: float = typer.Option(100.0, help="Target tool calls per second overall"),
+    duration: float = typer.Option(30.0, help="Seconds of traffic"),
+    hot_rooms: int = typer.Option(5, help="Rooms the storm mix books"),
+    max_hotels: int = typer.Option(20, help="Hotels the calls are spread over"),
+    seed: int = typer.Option(42, help="Random seed"),
+    output: Optional[Path] = typer.Option(None, help="Write the report as JSON"),
+):
+    """
+    Replays a traffic mix against the server and reports throughput, per-tool
+    p50/p99 latency, error and conflict rates and SSE parsing overhead.
+    """
+    if mix not in MIXES:
+        raise typer.BadParameter(f"Unknown mix {mix!r}; use one of {list(MIXES)}")
+    report = asyncio.run(
+        run_load(url, mix, sessions, rate, duration, hot_rooms, max_hotels, seed)
+    )
+    print_report(report)
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    app()
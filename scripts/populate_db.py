@@ -1,11 +1,16 @@
 import typer
-from datetime import datetime, timedelta
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
 from faker import Faker
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import random
+import sqlite3
+import time
 
-from db_utils import Location, Hotel, Room, Customer, Booking
+from db_utils import Base, Location, Hotel, Room, Customer, Booking, migrate_database
+from db.migrations import daily_stats_deferred
+from db.models import EPOCH_ORDINAL, normalize_phone
 
 app = typer.Typer()
 fake = Faker()
@@ -157,5 +162,301 @@ def populate_bookings(
     print("Booking population complete.")
 
 
+class RoomCalendar:
+    """Confirmed stays of one room as sorted, non-overlapping intervals."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+
+    def try_add(self, start: int, end: int) -> bool:
+        # Intervals left of ``index`` start before the new stay ends; only the
+        # last of them can still be running when it begins
+        index = bisect_left(self.starts, end)
+        if index and self.ends[index - 1] > start:
+            return False
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        return True
+
+
+def _insert_chunked(
+    conn: sqlite3.Connection,
+    sql: str,
+    rows: list[tuple],
+    chunk_size: int,
+    commit: bool = True,
+) -> None:
+    for offset in range(0, len(rows), chunk_size):
+        conn.executemany(sql, rows[offset : offset + chunk_size])
+        if commit:
+            conn.commit()
+
+
+def generate_bulk(
+    conn: sqlite3.Connection,
+    seed: int = 42,
+    num_hotels_per_location: int = 10,
+    num_rooms_per_hotel: int = 100,
+    num_customers: int = 100_000,
+    num_bookings: int = 1_000_000,
+    start_date: date = date(2026, 1, 1),
+    end_date: date = date(2027, 12, 31),
+    chunk_size: int = 50_000,
+) -> dict[str, tuple[int, float]]:
+    """
+    Generates a reproducible dataset on top of whatever ``conn`` already holds.
+
+    The same seed on the same starting database always produces the same rows.
+    Overlaps are checked against in-memory per-room calendars (seeded with the
+    confirmed bookings already stored) instead of one query per booking, and
+    rows are written with executemany in chunked transactions. Bookings go in
+    one transaction that also rebuilds hotel_daily_stats. Returns
+    ``{table: (rows_created, seconds)}``.
+    """
+    rng = random.Random(seed)
+    faker = Faker()
+    faker.seed_instance(seed)
+    report = {}
+
+    # Locations
+    started = time.perf_counter()
+    locations = [
+        (city, country) for country, cities in LOCATION_DATA.items() for city in cities
+    ]
+    before = conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+    _insert_chunked(
+        conn,
+        "INSERT OR IGNORE INTO locations (city, country) VALUES (?, ?)",
+        locations,
+        chunk_size,
+    )
+    location_ids = [
+        row[0] for row in conn.execute("SELECT id FROM locations ORDER BY id")
+    ]
+    created = len(location_ids) - before
+    report["locations"] = (created, time.perf_counter() - started)
+
+    # Hotels
+    started = time.perf_counter()
+    hotel_ids_before = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) FROM hotels"
+    ).fetchone()[0]
+    hotels = [
+        (faker.company(), location_id)
+        for location_id in location_ids
+        for _ in range(num_hotels_per_location)
+    ]
+    _insert_chunked(
+        conn, "INSERT INTO hotels (name, location_id) VALUES (?, ?)", hotels, chunk_size
+    )
+    report["hotels"] = (len(hotels), time.perf_counter() - started)
+    hotel_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM hotels WHERE id > ? ORDER BY id", (hotel_ids_before,)
+        )
+    ]
+
+    # Rooms
+    started = time.perf_counter()
+    room_types = list(ROOM_CAPACITY.keys())
+    rooms = []
+    for hotel_id in hotel_ids:
+        for i in range(num_rooms_per_hotel):
+            room_type = rng.choice(room_types)
+            rooms.append(
+                (
+                    hotel_id,
+                    f"{i + 1}",
+                    room_type,
+                    rng.randint(50, 500) * 100,  # In cents
+                    ROOM_CAPACITY[room_type],
+                )
+            )
+    _insert_chunked(
+        conn,
+        """
+        INSERT INTO rooms (hotel_id, room_number, room_type, price_per_night, capacity)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        rooms,
+        chunk_size,
+    )
+    report["rooms"] = (len(rooms), time.perf_counter() - started)
+
+    # Customers; Faker is too slow to call per row at this scale, so names are
+    # combined from seeded pools and phone numbers are derived from a counter
+    started = time.perf_counter()
+    taken = {
+        row[0]
+        for row in conn.execute(
+            "SELECT phone_normalized FROM customers WHERE phone_normalized IS NOT NULL"
+        )
+    }
+    first_names = [faker.first_name() for _ in range(1000)]
+    last_names = [faker.last_name() for _ in range(1000)]
+    customers = []
+    counter = rng.randint(0, 10**6)
+    while len(customers) < num_customers:
+        counter += 1
+        phone_number = f"+1-{200 + counter // 10**7 % 800:03d}-{counter // 10**4 % 1000:03d}-{counter % 10**4:04d}"
+        normalized = normalize_phone(phone_number)
+        if normalized in taken:
+            continue
+        taken.add(normalized)
+        customers.append(
+            (
+                f"{rng.choice(first_names)} {rng.choice(last_names)}",
+                phone_number,
+                normalized,
+            )
+        )
+    _insert_chunked(
+        conn,
+        """
+        INSERT INTO customers (name, phone_number, phone_normalized)
+        VALUES (?, ?, ?)
+        """,
+        customers,
+        chunk_size,
+    )
+    report["customers"] = (len(customers), time.perf_counter() - started)
+
+    # Bookings
+    started = time.perf_counter()
+    room_ids = [row[0] for row in conn.execute("SELECT id FROM rooms ORDER BY id")]
+    customer_ids = [
+        row[0] for row in conn.execute("SELECT id FROM customers ORDER BY id")
+    ]
+    if not room_ids or not customer_ids:
+        report["bookings"] = (0, time.perf_counter() - started)
+        return report
+
+    calendars: dict[int, RoomCalendar] = {}
+    for room_id, check_in, check_out in conn.execute(
+        """
+        SELECT room_id, check_in_date, check_out_date
+        FROM bookings
+        WHERE status = 'confirmed'
+        ORDER BY room_id, check_in_date
+        """
+    ):
+        calendar = calendars.setdefault(room_id, RoomCalendar())
+        calendar.try_add(
+            date.fromisoformat(check_in).toordinal(),
+            date.fromisoformat(check_out).toordinal(),
+        )
+
+    first_day, last_day = start_date.toordinal(), end_date.toordinal()
+    bookings = []
+    attempts = 0
+    # Give up on a crowded calendar instead of spinning forever
+    while len(bookings) < num_bookings and attempts < num_bookings * 3:
+        attempts += 1
+        room_id = rng.choice(room_ids)
+        check_in = rng.randint(first_day, last_day)
+        check_out = check_in + rng.randint(1, 10)
+        calendar = calendars.get(room_id)
+        if calendar is None:
+            calendar = calendars[room_id] = RoomCalendar()
+        if calendar.try_add(check_in, check_out):
+            bookings.append((room_id, check_in, check_out, rng.choice(customer_ids)))
+
+    # Insert in (room, date) order so index pages fill sequentially. The
+    # daily stats triggers would double the time taken; they are dropped and
+    # the stats rebuilt once, in the same transaction as the rows.
+    bookings.sort()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        with daily_stats_deferred(conn):
+            _insert_chunked(
+                conn,
+                """
+                INSERT INTO bookings (
+                  customer_id, room_id, check_in_date, check_out_date, status,
+                  check_in_day, check_out_day
+                )
+                VALUES (?, ?, ?, ?, 'confirmed', ?, ?)
+                """,
+                [
+                    (
+                        customer_id,
+                        room_id,
+                        date.fromordinal(check_in).isoformat(),
+                        date.fromordinal(check_out).isoformat(),
+                        check_in - EPOCH_ORDINAL,
+                        check_out - EPOCH_ORDINAL,
+                    )
+                    for room_id, check_in, check_out, customer_id in bookings
+                ],
+                chunk_size,
+                commit=False,
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    report["bookings"] = (len(bookings), time.perf_counter() - started)
+    return report
+
+
+@app.command()
+def populate_bulk(
+    database: str = typer.Option("./bookings.db", help="SQLite file to fill"),
+    seed: int = typer.Option(42, help="Random seed; same seed, same data"),
+    num_hotels_per_location: int = typer.Option(
+        10, help="Number of hotels per location"
+    ),
+    num_rooms_per_hotel: int = typer.Option(100, help="Number of rooms per hotel"),
+    num_customers: int = typer.Option(100_000, help="Number of customers to create"),
+    num_bookings: int = typer.Option(1_000_000, help="Number of bookings to create"),
+    start_date: datetime = typer.Option(
+        "2026-01-01", help="Start date for bookings in YYYY-MM-DD format"
+    ),
+    end_date: datetime = typer.Option(
+        "2027-12-31", help="End date for bookings in YYYY-MM-DD format"
+    ),
+    chunk_size: int = typer.Option(50_000, help="Rows per insert transaction"),
+):
+    """
+    Quickly generates a large, reproducible dataset for load testing.
+    """
+    bulk_engine = create_engine(f"sqlite:///{database}")
+    Base.metadata.create_all(bulk_engine)
+    bulk_engine.dispose()
+    migrate_database(database)
+
+    conn = sqlite3.connect(database)
+    # Durability does not matter while generating throwaway data
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    try:
+        started = time.perf_counter()
+        report = generate_bulk(
+            conn,
+            seed=seed,
+            num_hotels_per_location=num_hotels_per_location,
+            num_rooms_per_hotel=num_rooms_per_hotel,
+            num_customers=num_customers,
+            num_bookings=num_bookings,
+            start_date=start_date.date(),
+            end_date=end_date.date(),
+            chunk_size=chunk_size,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    for table, (rows, seconds) in report.items():
+        rate = rows / seconds if seconds else 0
+        print(f"Created {rows} {table} in {seconds:.2f}s ({rate:,.0f} rows/s).")
+    total = sum(rows for rows, _ in report.values())
+    print(f"Bulk population complete: {total} rows in {elapsed:.2f}s.")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,215 @@
+import sqlite3
+from pathlib import Path
+
+import typer
+from sqlalchemy import create_engine
+
+from db_utils import Base, migrate_database
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Split a bookings database into per-location shard files.
+    """
+
+
+def plan_shards(conn: sqlite3.Connection, num_shards: int) -> dict[int, int]:
+    """Assign every location to a shard, balancing bookings across shards.
+
+    Locations are placed biggest first on the shard with the fewest bookings
+    so far, so write load spreads evenly.
+    """
+    locations = conn.execute(
+        """
+        SELECT l.id, COUNT(b.id) AS bookings
+        FROM locations l
+        LEFT JOIN hotels h ON h.location_id = l.id
+        LEFT JOIN rooms r ON r.hotel_id = h.id
+        LEFT JOIN bookings b ON b.room_id = r.id
+        GROUP BY l.id
+        ORDER BY bookings DESC, l.id
+        """
+    ).fetchall()
+    # (bookings, locations) per shard; the location count breaks ties so
+    # locations without bookings still spread out
+    load = {shard_id: (0, 0) for shard_id in range(1, num_shards + 1)}
+    plan = {}
+    for location_id, bookings in locations:
+        shard_id = min(load, key=lambda shard_id: (load[shard_id], shard_id))
+        plan[location_id] = shard_id
+        load[shard_id] = (load[shard_id][0] + bookings, load[shard_id][1] + 1)
+    return plan
+
+
+def _create_schema(path: Path) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    migrate_database(str(path))
+
+
+def split_database(
+    source: Path, output_dir: Path, num_shards: int
+) -> dict[int, dict[str, int]]:
+    """Write a catalogue and ``num_shards`` shard files for ``source``.
+
+    The catalogue keeps the name of ``source`` and every table except
+    bookings, plus the shard map; shard ``k`` is ``<stem>.shard<k><suffix>``
+    next to it with the locations, hotels, rooms and bookings it owns. The
+    source database is not modified. Returns the row counts per shard.
+    """
+    catalogue_path = output_dir / source.name
+    if catalogue_path.resolve() == source.resolve():
+        raise ValueError("The output directory must differ from the source's")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shard_paths = {
+        shard_id: output_dir / f"{source.stem}.shard{shard_id}{source.suffix}"
+        for shard_id in range(1, num_shards + 1)
+    }
+    for path in [catalogue_path, *shard_paths.values()]:
+        if path.exists():
+            raise FileExistsError(f"{path} already exists")
+
+    # The backup API copies a consistent snapshot, WAL included
+    src = sqlite3.connect(source)
+    catalogue = sqlite3.connect(catalogue_path)
+    try:
+        src.backup(catalogue)
+    finally:
+        src.close()
+    catalogue.close()
+    migrate_database(str(catalogue_path))
+
+    catalogue = sqlite3.connect(catalogue_path, isolation_level=None)
+    try:
+        if catalogue.execute("SELECT 1 FROM shards LIMIT 1").fetchone():
+            raise ValueError(f"{source} has already been split")
+        orphans = catalogue.execute(
+            """
+            SELECT COUNT(*) FROM bookings b
+            LEFT JOIN rooms r ON r.id = b.room_id
+            LEFT JOIN hotels h ON h.id = r.hotel_id
+            WHERE h.location_id IS NULL
+            """
+        ).fetchone()[0]
+        if orphans:
+            raise ValueError(f"{orphans} bookings belong to rooms without a location")
+
+        plan = plan_shards(catalogue, num_shards)
+        report = {}
+        for shard_id, path in shard_paths.items():
+            _create_schema(path)
+            report[shard_id] = _fill_shard(
+                path,
+                catalogue_path,
+                [location for location, shard in plan.items() if shard == shard_id],
+            )
+
+        catalogue.execute("BEGIN IMMEDIATE")
+        catalogue.executemany(
+            "INSERT INTO shards (id, path) VALUES (?, ?)",
+            [(shard_id, path.name) for shard_id, path in shard_paths.items()],
+        )
+        catalogue.executemany(
+            "INSERT INTO location_shards (location_id, shard_id) VALUES (?, ?)",
+            plan.items(),
+        )
+        # The bookings and their daily stats now live in the shards; with the
+        # stats gone first, the delete triggers have nothing to update
+        catalogue.execute("DELETE FROM hotel_daily_stats")
+        catalogue.execute("DELETE FROM bookings")
+        catalogue.commit()
+        catalogue.execute("VACUUM")
+    except Exception:
+        catalogue.close()
+        for path in [catalogue_path, *shard_paths.values()]:
+            path.unlink(missing_ok=True)
+        raise
+    catalogue.close()
+    return report
+
+
+def _fill_shard(
+    path: Path, catalogue_path: Path, location_ids: list[int]
+) -> dict[str, int]:
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS catalogue", (str(catalogue_path),))
+        conn.execute("CREATE TEMP TABLE shard_locations (id INTEGER PRIMARY KEY)")
+        conn.executemany(
+            "INSERT INTO shard_locations (id) VALUES (?)",
+            [(location_id,) for location_id in location_ids],
+        )
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            """
+            INSERT INTO locations (id, city, country)
+            SELECT id, city, country FROM catalogue.locations
+            WHERE id IN (SELECT id FROM shard_locations)
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO hotels (id, name, location_id)
+            SELECT id, name, location_id FROM catalogue.hotels
+            WHERE location_id IN (SELECT id FROM shard_locations)
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO rooms (id, hotel_id, room_number, room_type, price_per_night, capacity)
+            SELECT id, hotel_id, room_number, room_type, price_per_night, capacity
+            FROM catalogue.rooms
+            WHERE hotel_id IN (SELECT id FROM main.hotels)
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO bookings (
+              id, customer_id, room_id, check_in_date, check_out_date, status,
+              check_in_day, check_out_day
+            )
+            SELECT id, customer_id, room_id, check_in_date, check_out_date, status,
+                   check_in_day, check_out_day
+            FROM catalogue.bookings
+            WHERE room_id IN (SELECT id FROM main.rooms)
+            """
+        )
+        conn.commit()
+        conn.execute("DETACH DATABASE catalogue")
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("locations", "hotels", "rooms", "bookings")
+        }
+    finally:
+        conn.close()
+
+
+@app.command()
+def split(
+    source: Path = typer.Argument(..., help="SQLite database to split"),
+    shards: int = typer.Option(4, min=1, help="Number of shard files"),
+    output_dir: Path = typer.Option(
+        ..., help="Directory for the catalogue and the shard files"
+    ),
+):
+    """
+    Split SOURCE by location into a catalogue plus shard files.
+
+    Point HMS_DB_PATH at the catalogue; the server finds the shards from it.
+    Hotels and rooms added after the split must be added to their shard too;
+    locations added later belong to no shard, and their hotels cannot be
+    booked ("not assigned to a shard").
+    """
+    report = split_database(source, output_dir, shards)
+    for shard_id, counts in report.items():
+        summary = ", ".join(f"{rows} {table}" for table, rows in counts.items())
+        print(f"Shard {shard_id}: {summary}.")
+    print(f"Catalogue written to {output_dir / source.name}.")
+
+
+if __name__ == "__main__":
+    app()
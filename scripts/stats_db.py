@@ -0,0 +1,85 @@
+import sqlite3
+import time
+from pathlib import Path
+
+import typer
+
+from db_utils import migrate_database
+from db.daily_stats import rebuild_daily_stats, verify_daily_stats
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """
+    Rebuild or check the daily occupancy and revenue summaries.
+    """
+
+
+def database_files(database: Path) -> list[Path]:
+    """``database`` followed by its shard files, if it has been split."""
+    conn = sqlite3.connect(database)
+    try:
+        rows = conn.execute("SELECT path FROM shards ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    return [database, *(database.parent / row[0] for row in rows)]
+
+
+@app.command()
+def rebuild(
+    database: Path = typer.Option(
+        Path("./bookings.db"), help="SQLite file or catalogue"
+    ),
+):
+    """
+    Recompute hotel_daily_stats from the bookings, in every shard of a split database.
+
+    Each file is rebuilt in one transaction, so the reporting tools keep
+    reading the old summaries until it commits.
+    """
+    migrate_database(str(database))
+    for path in database_files(database):
+        # Shards are otherwise only migrated when the server opens them
+        migrate_database(str(path))
+        started = time.perf_counter()
+        conn = sqlite3.connect(path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = rebuild_daily_stats(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - started
+        print(f"{path}: {rows} hotel days in {elapsed:.2f}s.")
+
+
+@app.command()
+def verify(
+    database: Path = typer.Option(
+        Path("./bookings.db"), help="SQLite file or catalogue"
+    ),
+    show: int = typer.Option(10, help="Drifted hotel days to list per file"),
+):
+    """
+    Compare hotel_daily_stats with the bookings; exits with 1 if they differ.
+    """
+    drifted_files = 0
+    for path in database_files(database):
+        conn = sqlite3.connect(path)
+        try:
+            drifted = verify_daily_stats(conn)
+        finally:
+            conn.close()
+        print(f"{path}: {len(drifted)} drifted hotel days.")
+        for hotel_id, day in drifted[:show]:
+            print(f"  hotel {hotel_id} on {day}")
+        drifted_files += bool(drifted)
+    if drifted_files:
+        print("Run the rebuild command to recompute them.")
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
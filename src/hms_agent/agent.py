@@ -1,12 +1,27 @@
 import asyncio
+import re
+import time
 from datetime import date
+from typing import Any, AsyncIterator, NamedTuple
 
-from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
-from llama_index.core.agent.workflow import FunctionAgent, ToolCallResult, ToolCall
+from llama_index.tools.mcp import McpToolSpec
+from llama_index.core.agent.workflow import (
+    AgentStream,
+    FunctionAgent,
+    ToolCall,
+    ToolCallResult,
+)
 from llama_index.core.workflow import Context
+from llama_index.core.llms.function_calling import FunctionCallingLLM
+from llama_index.core.memory import BaseMemory, ChatMemoryBuffer
+from llama_index.core.tools import FunctionTool
 from llama_index.llms.ollama import Ollama
 from llama_index.core import Settings
 
+from mcp_session import PersistentMCPClient
+from compaction import ContextCompactor, text_tools
+from tool_cache import ToolCallCache, cache_tools
+
 llm = Ollama(model="llama3.2", request_timeout=120.0)
 Settings.llm = llm
 
@@ -18,36 +33,155 @@ You are an expert Hotel Reservation Assistant. Your goal is to help users manage
 ### MANDATORY WORKFLOW (ORDER MATTERS)
 1. **Identify Location**: Get available locations using `search_locations`.
 2. **Find Hotel**: Use `search_hotels` (filtering by `location_id` if possible). 
-3. **Availability**: Use `search_rooms` with the `hotel_id`, `check_in_date`, `check_out_date`, and `min_capacity`.
+3. **Availability**: Use `search_rooms` with the `hotel_id`, `check_in_date`, `check_out_date`, and `min_capacity`. If the user has not picked a hotel yet, use `search_rooms_by_location` with the `location_id` to check every hotel there in one call.
 4. **Guest Profile (CRITICAL)**: 
    - You MUST identify the customer BEFORE calling `create_reservation`.
    - Search for the customer using `search_customers` (by `name` or `phone_number`).
    - **PRIVACY RULE**: If a result is found, NEVER repeat the customer's phone number or ID back to the user. Simply confirm "I've found your profile."
    - **AUTO-REGISTRATION**: If no customer matches, inform the user "I'll create a profile for you" and immediately use `create_customer_entry` using their provided name and phone.
-5. **Confirm Booking**: Only call `create_reservation` once you have a real `customer_id`, `room_id`, and dates.
+5. **Confirm Booking**: Only call `create_reservation` once you have a real `customer_id`, `room_id`, and dates. For several rooms at once (families, groups), call `create_group_reservation` with all the `room_ids` instead of one `create_reservation` per room.
+
+### ONE-STEP BOOKING (PREFERRED)
+Once you know the `hotel_id`, the dates, the number of guests (and any room type) and the guest's name and phone number, call `book_stay` instead of steps 3 to 5. It finds or creates the guest's profile, picks a free room and books it in one call. Tell the user the booked room type and price; the privacy rule still applies.
 
 ### CRITICAL RELIABILITY RULES
 - **STRICT ID POLICY**: NEVER guess, assume, or invent numeric IDs. All IDs (Hotel ID, Room ID, Customer ID) MUST come from the "id" field of a tool's output in the current session. If you don't have an ID, call the appropriate search tool first.
 - **NO DATE INVENTION**: Strictly forbidden from assuming or inventing check-in/out dates. YOU MUST ASK the user for them.
 - **HARD HALT ON ERRORS**: If a tool returns an 'error', report it and STOP. Do NOT guess a workaround.
 - **NO HALLUCINATION**: Only use information returned by tools for hotel names, prices, or availability.
+- **STAFF REPORTS**: `hotel_occupancy_report` and `location_revenue_report` are for hotel staff. Never use them to answer guests or share occupancy or revenue figures with them.
+- **PAGING**: Search results come in pages. Only pass a tool's `next_cursor` back as `cursor` when the user wants more options than you were shown.
 
 Today's Date: {current_date}
 """
 
 
-async def get_agent(tools: McpToolSpec):
-    """Create and return a FunctionAgent with the given tools."""
-    tools = await tools.to_tool_list_async()
+def build_agent(
+    tools: list[FunctionTool],
+    cache: ToolCallCache | None = None,
+    agent_llm: FunctionCallingLLM | None = None,
+) -> FunctionAgent:
+    """Create a FunctionAgent over an already discovered tool list.
+
+    With a ``cache``, repeated read-only tool calls are answered from it; use
+    one agent and cache per conversation. Tool results reach the LLM as their
+    JSON payload.
+    """
+    if cache is not None:
+        tools = cache_tools(tools, cache)
+    tools = text_tools(tools)
     formatted_prompt = SYSTEM_PROMPT.format(current_date=date.today().isoformat())
-    agent = FunctionAgent(
+    return FunctionAgent(
         name="Agent",
         description="An agent that can work with Our Database software.",
         tools=tools,
-        llm=llm,
+        llm=agent_llm or llm,
         system_prompt=formatted_prompt,
     )
-    return agent
+
+
+async def get_agent(tools: McpToolSpec, cache: ToolCallCache | None = None):
+    """Create and return a FunctionAgent with the given tools."""
+    return build_agent(await tools.to_tool_list_async(), cache)
+
+
+# End of a sentence: closing punctuation, optionally followed by quotes or
+# brackets, then whitespace; or a line break
+SENTENCE_END = re.compile(r"[.!?…][\"')\]]*\s+|\n+")
+
+
+class StreamEvent(NamedTuple):
+    """One piece of a streamed reply.
+
+    ``kind`` is "text" (an LLM delta, or a whole sentence when streaming by
+    sentence), "tool_call", "tool_result" or "done". Tool events carry the
+    tool name as ``text`` and the agent event as ``data``; "done" carries the
+    full reply and a dict of the turn's timings in seconds and history size.
+    """
+
+    kind: str
+    text: str = ""
+    data: Any = None
+
+
+def split_sentences(buffer: str) -> tuple[list[str], str]:
+    """The complete sentences at the start of ``buffer`` and the unfinished rest."""
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(buffer):
+        sentence = buffer[start : match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, buffer[start:]
+
+
+async def stream_user_message(
+    message_content: str,
+    agent: FunctionAgent,
+    agent_context: Context,
+    memory: BaseMemory | None = None,
+    by_sentence: bool = False,
+    compactor: ContextCompactor | None = None,
+) -> AsyncIterator[StreamEvent]:
+    """Answer a user message, yielding text and tool progress as they happen.
+
+    With ``by_sentence``, text is held back until a sentence is complete (or a
+    tool is called) so a speech synthesizer can start on the first sentence.
+    With a ``compactor``, ``memory`` is compacted before the turn. The final
+    "done" event reports ``time_to_first_token`` (None if the reply had no
+    streamed text), ``duration``, and with a compactor ``history_tokens`` and
+    ``tokens_saved``.
+    """
+    started = time.perf_counter()
+    first_token = None
+    pending = ""
+    history = {}
+    if compactor is not None and memory is not None:
+        messages = memory.get_all()
+        compacted = compactor.compact(messages)
+        if compacted is not messages:
+            memory.set(compacted)
+        history = {
+            "history_tokens": compactor.last_tokens,
+            "tokens_saved": compactor.last_saved,
+        }
+    handler = agent.run(message_content, ctx=agent_context, memory=memory)
+    try:
+        async for event in handler.stream_events():
+            if type(event) is AgentStream and event.delta:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                if not by_sentence:
+                    yield StreamEvent("text", event.delta)
+                    continue
+                sentences, pending = split_sentences(pending + event.delta)
+                for sentence in sentences:
+                    yield StreamEvent("text", sentence)
+            elif type(event) is ToolCall:
+                if pending.strip():
+                    yield StreamEvent("text", pending.strip())
+                pending = ""
+                yield StreamEvent("tool_call", event.tool_name, event)
+            elif type(event) is ToolCallResult:
+                yield StreamEvent("tool_result", event.tool_name, event)
+
+        response = await handler
+    finally:
+        # The consumer stopped listening, e.g. the caller hung up
+        if not handler.done():
+            await handler.cancel_run()
+
+    if pending.strip():
+        yield StreamEvent("text", pending.strip())
+    yield StreamEvent(
+        "done",
+        str(response),
+        {
+            "time_to_first_token": first_token,
+            "duration": time.perf_counter() - started,
+            **history,
+        },
+    )
 
 
 async def handle_user_message(
@@ -55,55 +189,119 @@ async def handle_user_message(
     agent: FunctionAgent,
     agent_context: Context,
     verbose: bool = False,
+    memory: BaseMemory | None = None,
+    compactor: ContextCompactor | None = None,
 ):
-    """Handle a user message using the agent."""
-    handler = agent.run(message_content, ctx=agent_context)
-    async for event in handler.stream_events():
-        if verbose and type(event) is ToolCall:
-            print(f"Calling tool {event.tool_name} with kwargs {event.tool_kwargs}")
-        elif verbose and type(event) is ToolCallResult:
-            print(f"Tool {event.tool_name} returned {event.tool_output}")
+    """Handle a user message using the agent.
 
-    response = await handler
-    return str(response)
+    Pass the conversation's ``memory`` to keep its chat history between
+    messages; the context does not carry it from one run to the next.
+    """
+    response = ""
+    async for event in stream_user_message(
+        message_content, agent, agent_context, memory, compactor=compactor
+    ):
+        if verbose and event.kind == "tool_call":
+            print(f"Calling tool {event.text} with kwargs {event.data.tool_kwargs}")
+        elif verbose and event.kind == "tool_result":
+            print(f"Tool {event.text} returned {event.data.tool_output}")
+        elif event.kind == "done":
+            response = event.text
+    return response
+
+
+async def warm_llm() -> None:
+    """Load the model into Ollama's memory so the first reply does not wait for it."""
+    try:
+        # An empty prompt only loads the model
+        await llm.async_client.generate(
+            model=llm.model, prompt="", keep_alive=llm.keep_alive
+        )
+    except Exception as e:
+        print(f"LLM warm-up failed: {str(e)}")
 
 
 async def main():
-    # Initialize MCP client and tool spec
-    mcp_client = BasicMCPClient("http://127.0.0.1:8000/mcp")
+    started = time.perf_counter()
+
+    # One MCP session for the whole run; tool schemas come from the on-disk
+    # cache while the server version is unchanged
+    mcp_client = PersistentMCPClient("http://127.0.0.1:8000/mcp")
     mcp_tool = McpToolSpec(client=mcp_client)
 
-    # Get the agent
-    agent = await get_agent(mcp_tool)
+    # Discover the tools and load the model at the same time; tool results
+    # are memoized for this conversation
+    tool_cache = ToolCallCache()
+
+    async def connect_and_build():
+        await mcp_client.connect()
+        return await get_agent(mcp_tool, tool_cache)
 
-    # Create the agent context
+    agent, _ = await asyncio.gather(connect_and_build(), warm_llm())
     agent_context = Context(agent)
+    memory = ChatMemoryBuffer.from_defaults(llm=llm)
+    # Old tool results and turns are condensed once the history grows
+    compactor = ContextCompactor()
+    time_to_ready = time.perf_counter() - started
 
-    # Print available tools
-    tools = await mcp_tool.to_tool_list_async()
     print("Available tools:")
-    for tool in tools:
+    for tool in agent.tools:
         print(f"{tool.metadata.name}: {tool.metadata.description}")
+    source = "cache" if mcp_client.tools_from_cache else "server"
+    print(f"\nReady in {time_to_ready:.2f}s (tool schemas from {source})")
 
-    # Main interaction loop
+    # Main interaction loop; input is read off the event loop so the MCP
+    # session keeps being serviced while waiting
     print("\nEnter 'exit' to quit")
-    while True:
-        try:
-            user_input = input("\nEnter your message: ")
-            if user_input.lower() == "exit":
+    time_to_first_response = None
+    try:
+        while True:
+            try:
+                user_input = await asyncio.to_thread(input, "\nEnter your message: ")
+                if user_input.lower() == "exit":
+                    break
+
+                print(f"\nUser: {user_input}")
+                print("Agent: ", end="", flush=True)
+                async for event in stream_user_message(
+                    user_input, agent, agent_context, memory, compactor=compactor
+                ):
+                    if event.kind == "text":
+                        print(event.text, end="", flush=True)
+                    elif event.kind == "tool_call":
+                        print(
+                            f"\nCalling tool {event.text} with kwargs "
+                            f"{event.data.tool_kwargs}"
+                        )
+                    elif event.kind == "tool_result":
+                        print(f"Tool {event.text} returned {event.data.tool_output}")
+                    elif event.kind == "done":
+                        timings = event.data
+                        first_token = timings["time_to_first_token"]
+                        print(
+                            "\n(first token "
+                            + (f"{first_token:.2f}s" if first_token else "n/a")
+                            + f", reply {timings['duration']:.2f}s, "
+                            f"history {timings['history_tokens']} tokens, "
+                            f"{timings['tokens_saved']} saved)"
+                        )
+                        if time_to_first_response is None:
+                            time_to_first_response = timings["duration"]
+
+            except (KeyboardInterrupt, EOFError):
+                print("\nExiting...")
                 break
+            except Exception as e:
+                print(f"Error: {str(e)}")
+    finally:
+        await mcp_client.aclose()
 
-            print(f"\nUser: {user_input}")
-            response = await handle_user_message(
-                user_input, agent, agent_context, verbose=True
-            )
-            print(f"Agent: {response}")
-
-        except KeyboardInterrupt:
-            print("\nExiting...")
-            break
-        except Exception as e:
-            print(f"Error: {str(e)}")
+    print(
+        f"Startup: ready {time_to_ready:.2f}s, first response "
+        + (f"{time_to_first_response:.2f}s" if time_to_first_response else "n/a")
+    )
+    print(f"Tool cache: {tool_cache.stats()}")
+    print(f"Compaction: {compactor.stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,284 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from llama_index.core.tools import FunctionTool
+from llama_index.core.utils import get_tokenizer
+
+from tool_cache import structured_content
+
+# Result fields worth keeping once a tool result is old. Every id the agent
+# may have to reuse stays, as do the facts it quotes back (names, prices,
+# dates); phone numbers, countries and paging cursors go.
+KEY_FIELDS = frozenset(
+    {
+        "id",
+        "name",
+        "city",
+        "hotel_id",
+        "hotel_name",
+        "room_id",
+        "room_number",
+        "room_type",
+        "price_per_night",
+        "capacity",
+        "customer_id",
+        "booking_id",
+        "check_in_date",
+        "check_out_date",
+        "status",
+        "error",
+    }
+)
+
+# What is left of a result in a summary that is still over budget: the ids
+# and the names the guest refers to them by
+ID_FIELDS = frozenset(
+    {
+        "id",
+        "name",
+        "hotel_id",
+        "hotel_name",
+        "room_id",
+        "customer_id",
+        "booking_id",
+        "error",
+    }
+)
+
+# Availability is stale within seconds (the tool cache keeps it 30 s), so
+# these are the only results a summary may drop entirely
+AVAILABILITY_TOOLS = frozenset({"search_rooms", "search_rooms_by_location"})
+
+# Guest and assistant text kept per message in a summary
+SUMMARY_TEXT_CHARS = 200
+
+# Chat lines in a summary start with one of these; every other line is
+# "<tool name> returned <facts>", and tool names never contain ": "
+CHAT_PREFIXES = ("Guest: ", "You: ")
+
+SUMMARY_HEADER = (
+    "Summary of the earlier conversation. The ids below were returned by "
+    "tools in this session and may be used."
+)
+
+
+def tool_result_text(result: Any) -> str:
+    """What the LLM sees of an MCP tool result: its JSON payload.
+
+    The default is the CallToolResult repr, which holds the payload twice.
+    """
+    structured = structured_content(result)
+    if structured is not None:
+        return json.dumps(structured, separators=(",", ":"), ensure_ascii=False)
+    content = getattr(result, "content", None)
+    if isinstance(content, list):
+        texts = [block.text for block in content if hasattr(block, "text")]
+        if texts:
+            return "\n".join(texts)
+    return str(result)
+
+
+def text_tools(tools: list[FunctionTool]) -> list[FunctionTool]:
+    """Wrap MCP tools so their results reach the LLM as ``tool_result_text``."""
+
+    def wrap(tool: FunctionTool) -> FunctionTool:
+        async def text_fn(**kwargs):
+            return tool_result_text(await tool.async_fn(**kwargs))
+
+        return FunctionTool.from_defaults(
+            async_fn=text_fn,
+            tool_metadata=tool.metadata,
+            partial_params=tool.partial_params,
+        )
+
+    return [wrap(tool) for tool in tools]
+
+
+def key_facts(value: Any, fields: frozenset = KEY_FIELDS) -> Any:
+    """``value`` with only the scalars named in ``fields`` left, at any depth."""
+    if isinstance(value, list):
+        return [fact for fact in (key_facts(item, fields) for item in value) if fact]
+    if isinstance(value, dict):
+        facts = {}
+        for key, item in value.items():
+            if isinstance(item, (list, dict)):
+                item = key_facts(item, fields)
+                if item:
+                    facts[key] = item
+            elif key in fields and item is not None:
+                facts[key] = item
+        # A row reduced to its id is written as the bare id
+        return facts["id"] if list(facts) == ["id"] else facts
+    return value
+
+
+def compact_tool_text(text: str, fields: frozenset = KEY_FIELDS) -> str:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text[: SUMMARY_TEXT_CHARS * 2]
+    return json.dumps(
+        key_facts(data, fields), separators=(",", ":"), ensure_ascii=False
+    )
+
+
+def _tool_call_names(message: ChatMessage) -> list[str]:
+    # Ollama keeps tool calls in additional_kwargs; newer LLMs use blocks
+    names = []
+    for call in message.additional_kwargs.get("tool_calls") or []:
+        function = (
+            call.get("function") if isinstance(call, dict) else call.function
+        ) or {}
+        name = (
+            function.get("name")
+            if isinstance(function, dict)
+            else getattr(function, "name", None)
+        )
+        names.append(name or "tool")
+    names.extend(
+        block.tool_name for block in message.blocks if hasattr(block, "tool_name")
+    )
+    return names
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_TEXT_CHARS:
+        return text
+    return text[: SUMMARY_TEXT_CHARS - 3] + "..."
+
+
+class ContextCompactor:
+    """Keeps a conversation's chat history within a token budget.
+
+    Once the history exceeds ``token_budget``, tool results before the last
+    ``keep_turns`` user turns are cut down to their KEY_FIELDS. If that is not
+    enough, those older turns are replaced by one summary message with a line
+    per tool result and a shortened copy of what was said. Should the summary
+    itself be too long, the oldest results shrink to their ID_FIELDS, then
+    the oldest chat lines go and then the oldest availability results. Other
+    ids are never dropped, so the hotels, customers and bookings the system
+    prompt insists on stay available. The summary is built without the LLM,
+    so compaction adds no inference.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        keep_turns: int = 2,
+        tokenizer: Optional[Callable[[str], list]] = None,
+    ):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        tokenizer = tokenizer or get_tokenizer()
+        # Histories are recounted every turn; most of their text is unchanged
+        self._length = lru_cache(maxsize=8192)(lambda text: len(tokenizer(text)))
+        self._compactions = 0
+        self._tokens_saved = 0
+        self.last_tokens = 0
+        self.last_saved = 0
+
+    def count(self, messages: list[ChatMessage]) -> int:
+        total = 0
+        for message in messages:
+            total += self._length(message.content or "")
+            if message.additional_kwargs.get("tool_calls"):
+                calls = json.dumps(message.additional_kwargs["tool_calls"], default=str)
+                total += self._length(calls)
+        return total
+
+    def compact(self, messages: list[ChatMessage]) -> list[ChatMessage]:
+        """``messages`` within the budget where possible; unchanged if already."""
+        before = self.count(messages)
+        self.last_tokens, self.last_saved = before, 0
+        if before <= self.token_budget:
+            return messages
+
+        user_turns = [
+            i for i, message in enumerate(messages) if message.role == MessageRole.USER
+        ]
+        if len(user_turns) <= self.keep_turns:
+            return messages
+        split = user_turns[-self.keep_turns] if self.keep_turns else len(messages)
+        older, recent = messages[:split], messages[split:]
+
+        older = [
+            ChatMessage(
+                role=MessageRole.TOOL,
+                content=compact_tool_text(message.content or ""),
+                additional_kwargs=message.additional_kwargs,
+            )
+            if message.role == MessageRole.TOOL
+            else message
+            for message in older
+        ]
+        compacted = older + recent
+        if self.count(compacted) > self.token_budget:
+            compacted = self._summarize(older, self.token_budget - self.count(recent))
+            compacted += recent
+
+        after = self.count(compacted)
+        self._compactions += 1
+        self._tokens_saved += before - after
+        self.last_tokens, self.last_saved = after, before - after
+        return compacted
+
+    def _summarize(self, older: list[ChatMessage], budget: int) -> list[ChatMessage]:
+        # [tool name, or None for chat, line] in conversation order
+        lines: list[list] = []
+        pending_names: list[str] = []
+        for message in older:
+            if message.additional_kwargs.get("compaction_summary"):
+                for line in (message.content or "").splitlines()[1:]:
+                    if line.startswith(CHAT_PREFIXES):
+                        lines.append([None, line])
+                    else:
+                        lines.append([line.partition(" returned ")[0], line])
+            elif message.role == MessageRole.USER:
+                lines.append([None, CHAT_PREFIXES[0] + _shorten(message.content or "")])
+            elif message.role == MessageRole.ASSISTANT:
+                pending_names = _tool_call_names(message)
+                if message.content:
+                    lines.append([None, CHAT_PREFIXES[1] + _shorten(message.content)])
+            elif message.role == MessageRole.TOOL:
+                name = pending_names.pop(0) if pending_names else "tool"
+                facts = compact_tool_text(message.content or "")
+                lines.append([name, f"{name} returned {facts}"])
+
+        total = self._length(SUMMARY_HEADER) + sum(
+            self._length(line) for _, line in lines
+        )
+        # Over budget: shrink the oldest results to their ids first...
+        for entry in lines:
+            if total <= budget:
+                break
+            if entry[0] is not None:
+                facts = entry[1].partition(" returned ")[2]
+                shrunk = f"{entry[0]} returned {compact_tool_text(facts, ID_FIELDS)}"
+                total += self._length(shrunk) - self._length(entry[1])
+                entry[1] = shrunk
+
+        # ...then drop the oldest chat lines, then the oldest availability
+        def droppable(kinds) -> Optional[int]:
+            return next((i for i, (name, _) in enumerate(lines) if kinds(name)), None)
+
+        for kinds in (lambda name: name is None, AVAILABILITY_TOOLS.__contains__):
+            while total > budget and (index := droppable(kinds)) is not None:
+                total -= self._length(lines.pop(index)[1])
+
+        return [
+            ChatMessage(
+                role=MessageRole.SYSTEM,
+                content="\n".join([SUMMARY_HEADER, *(line for _, line in lines)]),
+                additional_kwargs={"compaction_summary": True},
+            )
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "compactions": self._compactions,
+            "tokens_saved": self._tokens_saved,
+            "last_history_tokens": self.last_tokens,
+        }
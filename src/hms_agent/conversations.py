@@ -0,0 +1,370 @@
+import asyncio
+import hashlib
+import json
+import os
+import warnings
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from llama_index.core.agent.workflow import FunctionAgent
+from llama_index.core.base.llms.types import ChatMessage
+from llama_index.core.llms.function_calling import FunctionCallingLLM
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.tools import FunctionTool
+from llama_index.core.workflow import Context, JsonSerializer
+from llama_index.tools.mcp import McpToolSpec
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from compaction import ContextCompactor
+from agent import StreamEvent, build_agent, stream_user_message
+from mcp_session import TOOL_CACHE_DIR, PersistentMCPClient
+from mock_llm import MockLLM
+from tool_cache import ToolCallCache
+
+# Evicted conversations, one JSON file per session
+CONVERSATION_DIR = Path(
+    os.environ.get("HMS_CONVERSATION_DIR", TOOL_CACHE_DIR / "conversations")
+)
+
+
+class FairLimiter:
+    """Admits at most ``limit`` holders at a time, strictly in arrival order.
+
+    A released slot is handed straight to the longest waiting caller, so a
+    newcomer cannot overtake the queue.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot arrived together with the cancellation
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+class Conversation:
+    """One guest's agent, context, memory and tool cache; built when first used."""
+
+    __slots__ = ("session_id", "agent", "context", "memory", "cache", "lock", "users")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.agent: Optional[FunctionAgent] = None
+        self.context: Optional[Context] = None
+        self.memory: Optional[ChatMemoryBuffer] = None
+        self.cache: Optional[ToolCallCache] = None
+        # Messages of one session are answered one at a time, in order
+        self.lock = asyncio.Lock()
+        # handle() calls in progress or waiting; a used conversation is never evicted
+        self.users = 0
+
+
+class ConversationService:
+    """Answers messages for many concurrent conversations.
+
+    Each session id (a phone number, for WhatsApp) has its own agent, context
+    and tool cache. At most ``llm_concurrency`` turns run at once and waiting
+    turns are admitted first come, first served; a session waits for its
+    previous message before it queues again, so a busy guest cannot hold
+    several slots. When more than ``max_conversations`` are in memory, the
+    least recently used idle ones are written to ``store_dir`` and reloaded
+    when their session writes again. Without a ``store_dir`` they are dropped.
+    Histories are kept within budget by one shared ``compactor``.
+    """
+
+    def __init__(
+        self,
+        tools: list[FunctionTool],
+        agent_llm: Optional[FunctionCallingLLM] = None,
+        llm_concurrency: int = 4,
+        max_conversations: int = 1000,
+        store_dir: Optional[Path] = CONVERSATION_DIR,
+        compactor: Optional[ContextCompactor] = None,
+    ):
+        self.tools = tools
+        self.compactor = compactor or ContextCompactor()
+        self.agent_llm = agent_llm
+        self.limiter = FairLimiter(llm_concurrency)
+        self.max_conversations = max_conversations
+        self.store_dir = store_dir
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+        # Evictions still being written; a reload waits for its session's
+        self._saving: dict[str, asyncio.Task] = {}
+        self._messages = 0
+        self._evictions = 0
+        self._reloads = 0
+
+    async def handle(self, session_id: str, message: str) -> str:
+        """The agent's reply to ``message`` in the conversation ``session_id``."""
+        response = ""
+        async for event in self.stream(session_id, message):
+            if event.kind == "done":
+                response = event.text
+        return response
+
+    async def stream(
+        self, session_id: str, message: str, by_sentence: bool = False
+    ) -> AsyncIterator[StreamEvent]:
+        """The reply to ``message`` as ``stream_user_message`` events.
+
+        The turn keeps its LLM slot until the consumer has read the last event.
+        """
+        conversation = self._conversations.get(session_id)
+        if conversation is None:
+            conversation = self._conversations[session_id] = Conversation(session_id)
+        self._conversations.move_to_end(session_id)
+        conversation.users += 1
+        try:
+            async with conversation.lock:
+                if conversation.context is None:
+                    await self._load(conversation)
+                async with self.limiter:
+                    async for event in stream_user_message(
+                        message,
+                        conversation.agent,
+                        conversation.context,
+                        conversation.memory,
+                        by_sentence,
+                        self.compactor,
+                    ):
+                        yield event
+            self._messages += 1
+        finally:
+            conversation.users -= 1
+            self._evict()
+
+    def _path(self, session_id: str) -> Path:
+        digest = hashlib.sha256(session_id.encode()).hexdigest()[:32]
+        return self.store_dir / f"{digest}.json"
+
+    async def _load(self, conversation: Conversation) -> None:
+        session_id = conversation.session_id
+        if session_id in self._saving:
+            await self._saving[session_id]
+
+        data = None
+        if self.store_dir is not None:
+            data = await asyncio.to_thread(_read_json, self._path(session_id))
+
+        conversation.cache = ToolCallCache()
+        agent = build_agent(self.tools, conversation.cache, self.agent_llm)
+        if data is None:
+            context, history = Context(agent), []
+        else:
+            context = Context.from_dict(
+                agent, data["context"], serializer=JsonSerializer()
+            )
+            history = [ChatMessage.model_validate(m) for m in data["messages"]]
+            self._reloads += 1
+        conversation.agent, conversation.context = agent, context
+        conversation.memory = ChatMemoryBuffer.from_defaults(
+            chat_history=history, llm=agent.llm
+        )
+
+    def _evict(self) -> None:
+        excess = len(self._conversations) - self.max_conversations
+        if excess <= 0:
+            return
+        idle = []
+        for conversation in self._conversations.values():  # oldest first
+            if conversation.users == 0:
+                idle.append(conversation)
+                if len(idle) == excess:
+                    break
+        for conversation in idle:
+            del self._conversations[conversation.session_id]
+            self._evictions += 1
+            if self.store_dir is not None and conversation.context is not None:
+                self._start_save(conversation)
+
+    def _start_save(self, conversation: Conversation) -> None:
+        session_id = conversation.session_id
+        task = asyncio.create_task(self._save(conversation))
+        self._saving[session_id] = task
+
+        def done(_):
+            if self._saving.get(session_id) is task:
+                del self._saving[session_id]
+
+        task.add_done_callback(done)
+
+    async def _save(self, conversation: Conversation) -> None:
+        with warnings.catch_warnings():
+            # Context.to_dict warns that it leaves out the memory
+            warnings.simplefilter("ignore")
+            context = conversation.context.to_dict(serializer=JsonSerializer())
+        data = {
+            "session_id": conversation.session_id,
+            "context": context,
+            "messages": [
+                message.model_dump(mode="json")
+                for message in conversation.memory.get_all()
+            ],
+        }
+        await asyncio.to_thread(_write_json, self._path(conversation.session_id), data)
+
+    async def aclose(self) -> None:
+        """Write every loaded conversation to the store."""
+        if self.store_dir is not None:
+            for conversation in list(self._conversations.values()):
+                if conversation.context is not None:
+                    self._start_save(conversation)
+        if self._saving:
+            await asyncio.gather(*self._saving.values())
+        self._conversations.clear()
+
+    def stats(self) -> dict:
+        return {
+            "conversations": len(self._conversations),
+            "messages": self._messages,
+            "llm_active": self.limiter.active,
+            "llm_waiting": self.limiter.waiting,
+            "evictions": self._evictions,
+            "reloads": self._reloads,
+            "compaction": self.compactor.stats(),
+        }
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename so a crash never leaves half a conversation
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+async def _stream_lines(
+    service: ConversationService, session_id: str, message: str
+) -> AsyncIterator[str]:
+    # One JSON object per line: sentences and tool names as they happen,
+    # then the full reply with its timings
+    try:
+        async for event in service.stream(session_id, message, by_sentence=True):
+            if event.kind == "text":
+                line = {"text": event.text}
+            elif event.kind == "tool_call":
+                line = {"tool": event.text}
+            elif event.kind == "done":
+                line = {"session_id": session_id, "reply": event.text, **event.data}
+            else:
+                continue
+            yield json.dumps(line) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+def create_app() -> Starlette:
+    """HTTP front end: ``POST /messages`` with ``{"session_id", "message"}``.
+
+    With ``"stream": true`` the reply is sent sentence by sentence as
+    newline-delimited JSON.
+
+    Configured with HMS_MCP_URL, HMS_LLM_CONCURRENCY, HMS_MAX_CONVERSATIONS
+    and HMS_CONVERSATION_DIR; HMS_AGENT_LLM=mock answers with MockLLM.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        mcp_client = PersistentMCPClient(
+            os.environ.get("HMS_MCP_URL", "http://127.0.0.1:8000/mcp")
+        )
+        await mcp_client.connect()
+        try:
+            tools = await McpToolSpec(client=mcp_client).to_tool_list_async()
+            service = ConversationService(
+                tools,
+                agent_llm=MockLLM()
+                if os.environ.get("HMS_AGENT_LLM") == "mock"
+                else None,
+                llm_concurrency=int(os.environ.get("HMS_LLM_CONCURRENCY", "4")),
+                max_conversations=int(os.environ.get("HMS_MAX_CONVERSATIONS", "1000")),
+            )
+            app.state.service = service
+            try:
+                yield
+            finally:
+                await service.aclose()
+        finally:
+            await mcp_client.aclose()
+
+    async def messages(request: Request) -> JSONResponse | StreamingResponse:
+        try:
+            body = await request.json()
+            session_id, message = body["session_id"], body["message"]
+            stream = bool(body.get("stream", False))
+        except (ValueError, KeyError, TypeError):
+            return JSONResponse(
+                {"error": "Expected a JSON object with session_id and message"},
+                status_code=400,
+            )
+        if not isinstance(session_id, str) or not isinstance(message, str):
+            return JSONResponse(
+                {"error": "session_id and message must be strings"}, status_code=400
+            )
+        service = request.app.state.service
+        if stream:
+            return StreamingResponse(
+                _stream_lines(service, session_id, message),
+                media_type="application/x-ndjson",
+            )
+        try:
+            reply = await service.handle(session_id, message)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return JSONResponse({"session_id": session_id, "reply": reply})
+
+    async def stats(request: Request) -> JSONResponse:
+        return JSONResponse(request.app.state.service.stats())
+
+    return Starlette(
+        routes=[
+            Route("/messages", messages, methods=["POST"]),
+            Route("/stats", stats, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Callable, Hashable, Optional, TypeVar
+
+from db.connector import connection, get_pool
+
+T = TypeVar("T")
+
+# Seconds a read of catalog_version is trusted. Edits made by this process
+# call invalidate_catalog and are seen at once; edits from other processes
+# (the scripts, the sqlite3 shell) within this interval.
+VERSION_CHECK_INTERVAL = 1.0
+
+
+def catalog_version() -> tuple[str, int]:
+    """Identify the current reference data: database path and catalogue version.
+
+    The version row is bumped by triggers on locations, hotels and rooms, so
+    it changes whenever any process edits the catalogue.
+    """
+    with connection() as conn:
+        version = conn.execute(
+            "SELECT version FROM catalog_version WHERE id = 1"
+        ).fetchone()[0]
+    return get_pool().path, version
+
+
+class ReferenceCache:
+    """In-process cache for rarely changing reference data.
+
+    Entries are the plain dicts the tools return, built once from the Pydantic
+    models, so a hit skips the query and the validation; the MCP layer still
+    JSON-encodes them on every call. They are dropped as a whole when the
+    catalogue version moves. Cached values are shared between callers and
+    must not be mutated.
+
+    A hit does not touch SQLite: the version is the database's, read at most
+    every ``check_interval`` seconds, plus an in-process counter bumped by
+    ``invalidate``.
+    """
+
+    def __init__(self, check_interval: float = VERSION_CHECK_INTERVAL):
+        self._lock = threading.Lock()
+        self._check_interval = check_interval
+        self._checked_version: Optional[tuple[str, int]] = None
+        self._checked_at = 0.0
+        self._local_version = 0
+        self._version = None
+        self._entries: dict[Hashable, object] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def _current_version(self) -> tuple:
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked_version
+            if checked is not None and now - self._checked_at < self._check_interval:
+                return checked, self._local_version
+            local = self._local_version
+        checked = catalog_version()
+        with self._lock:
+            self._checked_version, self._checked_at = checked, now
+        return checked, local
+
+    def get(self, key: Hashable, load: Callable[[], T]) -> T:
+        # Read the version before loading: data newer than its version is
+        # only ever reloaded early, never served stale
+        version = self._current_version()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._invalidations += 1
+                self._entries.clear()
+                self._version = version
+            elif key in self._entries:
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+
+        value = load()
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = value
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry at the next lookup, after a catalogue edit made
+        by this process."""
+        with self._lock:
+            self._local_version += 1
+            self._checked_version = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+            }
+
+
+reference_cache = ReferenceCache()
+
+
+def invalidate_catalog() -> None:
+    """Call after editing locations, hotels or rooms from this process."""
+    reference_cache.invalidate()
+
+
+def cache_stats() -> dict:
+    return reference_cache.stats()
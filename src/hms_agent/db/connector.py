@@ -1,17 +1,191 @@
 import sqlite3
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from db.metrics import metrics_enabled, record_connection_wait, trace_statement
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_POOL_TIMEOUT = 10.0
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+STATEMENT_CACHE_SIZE = 256
+SYNCHRONOUS = "NORMAL"
 
 _DB_PATH: Optional[str] = None
+_POOL: Optional["ConnectionPool"] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    # The trace hook costs a Python call per statement, so it is only
+    # installed while metrics are being collected
+    if metrics_enabled():
+        conn.set_trace_callback(trace_statement)
+    return conn
+
+
+class ConnectionPool:
+    """A bounded pool of pre-configured SQLite connections.
+
+    Connections are opened lazily up to ``max_size`` and handed back to the
+    pool when the caller is done, so the PRAGMAs and the statement cache are
+    paid for once per connection instead of once per tool call.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_POOL_TIMEOUT,
+    ):
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: list[sqlite3.Connection] = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._acquisitions = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self) -> sqlite3.Connection:
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise RuntimeError("Timed out waiting for a database connection")
+                waited = True
+                self._cond.wait(remaining)
+
+            wait = time.perf_counter() - start
+            self._acquisitions += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+        record_connection_wait(wait)
+        if conn is None:
+            try:
+                conn = _open_connection(self.path)
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
 
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
 
-def set_db_path(path: str) -> None:
-    global _DB_PATH
-    _DB_PATH = path
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
 
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "acquisitions": self._acquisitions,
+                "waits": self._waits,
+                "wait_time_total": self._wait_total,
+                "wait_time_max": self._wait_max,
+                "wait_time_avg": (
+                    self._wait_total / self._acquisitions if self._acquisitions else 0.0
+                ),
+            }
 
-def get_connection() -> sqlite3.Connection:
+
+def set_db_path(path: str, pool_size: int = DEFAULT_POOL_SIZE) -> None:
+    global _DB_PATH, _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _DB_PATH = str(path)
+        _POOL = ConnectionPool(_DB_PATH, max_size=pool_size)
+
+
+def get_pool() -> ConnectionPool:
+    if _POOL is None:
+        raise RuntimeError("Database path not set")
+    return _POOL
+
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled connection for the duration of the ``with`` block.
+
+    Any transaction left open when the block exits is rolled back before the
+    connection goes back to the pool.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+def get_connection(path: Optional[str] = None) -> sqlite3.Connection:
+    """Open a standalone, unpooled connection. The caller must close it.
+
+    Connects to the configured database unless ``path`` names another file.
+    """
+    if path is not None:
+        return _open_connection(str(path))
     if _DB_PATH is None:
         raise RuntimeError("Database path not set")
-    conn = sqlite3.connect(_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _open_connection(_DB_PATH)
@@ -0,0 +1,124 @@
+import sqlite3
+from typing import Iterable
+
+from db.models import day_date
+
+# Rooms booked and revenue per hotel and night, recomputed from the confirmed
+# bookings. Triggers from migration 7 keep hotel_daily_stats equal to this;
+# nights whose bookings were all cancelled stay behind as zero rows.
+DAILY_STATS_QUERY = """
+    WITH RECURSIVE nights (hotel_id, price, day, last) AS (
+      SELECT r.hotel_id, r.price_per_night, b.check_in_day, b.check_out_day
+      FROM bookings b
+      JOIN rooms r ON r.id = b.room_id
+      WHERE b.status = 'confirmed'
+        AND b.check_in_day < b.check_out_day
+        AND r.hotel_id IS NOT NULL
+      UNION ALL
+      SELECT hotel_id, price, day + 1, last FROM nights WHERE day + 1 < last
+    )
+    SELECT hotel_id, day, COUNT(*), SUM(price)
+    FROM nights
+    GROUP BY hotel_id, day
+"""
+
+# Rows that differ between the table and a recomputation, from either side
+DRIFT_QUERY = f"""
+    WITH expected (hotel_id, day, rooms_booked, revenue) AS ({DAILY_STATS_QUERY}),
+    current AS (
+      SELECT hotel_id, day, rooms_booked, revenue
+      FROM hotel_daily_stats
+      WHERE rooms_booked != 0 OR revenue != 0
+    )
+    SELECT hotel_id, day FROM (
+      SELECT * FROM expected EXCEPT SELECT * FROM current
+      UNION
+      SELECT * FROM current EXCEPT SELECT * FROM expected
+    )
+    ORDER BY hotel_id, day
+"""
+
+
+def rebuild_daily_stats(conn: sqlite3.Connection) -> int:
+    """Recompute hotel_daily_stats from the bookings and return its row count.
+
+    Does not commit; run it in a transaction so readers never see the table
+    half built.
+    """
+    conn.execute("DELETE FROM hotel_daily_stats")
+    conn.execute(
+        "INSERT INTO hotel_daily_stats (hotel_id, day, rooms_booked, revenue) "
+        + DAILY_STATS_QUERY
+    )
+    return conn.execute("SELECT COUNT(*) FROM hotel_daily_stats").fetchone()[0]
+
+
+def verify_daily_stats(conn: sqlite3.Connection) -> list[tuple[int, str]]:
+    """Compare hotel_daily_stats with the bookings and return the drifted
+    (hotel_id, date) pairs."""
+    return [(hotel_id, day_date(day)) for hotel_id, day in conn.execute(DRIFT_QUERY)]
+
+
+def occupancy_rate(room_nights: int, rooms: int, days: int) -> float:
+    """Share of the available room nights that were booked."""
+    return round(room_nights / (rooms * days), 4) if rooms else 0.0
+
+
+def hotel_occupancy_report(
+    hotel_id: int,
+    hotel_name: str,
+    rooms: int,
+    start_day: int,
+    end_day: int,
+    stats: Iterable[tuple[int, int, int]],
+) -> dict:
+    """A hotel's occupancy and revenue for each day of [start_day, end_day).
+
+    ``stats`` holds (day, rooms_booked, revenue) for the booked days; the
+    other days are reported as empty.
+    """
+    booked = {day: (rooms_booked, revenue) for day, rooms_booked, revenue in stats}
+    days = []
+    for day in range(start_day, end_day):
+        rooms_booked, revenue = booked.get(day, (0, 0))
+        days.append(
+            {
+                "date": day_date(day),
+                "rooms_booked": rooms_booked,
+                "revenue": revenue,
+                "occupancy_rate": occupancy_rate(rooms_booked, rooms, 1),
+            }
+        )
+    room_nights = sum(day["rooms_booked"] for day in days)
+    return {
+        "hotel_id": hotel_id,
+        "hotel_name": hotel_name,
+        "rooms": rooms,
+        "start_date": day_date(start_day),
+        "end_date": day_date(end_day),
+        "room_nights": room_nights,
+        "revenue": sum(day["revenue"] for day in days),
+        "occupancy_rate": occupancy_rate(room_nights, rooms, end_day - start_day),
+        "days": days,
+    }
+
+
+# Column order of location_revenue rows
+LOCATION_REVENUE_COLUMNS = (
+    "location_id",
+    "city",
+    "country",
+    "hotels",
+    "rooms",
+    "room_nights",
+    "revenue",
+)
+
+
+def location_revenue(row: Iterable, days: int) -> dict:
+    """A location's totals from a row in LOCATION_REVENUE_COLUMNS order."""
+    location = dict(zip(LOCATION_REVENUE_COLUMNS, row))
+    location["occupancy_rate"] = occupancy_rate(
+        location["room_nights"], location["rooms"], days
+    )
+    return location
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_READ_CONCURRENCY = 8
+DEFAULT_WRITE_CONCURRENCY = 1
+
+
+class ToolExecutor:
+    """Runs blocking database calls on bounded thread pools.
+
+    Reads and writes get separate lanes so a burst of slow searches cannot
+    starve bookings, and SQLite only ever sees ``write_concurrency`` writers.
+    """
+
+    def __init__(
+        self,
+        read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+        write_concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+    ):
+        if read_concurrency < 1 or write_concurrency < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+        self.read_concurrency = read_concurrency
+        self.write_concurrency = write_concurrency
+        self._read_pool = ThreadPoolExecutor(
+            max_workers=read_concurrency, thread_name_prefix="hms-read"
+        )
+        self._write_pool = ThreadPoolExecutor(
+            max_workers=write_concurrency, thread_name_prefix="hms-write"
+        )
+
+    async def _run(self, pool: ThreadPoolExecutor, fn: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. the current tool name) into the worker
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args)
+        return await loop.run_in_executor(pool, call)
+
+    async def read(self, fn: Callable[..., T], *args) -> T:
+        return await self._run(self._read_pool, fn, *args)
+
+    async def write(self, fn: Callable[..., T], *args) -> T:
+        return await self._run(self._write_pool, fn, *args)
+
+    def shutdown(self) -> None:
+        self._read_pool.shutdown(wait=True)
+        self._write_pool.shutdown(wait=True)
+
+
+_EXECUTOR: Optional[ToolExecutor] = None
+
+
+def configure_executor(
+    read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+    write_concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+) -> ToolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+    _EXECUTOR = ToolExecutor(read_concurrency, write_concurrency)
+    return _EXECUTOR
+
+
+def get_executor() -> ToolExecutor:
+    if _EXECUTOR is None:
+        return configure_executor()
+    return _EXECUTOR
+
+
+async def run_read(fn: Callable[..., T], *args) -> T:
+    return await get_executor().read(fn, *args)
+
+
+async def run_write(fn: Callable[..., T], *args) -> T:
+    return await get_executor().write(fn, *args)
@@ -0,0 +1,496 @@
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Optional
+
+from db.daily_stats import hotel_occupancy_report, location_revenue
+from db.models import (
+    ROOM_COLUMNS,
+    BookingOutput,
+    BookStayInput,
+    BookStayOutput,
+    CancelBookingInput,
+    CreateBookingInput,
+    CustomerCreateInput,
+    CustomerOutput,
+    CustomerSearchInput,
+    GroupBookingInput,
+    GroupBookingOutput,
+    HotelOccupancyInput,
+    HotelRoomsInput,
+    HotelsInput,
+    LocationRevenueInput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+    day_number,
+    normalize_phone,
+)
+from db.pagination import decode_cursor, page
+
+
+class MemoryRepository:
+    """The storage operations of the tools on plain Python structures.
+
+    Every table is a dict by id, with sorted id lists per location and per
+    hotel for the paged listings and each hotel's rooms in (capacity, id)
+    order like idx_rooms_hotel_capacity. Each room keeps its confirmed stays
+    as a list of (check_in, check_out, booking_id) sorted by check-in; stays
+    of one room never overlap, so an overlap check only has to look at the
+    last stay starting before the requested check-out. Stays keep the
+    validated YYYY-MM-DD strings: they sort in the same order as the day
+    numbers (check_in_day, check_out_day) SQLite compares. Rooms booked and
+    revenue per hotel and day number are kept as hotel_daily_stats is.
+
+    Nothing is persisted. One lock serializes all operations, which keeps
+    them atomic like the SQLite transactions they stand in for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locations: dict[int, dict] = {}
+        self._hotels: dict[int, dict] = {}
+        self._hotel_ids: list[int] = []
+        self._location_hotels: dict[int, list[int]] = {}
+        self._rooms: dict[int, dict] = {}
+        self._room_hotels: dict[int, int] = {}
+        self._hotel_rooms: dict[int, list[tuple[int, int]]] = {}
+        self._customers: dict[int, dict] = {}
+        self._customer_ids: list[int] = []
+        self._search_names: dict[int, str] = {}
+        self._phones: dict[str, int] = {}
+        self._phone_numbers: dict[str, int] = {}
+        self._last_customer_id = 0
+        self._bookings: dict[int, dict] = {}
+        self._last_booking_id = 0
+        self._stays: dict[int, list[tuple[str, str, int]]] = {}
+        self._daily: dict[int, dict[int, list[int]]] = {}
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> "MemoryRepository":
+        """Snapshot of the database behind ``conn``."""
+        repository = cls()
+        for row in conn.execute("SELECT id, city, country FROM locations ORDER BY id"):
+            repository.add_location(row[0], row[1], row[2])
+        for row in conn.execute("SELECT id, name, location_id FROM hotels ORDER BY id"):
+            repository.add_hotel(row[0], row[1], row[2])
+        for row in conn.execute(
+            """
+            SELECT id, hotel_id, room_number, room_type, price_per_night, capacity
+            FROM rooms
+            ORDER BY id
+            """
+        ):
+            repository.add_room(row[1], dict(zip(ROOM_COLUMNS, (row[0], *row[2:]))))
+        for row in conn.execute(
+            "SELECT id, name, phone_number FROM customers ORDER BY id"
+        ):
+            repository._add_customer(row[0], row[1], row[2])
+        for row in conn.execute(
+            """
+            SELECT id, customer_id, room_id, check_in_date, check_out_date, status
+            FROM bookings
+            """
+        ):
+            repository._bookings[row[0]] = {
+                "customer_id": row[1],
+                "room_id": row[2],
+                "check_in_date": row[3],
+                "check_out_date": row[4],
+                "status": row[5],
+            }
+            repository._last_booking_id = max(repository._last_booking_id, row[0])
+            if row[5] == "confirmed":
+                repository._stays.setdefault(row[2], []).append(
+                    (row[3], row[4], row[0])
+                )
+        for stays in repository._stays.values():
+            stays.sort()
+        for hotel_id, day, rooms_booked, revenue in conn.execute(
+            "SELECT hotel_id, day, rooms_booked, revenue FROM hotel_daily_stats"
+        ):
+            repository._daily.setdefault(hotel_id, {})[day] = [rooms_booked, revenue]
+        return repository
+
+    # Reference data
+
+    def add_location(self, location_id: int, city: str, country: str) -> None:
+        self._locations[location_id] = {
+            "id": location_id,
+            "city": city,
+            "country": country,
+        }
+
+    def add_hotel(self, hotel_id: int, name: str, location_id: Optional[int]) -> None:
+        self._hotels[hotel_id] = {"id": hotel_id, "name": name}
+        insort(self._hotel_ids, hotel_id)
+        if location_id is not None:
+            insort(self._location_hotels.setdefault(location_id, []), hotel_id)
+
+    def add_room(self, hotel_id: int, room: dict) -> None:
+        """Add a RoomOutput-shaped dict to ``hotel_id``."""
+        self._rooms[room["id"]] = room
+        self._room_hotels[room["id"]] = hotel_id
+        insort(
+            self._hotel_rooms.setdefault(hotel_id, []), (room["capacity"], room["id"])
+        )
+
+    def _add_customer(self, customer_id: int, name: str, phone_number: str) -> None:
+        normalized = normalize_phone(phone_number)
+        self._last_customer_id = max(self._last_customer_id, customer_id)
+        self._customers[customer_id] = {
+            "id": customer_id,
+            "name": name,
+            "phone_number": phone_number,
+        }
+        insort(self._customer_ids, customer_id)
+        self._search_names[customer_id] = name.lower()
+        # Like the backfill, the oldest customer keeps a shared number
+        if normalized is not None:
+            self._phones.setdefault(normalized, customer_id)
+        self._phone_numbers.setdefault(phone_number, customer_id)
+
+    def list_locations(self) -> list[dict]:
+        with self._lock:
+            return [self._locations[key] for key in sorted(self._locations)]
+
+    def find_hotels(self, data: HotelsInput) -> tuple[list[dict], Optional[str]]:
+        after = decode_cursor("hotels", data.cursor)
+        with self._lock:
+            if data.location_id is not None:
+                ids = self._location_hotels.get(data.location_id, [])
+            else:
+                ids = self._hotel_ids
+            start = bisect_right(ids, after[0]) if after else 0
+            hotels = [self._hotels[key] for key in ids[start : start + data.limit + 1]]
+        return page(hotels, data.limit, "hotels", lambda hotel: [hotel["id"]])
+
+    def find_hotel_rooms(self, data: HotelRoomsInput) -> list[dict]:
+        with self._lock:
+            room_ids = sorted(
+                key for _, key in self._hotel_rooms.get(data.hotel_id, [])
+            )
+            return [self._rooms[key] for key in room_ids]
+
+    # Availability
+
+    def _is_free(self, room_id: int, check_in: str, check_out: str) -> bool:
+        stays = self._stays.get(room_id)
+        if not stays:
+            return True
+        # The last stay starting before check-out ends latest of those
+        position = bisect_left(stays, (check_out,))
+        return position == 0 or stays[position - 1][1] <= check_in
+
+    def find_available_rooms(
+        self, data: SearchRoomsInput
+    ) -> tuple[list[dict], Optional[str]]:
+        after = decode_cursor("rooms", data.cursor)
+        after = tuple(after) if after else (0, 0)
+        with self._lock:
+            keys = self._hotel_rooms.get(data.hotel_id, [])
+            start = bisect_right(keys, after)
+            rooms = []
+            for capacity, room_id in keys[start:]:
+                if capacity < data.min_capacity:
+                    continue
+                if self._is_free(room_id, data.check_in_date, data.check_out_date):
+                    rooms.append(self._rooms[room_id])
+                    if len(rooms) > data.limit:
+                        break
+        return page(
+            rooms, data.limit, "rooms", lambda room: [room["capacity"], room["id"]]
+        )
+
+    def find_available_rooms_by_hotel(
+        self, data: SearchLocationRoomsInput
+    ) -> list[dict]:
+        sign = -1 if data.sort_by == "price_desc" else 1
+
+        def rank(candidate: tuple[int, dict]) -> tuple:
+            return sign * candidate[1]["price_per_night"], candidate[1]["id"]
+
+        with self._lock:
+            if data.location_id is not None:
+                hotel_ids = self._location_hotels.get(data.location_id, [])
+            else:
+                hotel_ids = [key for key in data.hotel_ids if key in self._hotels]
+            candidates = []
+            for hotel_id in dict.fromkeys(hotel_ids):
+                free = [
+                    (hotel_id, self._rooms[room_id])
+                    for capacity, room_id in self._hotel_rooms.get(hotel_id, [])
+                    if capacity >= data.min_capacity
+                    and self._is_free(room_id, data.check_in_date, data.check_out_date)
+                ]
+                free.sort(key=rank)
+                candidates.extend(free[: data.rooms_per_hotel])
+            candidates.sort(key=rank)
+
+            hotels: dict[int, dict] = {}
+            for hotel_id, room in candidates[: data.max_results]:
+                hotel = hotels.get(hotel_id)
+                if hotel is None:
+                    hotel = hotels[hotel_id] = {
+                        "hotel_id": hotel_id,
+                        "hotel_name": self._hotels[hotel_id]["name"],
+                        "rooms": [],
+                    }
+                hotel["rooms"].append(room)
+        return list(hotels.values())
+
+    # Customers
+
+    def find_customers(
+        self, data: CustomerSearchInput
+    ) -> tuple[list[dict], Optional[str]]:
+        """Matching customers in id order; names match as case-insensitive
+        substrings, as the trigram index does. SQLite ranks name matches
+        instead, and its cursors are of another kind."""
+        after = decode_cursor("customers", data.cursor)
+        after_id = after[0] if after else 0
+        name = data.name.strip().lower() if data.name else None
+
+        with self._lock:
+            if data.phone_number:
+                matches = {
+                    self._phones.get(normalize_phone(data.phone_number) or ""),
+                    self._phone_numbers.get(data.phone_number),
+                }
+                candidates = sorted(key for key in matches if key is not None)
+            else:
+                candidates = self._customer_ids
+            customers = []
+            for customer_id in candidates[bisect_right(candidates, after_id) :]:
+                if name and name not in self._search_names[customer_id]:
+                    continue
+                customers.append(self._customers[customer_id])
+                if len(customers) > data.limit:
+                    break
+        return page(customers, data.limit, "customers", lambda row: [row["id"]])
+
+    def _customer_by_phone(self, phone_number: str) -> Optional[int]:
+        matches = {
+            self._phones.get(normalize_phone(phone_number) or ""),
+            self._phone_numbers.get(phone_number),
+        }
+        return min((key for key in matches if key is not None), default=None)
+
+    def create_customer(self, data: CustomerCreateInput) -> CustomerOutput:
+        with self._lock:
+            if self._customer_by_phone(data.phone_number) is not None:
+                raise ValueError("A customer with this phone number already exists")
+            customer_id = self._last_customer_id + 1
+            self._add_customer(customer_id, data.name, data.phone_number)
+        return CustomerOutput(**self._customers[customer_id])
+
+    # Bookings
+
+    @staticmethod
+    def _nights(check_in: str, check_out: str) -> range:
+        # Day numbers of the stay's nights. Computed before any state changes,
+        # so a date that does not parse leaves nothing half-written.
+        return range(day_number(check_in), day_number(check_out))
+
+    def _count_nights(self, room_id: int, nights: range, rooms: int) -> None:
+        """Add ``rooms`` (1 or -1) booked rooms to every night of the stay."""
+        hotel_id = self._room_hotels[room_id]
+        price = self._rooms[room_id]["price_per_night"]
+        daily = self._daily.setdefault(hotel_id, {})
+        for day in nights:
+            stats = daily.setdefault(day, [0, 0])
+            stats[0] += rooms
+            stats[1] += rooms * price
+
+    def _insert_booking(
+        self,
+        customer_id: int,
+        room_id: int,
+        check_in: str,
+        check_out: str,
+        nights: range,
+    ) -> int:
+        self._last_booking_id += 1
+        booking_id = self._last_booking_id
+        self._bookings[booking_id] = {
+            "customer_id": customer_id,
+            "room_id": room_id,
+            "check_in_date": check_in,
+            "check_out_date": check_out,
+            "status": "confirmed",
+        }
+        insort(self._stays.setdefault(room_id, []), (check_in, check_out, booking_id))
+        self._count_nights(room_id, nights, 1)
+        return booking_id
+
+    def create_booking(self, data: CreateBookingInput) -> BookingOutput:
+        nights = self._nights(data.check_in_date, data.check_out_date)
+        with self._lock:
+            if data.room_id not in self._rooms:
+                raise ValueError("Room not found")
+            if not self._is_free(data.room_id, data.check_in_date, data.check_out_date):
+                raise ValueError("Room is not available for selected dates")
+            booking_id = self._insert_booking(
+                data.customer_id,
+                data.room_id,
+                data.check_in_date,
+                data.check_out_date,
+                nights,
+            )
+        return BookingOutput(booking_id=booking_id, status="confirmed")
+
+    def create_group_booking(self, data: GroupBookingInput) -> GroupBookingOutput:
+        nights = self._nights(data.check_in_date, data.check_out_date)
+        with self._lock:
+            missing = [key for key in data.room_ids if key not in self._rooms]
+            if missing:
+                raise ValueError(f"Room not found: {', '.join(map(str, missing))}")
+            busy = [
+                key
+                for key in data.room_ids
+                if not self._is_free(key, data.check_in_date, data.check_out_date)
+            ]
+            if busy:
+                raise ValueError(
+                    f"Rooms {', '.join(map(str, busy))} are not available "
+                    "for selected dates"
+                )
+            bookings = [
+                {
+                    "booking_id": self._insert_booking(
+                        data.customer_id,
+                        room_id,
+                        data.check_in_date,
+                        data.check_out_date,
+                        nights,
+                    ),
+                    "room_id": room_id,
+                }
+                for room_id in data.room_ids
+            ]
+        return GroupBookingOutput(status="confirmed", bookings=bookings)
+
+    def book_stay(self, data: BookStayInput) -> BookStayOutput:
+        room_type = data.room_type.lower() if data.room_type is not None else None
+        nights = self._nights(data.check_in_date, data.check_out_date)
+        with self._lock:
+            # The smallest fitting room, cheapest first, as STAY_ROOM_QUERY
+            free = [
+                self._rooms[room_id]
+                for capacity, room_id in self._hotel_rooms.get(data.hotel_id, [])
+                if capacity >= data.min_capacity
+                and (
+                    room_type is None
+                    or self._rooms[room_id]["room_type"].lower() == room_type
+                )
+                and self._is_free(room_id, data.check_in_date, data.check_out_date)
+            ]
+            if not free:
+                raise ValueError("No matching room is available for selected dates")
+            room = min(
+                free,
+                key=lambda room: (
+                    room["capacity"],
+                    room["price_per_night"],
+                    room["id"],
+                ),
+            )
+
+            customer_id = self._customer_by_phone(data.phone_number)
+            created = customer_id is None
+            if created:
+                customer_id = self._last_customer_id + 1
+                self._add_customer(customer_id, data.name, data.phone_number)
+            booking_id = self._insert_booking(
+                customer_id,
+                room["id"],
+                data.check_in_date,
+                data.check_out_date,
+                nights,
+            )
+        return BookStayOutput(
+            booking_id=booking_id,
+            status="confirmed",
+            customer_id=customer_id,
+            customer_created=created,
+            hotel_id=data.hotel_id,
+            room=room,
+            check_in_date=data.check_in_date,
+            check_out_date=data.check_out_date,
+        )
+
+    def cancel_booking(self, data: CancelBookingInput) -> None:
+        with self._lock:
+            booking = self._bookings.get(data.booking_id)
+            if booking is None:
+                raise ValueError("Booking not found")
+            if booking["status"] == "confirmed":
+                self._stays[booking["room_id"]].remove(
+                    (
+                        booking["check_in_date"],
+                        booking["check_out_date"],
+                        data.booking_id,
+                    )
+                )
+                self._count_nights(
+                    booking["room_id"],
+                    self._nights(booking["check_in_date"], booking["check_out_date"]),
+                    -1,
+                )
+            booking["status"] = "cancelled"
+
+    # Reports
+
+    def find_hotel_occupancy(self, data: HotelOccupancyInput) -> dict:
+        start_day = day_number(data.start_date)
+        end_day = day_number(data.end_date)
+        with self._lock:
+            hotel = self._hotels.get(data.hotel_id)
+            if hotel is None:
+                raise ValueError("Hotel not found")
+            daily = self._daily.get(data.hotel_id, {})
+            stats = [
+                (day, *daily[day]) for day in range(start_day, end_day) if day in daily
+            ]
+            return hotel_occupancy_report(
+                data.hotel_id,
+                hotel["name"],
+                len(self._hotel_rooms.get(data.hotel_id, [])),
+                start_day,
+                end_day,
+                stats,
+            )
+
+    def find_location_revenue(self, data: LocationRevenueInput) -> list[dict]:
+        start_day = day_number(data.start_date)
+        end_day = day_number(data.end_date)
+        with self._lock:
+            if data.location_id is not None:
+                location_ids = [data.location_id]
+            else:
+                location_ids = sorted(self._location_hotels)
+            report = []
+            for location_id in location_ids:
+                location = self._locations.get(location_id)
+                hotel_ids = self._location_hotels.get(location_id)
+                if location is None or not hotel_ids:
+                    continue
+                rooms = room_nights = revenue = 0
+                for hotel_id in hotel_ids:
+                    rooms += len(self._hotel_rooms.get(hotel_id, []))
+                    daily = self._daily.get(hotel_id, {})
+                    for day in range(start_day, end_day):
+                        stats = daily.get(day)
+                        if stats is not None:
+                            room_nights += stats[0]
+                            revenue += stats[1]
+                row = (
+                    location_id,
+                    location["city"],
+                    location["country"],
+                    len(hotel_ids),
+                    rooms,
+                    room_nights,
+                    revenue,
+                )
+                report.append(location_revenue(row, end_day - start_day))
+        return report
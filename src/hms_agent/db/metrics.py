@@ -0,0 +1,273 @@
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+# Upper bounds in seconds, Prometheus style; +Inf is implicit
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_ENABLED = False
+
+
+class CallStats:
+    """What one tool call did to the database; filled in from worker threads."""
+
+    __slots__ = ("statements", "connection_wait")
+
+    def __init__(self):
+        self.statements = 0
+        self.connection_wait = 0.0
+
+
+# The call being served. Tool executor threads and the writer copy the
+# caller's context, so SQL run on their behalf is attributed to the tool.
+_CURRENT_CALL: contextvars.ContextVar[Optional[CallStats]] = contextvars.ContextVar(
+    "hms_current_call", default=None
+)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        buckets = []
+        running = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            running += count
+            buckets.append((str(bound), running))
+        return buckets
+
+
+class ToolMetrics:
+    """Per-tool counters and histograms, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.rows: dict[str, int] = {}
+        self.connection_wait: dict[str, float] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.statements: dict[str, Histogram] = {}
+        self.sql_statements_total = 0
+
+    def record_call(
+        self, tool: str, seconds: float, error: bool, rows: int, stats: CallStats
+    ) -> None:
+        with self._lock:
+            self.calls[tool] = self.calls.get(tool, 0) + 1
+            if error:
+                self.errors[tool] = self.errors.get(tool, 0) + 1
+            self.rows[tool] = self.rows.get(tool, 0) + rows
+            self.connection_wait[tool] = (
+                self.connection_wait.get(tool, 0.0) + stats.connection_wait
+            )
+            if tool not in self.latency:
+                self.latency[tool] = Histogram(LATENCY_BUCKETS)
+                self.statements[tool] = Histogram(STATEMENT_BUCKETS)
+            self.latency[tool].observe(seconds)
+            self.statements[tool].observe(stats.statements)
+
+    def record_statement(self) -> None:
+        # A lost increment under a race is acceptable for a global counter;
+        # taking the lock on every statement is not
+        self.sql_statements_total += 1
+
+    def render(self, gauges: Optional[dict[str, float]] = None) -> str:
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("hms_tool_calls_total", "counter", "MCP tool calls.")
+            for tool, value in sorted(self.calls.items()):
+                lines.append(f'hms_tool_calls_total{{tool="{tool}"}} {value}')
+
+            family("hms_tool_errors_total", "counter", "MCP tool calls that failed.")
+            for tool in sorted(self.calls):
+                value = self.errors.get(tool, 0)
+                lines.append(f'hms_tool_errors_total{{tool="{tool}"}} {value}')
+
+            family(
+                "hms_tool_rows_returned_total",
+                "counter",
+                "Result rows returned by MCP tools.",
+            )
+            for tool, value in sorted(self.rows.items()):
+                lines.append(f'hms_tool_rows_returned_total{{tool="{tool}"}} {value}')
+
+            family(
+                "hms_tool_connection_wait_seconds_total",
+                "counter",
+                "Time MCP tools spent waiting for a pooled connection.",
+            )
+            for tool, value in sorted(self.connection_wait.items()):
+                lines.append(
+                    f'hms_tool_connection_wait_seconds_total{{tool="{tool}"}} {value}'
+                )
+
+            for name, histograms, help_text in (
+                (
+                    "hms_tool_duration_seconds",
+                    self.latency,
+                    "MCP tool call latency.",
+                ),
+                (
+                    "hms_tool_sql_statements",
+                    self.statements,
+                    "SQL statements executed per MCP tool call.",
+                ),
+            ):
+                family(name, "histogram", help_text)
+                for tool, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{tool="{tool}",le="{bound}"}} {count}'
+                        )
+                    lines.append(f'{name}_sum{{tool="{tool}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{tool="{tool}"}} {histogram.count}')
+
+            family(
+                "hms_sql_statements_total",
+                "counter",
+                "SQL statements executed on pooled and writer connections.",
+            )
+            lines.append(f"hms_sql_statements_total {self.sql_statements_total}")
+
+        for name, value in sorted((gauges or {}).items()):
+            family(name, "gauge", name.replace("_", " ") + ".")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+_METRICS = ToolMetrics()
+
+
+def enable_metrics() -> ToolMetrics:
+    """Start recording. Only connections opened afterwards count statements."""
+    global _ENABLED, _METRICS
+    _METRICS = ToolMetrics()
+    _ENABLED = True
+    return _METRICS
+
+
+def disable_metrics() -> None:
+    global _ENABLED
+    _ENABLED = False
+
+
+def metrics_enabled() -> bool:
+    return _ENABLED
+
+
+def get_metrics() -> ToolMetrics:
+    return _METRICS
+
+
+def trace_statement(_sql: str) -> None:
+    """sqlite3 trace callback installed on connections while metrics are on."""
+    if not _ENABLED:
+        return
+    _METRICS.record_statement()
+    stats = _CURRENT_CALL.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+def record_connection_wait(seconds: float) -> None:
+    if not _ENABLED:
+        return
+    stats = _CURRENT_CALL.get()
+    if stats is not None:
+        stats.connection_wait += seconds
+
+
+def _rows_in(result) -> int:
+    # Tools return {"rooms": [...]}, {"hotels": [...]} etc.
+    if isinstance(result, dict):
+        return sum(len(value) for value in result.values() if isinstance(value, list))
+    return 0
+
+
+def instrument(fn: Callable) -> Callable:
+    """Time an async MCP tool and record its SQL work under its name.
+
+    The tools fold failures into ``{"error": ...}`` results, so those count
+    as errors as well as raised exceptions. When metrics are disabled the
+    wrapper only checks a flag.
+    """
+    tool = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return await fn(*args, **kwargs)
+        stats = CallStats()
+        token = _CURRENT_CALL.set(stats)
+        start = time.perf_counter()
+        error = True
+        result = None
+        try:
+            result = await fn(*args, **kwargs)
+            error = isinstance(result, dict) and "error" in result
+            return result
+        finally:
+            _CURRENT_CALL.reset(token)
+            _METRICS.record_call(
+                tool, time.perf_counter() - start, error, _rows_in(result), stats
+            )
+
+    return wrapper
+
+
+def render_metrics() -> str:
+    """The Prometheus exposition, including pool, writer and cache gauges."""
+    from db.cache import cache_stats
+    from db.connector import pool_stats
+    from db.writer import get_writer
+
+    gauges = {}
+    try:
+        pool = pool_stats()
+    except RuntimeError:
+        pool = {}
+    for key in ("size", "in_use", "idle", "waits", "wait_time_total"):
+        if key in pool:
+            gauges[f"hms_pool_{key}"] = pool[key]
+    writer = get_writer()
+    if writer is not None:
+        for key, value in writer.stats().items():
+            gauges[f"hms_writer_{key}"] = value
+    for key, value in cache_stats().items():
+        gauges[f"hms_cache_{key}"] = value
+    return _METRICS.render(gauges)
@@ -0,0 +1,531 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, Iterator, Union
+
+from db.daily_stats import rebuild_daily_stats
+from db.models import normalize_phone
+
+# A migration step is either a SQL statement or a callable that receives the
+# connection, for data fixes that are awkward to express in plain SQL.
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _backfill_normalized_phones(conn: sqlite3.Connection) -> None:
+    # Keep the oldest customer when two stored numbers normalize to the same
+    # digits; the others stay reachable through their exact phone_number
+    seen = set()
+    updates = []
+    for customer_id, phone_number in conn.execute(
+        "SELECT id, phone_number FROM customers ORDER BY id"
+    ):
+        normalized = normalize_phone(phone_number)
+        if normalized is None or normalized in seen:
+            continue
+        seen.add(normalized)
+        updates.append((normalized, customer_id))
+    conn.executemany("UPDATE customers SET phone_normalized = ? WHERE id = ?", updates)
+
+
+def _renormalize_phones(conn: sqlite3.Connection) -> None:
+    # Values from the old separator-stripping trigger that normalize_phone
+    # would not produce; a number whose digits are already taken keeps none
+    taken = {
+        row[0]
+        for row in conn.execute(
+            "SELECT phone_normalized FROM customers WHERE phone_normalized IS NOT NULL"
+        )
+    }
+    updates = []
+    for customer_id, phone_number, current in conn.execute(
+        """
+        SELECT id, phone_number, phone_normalized FROM customers
+        WHERE phone_normalized IS NOT NULL ORDER BY id
+        """
+    ):
+        normalized = normalize_phone(phone_number)
+        if normalized == current:
+            continue
+        taken.discard(current)
+        if normalized in taken:
+            normalized = None
+        taken.add(normalized)
+        updates.append((customer_id, normalized))
+    # Clear first so that swapped values never collide in the unique index
+    conn.executemany(
+        "UPDATE customers SET phone_normalized = NULL WHERE id = ?",
+        [(customer_id,) for customer_id, _ in updates],
+    )
+    conn.executemany(
+        "UPDATE customers SET phone_normalized = ? WHERE id = ?",
+        [
+            (normalized, customer_id)
+            for customer_id, normalized in updates
+            if normalized
+        ],
+    )
+
+
+def _day_sql(column: str) -> str:
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def _nights_sql(stays: str) -> str:
+    # Rooms booked per night (columns day, rooms) over ``stays``, a query of
+    # (check_in_day, check_out_day) pairs
+    return f"""
+        WITH RECURSIVE nights (day, last) AS (
+          SELECT check_in_day, check_out_day FROM ({stays})
+          WHERE check_in_day < check_out_day
+          UNION ALL
+          SELECT day + 1, last FROM nights WHERE day + 1 < last
+        )
+        SELECT day, COUNT(*) AS rooms FROM nights GROUP BY day
+    """
+
+
+def _count_nights_sql(stays: str, hotel_id: str, price: str) -> str:
+    return f"""
+        INSERT INTO hotel_daily_stats (hotel_id, day, rooms_booked, revenue)
+        SELECT {hotel_id}, n.day, n.rooms, n.rooms * {price}
+        FROM ({_nights_sql(stays)}) AS n
+        WHERE {hotel_id} IS NOT NULL
+        ON CONFLICT (hotel_id, day) DO UPDATE
+        SET rooms_booked = rooms_booked + excluded.rooms_booked,
+            revenue = revenue + excluded.revenue;
+    """
+
+
+def _release_nights_sql(stays: str, hotel_id: str, price: str) -> str:
+    return f"""
+        UPDATE hotel_daily_stats
+        SET rooms_booked = rooms_booked - n.rooms,
+            revenue = revenue - n.rooms * {price}
+        FROM ({_nights_sql(stays)}) AS n
+        WHERE hotel_daily_stats.hotel_id = {hotel_id}
+          AND hotel_daily_stats.day = n.day;
+    """
+
+
+def _booking_sql(row: str) -> tuple[str, str, str]:
+    # The stay, hotel and nightly price of the NEW or OLD booking row. Days
+    # come from the text dates: the day-number triggers may not have run yet.
+    return (
+        f"""
+        SELECT {_day_sql(f"{row}.check_in_date")} AS check_in_day,
+               {_day_sql(f"{row}.check_out_date")} AS check_out_day
+        """,
+        f"(SELECT hotel_id FROM rooms WHERE id = {row}.room_id)",
+        f"(SELECT price_per_night FROM rooms WHERE id = {row}.room_id)",
+    )
+
+
+def _room_sql(row: str) -> tuple[str, str, str]:
+    # The confirmed stays, hotel and nightly price of the NEW or OLD room row
+    return (
+        f"""
+        SELECT check_in_day, check_out_day FROM bookings
+        WHERE room_id = {row}.id AND status = 'confirmed'
+        """,
+        f"{row}.hotel_id",
+        f"{row}.price_per_night",
+    )
+
+
+# Triggers keeping hotel_daily_stats equal to db.daily_stats.DAILY_STATS_QUERY,
+# by name; bulk loads drop them and rebuild instead (see daily_stats_deferred)
+DAILY_STATS_TRIGGERS: dict[str, str] = {
+    "trg_bookings_daily_stats_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_daily_stats_insert
+        AFTER INSERT ON bookings
+        WHEN NEW.status = 'confirmed'
+        BEGIN
+            {_count_nights_sql(*_booking_sql("NEW"))}
+        END
+    """,
+    "trg_bookings_daily_stats_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_daily_stats_delete
+        AFTER DELETE ON bookings
+        WHEN OLD.status = 'confirmed'
+        BEGIN
+            {_release_nights_sql(*_booking_sql("OLD"))}
+        END
+    """,
+    # A cancellation, or a confirmed booking moved to other dates or another
+    # room: release the old nights, count the new ones
+    "trg_bookings_daily_stats_release": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_daily_stats_release
+        AFTER UPDATE OF status, room_id, check_in_date, check_out_date
+        ON bookings
+        WHEN OLD.status = 'confirmed'
+        BEGIN
+            {_release_nights_sql(*_booking_sql("OLD"))}
+        END
+    """,
+    "trg_bookings_daily_stats_count": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_daily_stats_count
+        AFTER UPDATE OF status, room_id, check_in_date, check_out_date
+        ON bookings
+        WHEN NEW.status = 'confirmed'
+        BEGIN
+            {_count_nights_sql(*_booking_sql("NEW"))}
+        END
+    """,
+    # Repriced or moved rooms: their booked nights are counted again at the
+    # new price, in the new hotel
+    "trg_rooms_daily_stats": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rooms_daily_stats
+        AFTER UPDATE OF hotel_id, price_per_night ON rooms
+        WHEN OLD.hotel_id IS NOT NEW.hotel_id
+          OR OLD.price_per_night IS NOT NEW.price_per_night
+        BEGIN
+            {_release_nights_sql(*_room_sql("OLD"))}
+            {_count_nights_sql(*_room_sql("NEW"))}
+        END
+    """,
+}
+
+
+@contextmanager
+def daily_stats_deferred(conn: sqlite3.Connection) -> Iterator[None]:
+    """Drop the daily stats triggers for the block, then rebuild
+    hotel_daily_stats once and recreate them.
+
+    For bulk loads, where one rebuild is much cheaper than a trigger run per
+    booking. Does not commit; run it in one transaction so that no other
+    writer can change bookings while the triggers are gone.
+    """
+    for name in DAILY_STATS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    yield
+    rebuild_daily_stats(conn)
+    for sql in DAILY_STATS_TRIGGERS.values():
+        conn.execute(sql)
+
+
+# Ordered schema migrations on top of the base tables created by
+# scripts/db_utils.py. The applied version is tracked in PRAGMA user_version.
+MIGRATIONS: list[tuple[int, str, list[Step]]] = [
+    (
+        1,
+        "Indexes for availability searches and overlap checks",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS idx_bookings_room_status_dates
+            ON bookings (room_id, status, check_in_date, check_out_date)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_rooms_hotel_capacity
+            ON rooms (hotel_id, capacity)
+            """,
+        ],
+    ),
+    (
+        2,
+        "Index hotels by location",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS idx_hotels_location
+            ON hotels (location_id)
+            """,
+        ],
+    ),
+    (
+        3,
+        "Catalogue version bumped on every change to reference data",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """,
+            "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_locations_insert_catalog_version
+            AFTER INSERT ON locations
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_locations_update_catalog_version
+            AFTER UPDATE ON locations
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_locations_delete_catalog_version
+            AFTER DELETE ON locations
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_hotels_insert_catalog_version
+            AFTER INSERT ON hotels
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_hotels_update_catalog_version
+            AFTER UPDATE ON hotels
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_hotels_delete_catalog_version
+            AFTER DELETE ON hotels
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_rooms_insert_catalog_version
+            AFTER INSERT ON rooms
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_rooms_update_catalog_version
+            AFTER UPDATE ON rooms
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_rooms_delete_catalog_version
+            AFTER DELETE ON rooms
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            """,
+        ],
+    ),
+    (
+        4,
+        "Trigram full-text index on customer names and normalized phone numbers",
+        [
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+                name,
+                content = 'customers',
+                content_rowid = 'id',
+                tokenize = 'trigram'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_customers_fts_insert
+            AFTER INSERT ON customers
+            BEGIN
+                INSERT INTO customers_fts (rowid, name) VALUES (NEW.id, NEW.name);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_customers_fts_delete
+            AFTER DELETE ON customers
+            BEGIN
+                INSERT INTO customers_fts (customers_fts, rowid, name)
+                VALUES ('delete', OLD.id, OLD.name);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_customers_fts_update
+            AFTER UPDATE OF name ON customers
+            BEGIN
+                INSERT INTO customers_fts (customers_fts, rowid, name)
+                VALUES ('delete', OLD.id, OLD.name);
+                INSERT INTO customers_fts (rowid, name) VALUES (NEW.id, NEW.name);
+            END
+            """,
+            "INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')",
+            "ALTER TABLE customers ADD COLUMN phone_normalized TEXT",
+            _backfill_normalized_phones,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_phone_normalized
+            ON customers (phone_normalized)
+            """,
+            # Writers that do not know about the column (e.g. the SQLAlchemy
+            # scripts) still get it filled; common separators are stripped
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_customers_phone_normalized
+            AFTER INSERT ON customers
+            WHEN NEW.phone_normalized IS NULL
+            BEGIN
+                UPDATE customers
+                SET phone_normalized = NULLIF(
+                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
+                        NEW.phone_number,
+                        ' ', ''), '-', ''), '(', ''), ')', ''), '.', ''), '+', ''),
+                        'x', ''),
+                    ''
+                )
+                WHERE id = NEW.id;
+            END
+            """,
+        ],
+    ),
+    (
+        5,
+        "Shard map; empty unless the database was split by scripts/shard_db.py",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY CHECK (id > 0),
+                path TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS location_shards (
+                location_id INTEGER PRIMARY KEY,
+                shard_id INTEGER NOT NULL REFERENCES shards (id)
+            )
+            """,
+        ],
+    ),
+    (
+        6,
+        "Integer day numbers for booking dates, indexed for overlap checks",
+        [
+            # Days since 1970-01-01 (julianday 2440587.5), as db.models.day_number.
+            # Plain columns rather than virtual generated ones, so that the
+            # index below covers the overlap checks.
+            "ALTER TABLE bookings ADD COLUMN check_in_day INTEGER",
+            "ALTER TABLE bookings ADD COLUMN check_out_day INTEGER",
+            f"""
+            UPDATE bookings
+            SET check_in_day = {_day_sql("check_in_date")},
+                check_out_day = {_day_sql("check_out_date")}
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_bookings_room_status_days
+            ON bookings (room_id, status, check_in_day, check_out_day)
+            """,
+            # Every overlap check now compares day numbers
+            "DROP INDEX IF EXISTS idx_bookings_room_status_dates",
+            # The tools write the day numbers themselves; writers that do not
+            # know about them (e.g. the SQLAlchemy scripts) still get them
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_days_insert
+            AFTER INSERT ON bookings
+            WHEN NEW.check_in_day IS NULL OR NEW.check_out_day IS NULL
+            BEGIN
+                UPDATE bookings
+                SET check_in_day = {_day_sql("NEW.check_in_date")},
+                    check_out_day = {_day_sql("NEW.check_out_date")}
+                WHERE id = NEW.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_days_update
+            AFTER UPDATE OF check_in_date, check_out_date ON bookings
+            BEGIN
+                UPDATE bookings
+                SET check_in_day = {_day_sql("NEW.check_in_date")},
+                    check_out_day = {_day_sql("NEW.check_out_date")}
+                WHERE id = NEW.id;
+            END
+            """,
+        ],
+    ),
+    (
+        7,
+        "Rooms booked and revenue per hotel and night, kept by triggers",
+        [
+            # Days are day numbers; revenue is in the unit of price_per_night.
+            # Nights whose bookings were all cancelled keep a zero row.
+            """
+            CREATE TABLE IF NOT EXISTS hotel_daily_stats (
+                hotel_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                rooms_booked INTEGER NOT NULL,
+                revenue INTEGER NOT NULL,
+                PRIMARY KEY (hotel_id, day)
+            ) WITHOUT ROWID
+            """,
+            rebuild_daily_stats,
+            *DAILY_STATS_TRIGGERS.values(),
+        ],
+    ),
+    (
+        8,
+        "Trigger normalizes phone numbers like db.models.normalize_phone",
+        [
+            _renormalize_phones,
+            # Keeps the ASCII digits, as normalize_phone does. Plain SQL, so
+            # that any connection (the sqlite3 shell included) can still
+            # insert customers.
+            "DROP TRIGGER IF EXISTS trg_customers_phone_normalized",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_customers_phone_normalized
+            AFTER INSERT ON customers
+            WHEN NEW.phone_normalized IS NULL
+            BEGIN
+                UPDATE customers
+                SET phone_normalized = (
+                    WITH RECURSIVE chars (position, digits) AS (
+                      SELECT 1, ''
+                      UNION ALL
+                      SELECT position + 1,
+                             digits || IIF(
+                               substr(NEW.phone_number, position, 1) GLOB '[0-9]',
+                               substr(NEW.phone_number, position, 1),
+                               ''
+                             )
+                      FROM chars
+                      WHERE position <= length(NEW.phone_number)
+                    )
+                    SELECT NULLIF(digits, '') FROM chars
+                    ORDER BY position DESC
+                    LIMIT 1
+                )
+                WHERE id = NEW.id;
+            END
+            """,
+        ],
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(
+    conn: sqlite3.Connection, target: int = SCHEMA_VERSION
+) -> list[int]:
+    """Bring the database up to ``target`` (by default SCHEMA_VERSION) and
+    return the versions applied.
+
+    Each migration runs in its own immediate transaction together with the
+    user_version bump, so a failed migration leaves the database untouched.
+    """
+    applied = []
+    for version, _description, steps in MIGRATIONS:
+        if version > target:
+            break
+        if version <= get_schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
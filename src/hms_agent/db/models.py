@@ -1,13 +1,71 @@
-from pydantic import BaseModel, Field, StringConstraints
+import re
+from datetime import date
+
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    Field,
+    StringConstraints,
+    TypeAdapter,
+    model_validator,
+)
 from typing import Literal
 from typing_extensions import Annotated
 
+from db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Rooms one group booking may hold
+MAX_GROUP_ROOMS = 50
+
+# Longest period one occupancy or revenue report may cover
+MAX_REPORT_DAYS = 366
+
+# Day numbers count days since 1970-01-01, as the check_in_day and
+# check_out_day columns of bookings do
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def day_number(iso_date: str) -> int:
+    """The day number of a YYYY-MM-DD date; ValueError if there is no such day."""
+    return date.fromisoformat(iso_date).toordinal() - EPOCH_ORDINAL
+
+
+def day_date(day: int) -> str:
+    """The YYYY-MM-DD date of a day number."""
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def _check_calendar_date(value: str) -> str:
+    try:
+        day_number(value)
+    except ValueError:
+        raise ValueError(f"{value} is not a calendar date") from None
+    return value
+
+
+# Rejected at validation, so no backend sees a date like 2026-02-30
 DateStr = Annotated[
     str,
     StringConstraints(pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    AfterValidator(_check_calendar_date),
 ]
 
 
+def check_stay(check_in_date: str, check_out_date: str) -> None:
+    """Raise ValueError unless the stay is at least one night long."""
+    if day_number(check_out_date) <= day_number(check_in_date):
+        raise ValueError("check_out_date must be after check_in_date")
+
+
+def normalize_phone(phone_number: str) -> str | None:
+    """Reduce a phone number to its digits so formatting does not matter.
+
+    Only ASCII digits are kept, like the customers trigger of migration 8.
+    """
+    digits = re.sub(r"[^0-9]", "", phone_number)
+    return digits or None
+
+
 class HotelsInput(BaseModel):
     location_id: int | None = Field(
         None,
@@ -15,6 +73,15 @@ class HotelsInput(BaseModel):
         description="Optional ID of the location to filter hotels. If omitted, all hotels are returned.",
         examples=[1, 5],
     )
+    limit: int = Field(
+        DEFAULT_PAGE_SIZE,
+        gt=0,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of hotels to return.",
+    )
+    cursor: str | None = Field(
+        None, description="`next_cursor` of the previous page, to fetch the next one."
+    )
 
 
 class HotelsOutput(BaseModel):
@@ -28,6 +95,15 @@ class LocationsOutput(BaseModel):
     country: str = Field(..., description="Country name")
 
 
+class HotelRoomsInput(BaseModel):
+    hotel_id: int = Field(
+        ...,
+        gt=0,
+        description="The unique ID of the hotel whose rooms should be listed.",
+        examples=[12],
+    )
+
+
 class SearchRoomsInput(BaseModel):
     hotel_id: int = Field(
         ...,
@@ -49,6 +125,15 @@ class SearchRoomsInput(BaseModel):
         description="Minimum number of guests the room must accommodate.",
         examples=[2],
     )
+    limit: int = Field(
+        DEFAULT_PAGE_SIZE,
+        gt=0,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of rooms to return, smallest rooms first.",
+    )
+    cursor: str | None = Field(
+        None, description="`next_cursor` of the previous page, to fetch the next one."
+    )
 
 
 class RoomOutput(BaseModel):
@@ -59,6 +144,61 @@ class RoomOutput(BaseModel):
     capacity: int
 
 
+# Column order of rows that are mapped straight to RoomOutput-shaped dicts
+ROOM_COLUMNS = tuple(RoomOutput.model_fields)
+
+
+class SearchLocationRoomsInput(BaseModel):
+    location_id: int | None = Field(
+        None,
+        gt=0,
+        description="ID of the location whose hotels should be searched.",
+        examples=[3],
+    )
+    hotel_ids: list[int] | None = Field(
+        None,
+        min_length=1,
+        max_length=50,
+        description="Explicit list of hotel IDs to search instead of a location.",
+        examples=[[4, 5]],
+    )
+    check_in_date: DateStr = Field(
+        ..., description="Check-in date in YYYY-MM-DD format.", examples=["2026-06-15"]
+    )
+    check_out_date: DateStr = Field(
+        ...,
+        description="Check-out date in YYYY-MM-DD format. Must be after check-in.",
+        examples=["2026-06-20"],
+    )
+    min_capacity: int = Field(
+        ...,
+        gt=0,
+        description="Minimum number of guests the room must accommodate.",
+        examples=[2],
+    )
+    sort_by: Literal["price_asc", "price_desc"] = Field(
+        "price_asc", description="Order rooms (and hotels) by nightly price."
+    )
+    rooms_per_hotel: int = Field(
+        5, gt=0, le=50, description="Maximum number of rooms returned per hotel."
+    )
+    max_results: int = Field(
+        50, gt=0, le=200, description="Maximum number of rooms returned in total."
+    )
+
+    @model_validator(mode="after")
+    def check_scope(self):
+        if (self.location_id is None) == (self.hotel_ids is None):
+            raise ValueError("Provide exactly one of location_id or hotel_ids")
+        return self
+
+
+class HotelRoomsOutput(BaseModel):
+    hotel_id: int
+    hotel_name: str
+    rooms: list[RoomOutput]
+
+
 class CreateBookingInput(BaseModel):
     customer_id: int = Field(
         ...,
@@ -73,12 +213,100 @@ class CreateBookingInput(BaseModel):
     check_in_date: DateStr
     check_out_date: DateStr
 
+    @model_validator(mode="after")
+    def check_dates(self):
+        check_stay(self.check_in_date, self.check_out_date)
+        return self
+
 
 class BookingOutput(BaseModel):
     booking_id: int
     status: Literal["confirmed"]
 
 
+class GroupBookingInput(BaseModel):
+    customer_id: int = Field(
+        ...,
+        gt=0,
+        description="The ID of the customer. MUST be obtained from search_customers or create_customer_entry first.",
+    )
+    room_ids: list[int] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_GROUP_ROOMS,
+        description="The IDs of the rooms to book together. MUST be obtained from search_rooms first.",
+        examples=[[4, 5]],
+    )
+    check_in_date: DateStr
+    check_out_date: DateStr
+
+    @model_validator(mode="after")
+    def check_rooms(self):
+        if len(set(self.room_ids)) != len(self.room_ids):
+            raise ValueError("Each room may only be booked once per group")
+        check_stay(self.check_in_date, self.check_out_date)
+        return self
+
+
+class RoomBookingOutput(BaseModel):
+    booking_id: int
+    room_id: int
+
+
+class GroupBookingOutput(BaseModel):
+    status: Literal["confirmed"]
+    bookings: list[RoomBookingOutput]
+
+
+class BookStayInput(BaseModel):
+    hotel_id: int = Field(
+        ...,
+        gt=0,
+        description="The unique ID of the hotel to book a room in.",
+        examples=[12],
+    )
+    check_in_date: DateStr = Field(
+        ..., description="Check-in date in YYYY-MM-DD format.", examples=["2026-06-15"]
+    )
+    check_out_date: DateStr = Field(
+        ...,
+        description="Check-out date in YYYY-MM-DD format. Must be after check-in.",
+        examples=["2026-06-20"],
+    )
+    min_capacity: int = Field(
+        1,
+        gt=0,
+        description="Minimum number of guests the room must accommodate.",
+        examples=[2],
+    )
+    room_type: str | None = Field(
+        None,
+        description="Optional room type, e.g. Single, Double or Suite (case is ignored).",
+    )
+    name: str = Field(..., min_length=1, description="Full name of the guest.")
+    phone_number: str = Field(
+        ...,
+        min_length=5,
+        description="Contact phone number of the guest. Formatting is ignored.",
+    )
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        check_stay(self.check_in_date, self.check_out_date)
+        return self
+
+
+class BookStayOutput(BaseModel):
+    booking_id: int
+    status: Literal["confirmed"]
+    customer_id: int
+    customer_created: bool
+    hotel_id: int
+    room: RoomOutput
+    check_in_date: str
+    check_out_date: str
+
+
 class CancelBookingInput(BaseModel):
     booking_id: int = Field(
         ...,
@@ -87,12 +315,63 @@ class CancelBookingInput(BaseModel):
     )
 
 
+class ReportPeriodInput(BaseModel):
+    start_date: DateStr = Field(
+        ...,
+        description="First day of the report in YYYY-MM-DD format.",
+        examples=["2026-06-01"],
+    )
+    end_date: DateStr = Field(
+        ...,
+        description="Day after the last day of the report in YYYY-MM-DD format, like a check-out date.",
+        examples=["2026-07-01"],
+    )
+
+    @model_validator(mode="after")
+    def check_period(self):
+        days = day_number(self.end_date) - day_number(self.start_date)
+        if not 0 < days <= MAX_REPORT_DAYS:
+            raise ValueError(
+                f"A report covers 1 to {MAX_REPORT_DAYS} days; "
+                "end_date must be after start_date"
+            )
+        return self
+
+
+class HotelOccupancyInput(ReportPeriodInput):
+    hotel_id: int = Field(
+        ...,
+        gt=0,
+        description="The unique ID of the hotel to report on.",
+        examples=[12],
+    )
+
+
+class LocationRevenueInput(ReportPeriodInput):
+    location_id: int | None = Field(
+        None,
+        gt=0,
+        description="Optional ID of the location to report on. If omitted, every location is reported.",
+        examples=[3],
+    )
+
+
 class CustomerSearchInput(BaseModel):
     name: str | None = Field(
-        None, description="Full name of the customer to search for."
+        None, description="Full or partial name of the customer to search for."
     )
     phone_number: str | None = Field(
-        None, description="Exact phone number of the customer."
+        None,
+        description="Phone number of the customer. Formatting (spaces, dashes, brackets) is ignored.",
+    )
+    limit: int = Field(
+        DEFAULT_PAGE_SIZE,
+        gt=0,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of customers to return.",
+    )
+    cursor: str | None = Field(
+        None, description="`next_cursor` of the previous page, to fetch the next one."
     )
 
 
@@ -107,3 +386,10 @@ class CustomerOutput(BaseModel):
     id: int
     name: str
     phone_number: str
+
+
+# Validate a whole result of row dicts in one call instead of one model
+# construction per row
+room_list_adapter = TypeAdapter(list[RoomOutput])
+hotel_rooms_list_adapter = TypeAdapter(list[HotelRoomsOutput])
+customer_list_adapter = TypeAdapter(list[CustomerOutput])
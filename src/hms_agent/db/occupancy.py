@@ -0,0 +1,251 @@
+import sqlite3
+import sys
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+from db.connector import connection
+from db.models import EPOCH_ORDINAL, ROOM_COLUMNS
+
+DEFAULT_HORIZON_DAYS = 730
+
+
+def _catalog_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()
+    return row[0]
+
+
+class OccupancyIndex:
+    """A per-room x per-day occupancy bitmap for confirmed bookings.
+
+    Every room owns a fixed-width row of bits in one shared ``bytearray``; bit
+    ``d`` of a row is set when the room is taken on ``start + d`` days. A
+    range check is a single ``int.from_bytes`` over the row slice and a mask,
+    so availability for a hotel never touches SQLite. Dates outside
+    ``[start, start + days)`` are not covered and must be answered by SQL.
+
+    The rooms are those of the catalogue version it was built from; ``sync``
+    reloads them and the bookings once rooms are added, moved or repriced
+    elsewhere (a script, the shard split).
+    """
+
+    def __init__(self, start: date, days: int = DEFAULT_HORIZON_DAYS):
+        if days < 1:
+            raise ValueError("Horizon must be at least one day")
+        self.start = start
+        self.days = days
+        self.row_bytes = (days + 7) // 8
+        self._lock = threading.Lock()
+        self._rooms: dict[int, tuple] = {}
+        self._hotel_rooms: dict[int, list[int]] = {}
+        self._slots: dict[int, int] = {}
+        self._bits = bytearray()
+        self._version: Optional[int] = None
+
+    @classmethod
+    def build(
+        cls,
+        conn: sqlite3.Connection,
+        start: Optional[date] = None,
+        days: int = DEFAULT_HORIZON_DAYS,
+    ) -> "OccupancyIndex":
+        index = cls(start or date.today(), days)
+        index._load(conn, _catalog_version(conn))
+        return index
+
+    def _load(self, conn: sqlite3.Connection, version: int) -> None:
+        self._rooms.clear()
+        self._hotel_rooms.clear()
+        self._slots.clear()
+        self._load_rooms(conn)
+        self._bits = self._scan_bookings(conn)
+        self._version = version
+
+    def sync(self, conn: sqlite3.Connection) -> bool:
+        """Reload rooms and bookings if the catalogue changed since the last
+        load, or a booking named a room the index does not know; returns
+        whether it reloaded.
+
+        Bookings made meanwhile wait for the lock and are marked on the
+        reloaded bitmap.
+        """
+        # Read the version before loading: rooms newer than it only cause
+        # one more reload
+        version = _catalog_version(conn)
+        if version == self._version:
+            return False
+        with self._lock:
+            self._load(conn, version)
+        return True
+
+    def _load_rooms(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute(
+            """
+            SELECT id, hotel_id, room_number, room_type, price_per_night, capacity
+            FROM rooms
+            ORDER BY hotel_id, capacity, id
+            """
+        ).fetchall()
+        for slot, row in enumerate(rows):
+            room_id, hotel_id = row[0], row[1]
+            self._rooms[room_id] = (row[0], row[2], row[3], row[4], row[5])
+            self._hotel_rooms.setdefault(hotel_id, []).append(room_id)
+            self._slots[room_id] = slot
+
+    def _scan_bookings(self, conn: sqlite3.Connection) -> bytearray:
+        bits = bytearray(len(self._slots) * self.row_bytes)
+        end = self.start + timedelta(days=self.days)
+        cur = conn.execute(
+            """
+            SELECT room_id, check_in_date, check_out_date
+            FROM bookings
+            WHERE status = 'confirmed'
+              AND check_in_day < ?
+              AND check_out_day > ?
+            """,
+            (end.toordinal() - EPOCH_ORDINAL, self.start.toordinal() - EPOCH_ORDINAL),
+        )
+        for room_id, check_in, check_out in cur:
+            if room_id in self._slots:
+                self._set(bits, room_id, check_in, check_out, True)
+        return bits
+
+    def _offsets(self, check_in: str, check_out: str) -> tuple[int, int]:
+        first = (date.fromisoformat(check_in) - self.start).days
+        last = (date.fromisoformat(check_out) - self.start).days
+        return max(first, 0), min(last, self.days)
+
+    def _row_range(self, room_id: int, first: int, last: int) -> tuple[int, int, int]:
+        base = self._slots[room_id] * self.row_bytes
+        return base + first // 8, base + (last - 1) // 8 + 1, first % 8
+
+    def _set(
+        self,
+        bits: bytearray,
+        room_id: int,
+        check_in: str,
+        check_out: str,
+        occupied: bool,
+    ) -> None:
+        first, last = self._offsets(check_in, check_out)
+        if first >= last:
+            return
+        lo, hi, shift = self._row_range(room_id, first, last)
+        mask = ((1 << (last - first)) - 1) << shift
+        value = int.from_bytes(bits[lo:hi], "little")
+        value = value | mask if occupied else value & ~mask
+        bits[lo:hi] = value.to_bytes(hi - lo, "little")
+
+    def covers(self, check_in: str, check_out: str) -> bool:
+        first = (date.fromisoformat(check_in) - self.start).days
+        last = (date.fromisoformat(check_out) - self.start).days
+        return 0 <= first < last <= self.days
+
+    def mark(self, room_id: int, check_in: str, check_out: str) -> None:
+        with self._lock:
+            if room_id in self._slots:
+                self._set(self._bits, room_id, check_in, check_out, True)
+            else:
+                # A room added after the load; the next sync reloads it
+                self._version = None
+
+    def clear(self, room_id: int, check_in: str, check_out: str) -> None:
+        with self._lock:
+            if room_id in self._slots:
+                self._set(self._bits, room_id, check_in, check_out, False)
+            else:
+                self._version = None
+
+    def available_rooms(
+        self,
+        hotel_id: int,
+        min_capacity: int,
+        check_in: str,
+        check_out: str,
+        after: tuple[int, int] = (0, 0),
+        limit: Optional[int] = None,
+    ) -> list[dict]:
+        """Rooms of ``hotel_id`` free for the whole stay, as RoomOutput dicts.
+
+        Rooms are ordered by (capacity, id) like the SQL search; ``after`` and
+        ``limit`` select a page of that order.
+        """
+        first, last = self._offsets(check_in, check_out)
+        mask_width = (1 << (last - first)) - 1
+        rows = []
+        with self._lock:
+            for room_id in self._hotel_rooms.get(hotel_id, ()):
+                room = self._rooms[room_id]
+                if room[4] < min_capacity or (room[4], room_id) <= after:
+                    continue
+                if limit is not None and len(rows) == limit:
+                    break
+                lo, hi, shift = self._row_range(room_id, first, last)
+                if int.from_bytes(self._bits[lo:hi], "little") & (mask_width << shift):
+                    continue
+                rows.append(dict(zip(ROOM_COLUMNS, room)))
+        return rows
+
+    def verify(self, conn: sqlite3.Connection) -> list[int]:
+        """Compare against the database and return the ids of drifted rooms.
+
+        Rooms that exist in the database but not in the index (added after the
+        build) are reported as drifted too.
+        """
+        fresh = self._scan_bookings(conn)
+        with self._lock:
+            current = bytes(self._bits)
+        drifted = [
+            room_id
+            for room_id, slot in self._slots.items()
+            if fresh[slot * self.row_bytes : (slot + 1) * self.row_bytes]
+            != current[slot * self.row_bytes : (slot + 1) * self.row_bytes]
+        ]
+        known = set(self._slots)
+        drifted.extend(
+            row[0]
+            for row in conn.execute("SELECT id FROM rooms")
+            if row[0] not in known
+        )
+        return sorted(drifted)
+
+    def memory_usage(self) -> dict:
+        catalogue = sys.getsizeof(self._rooms) + sum(
+            sys.getsizeof(room) + sum(sys.getsizeof(value) for value in room)
+            for room in self._rooms.values()
+        )
+        return {
+            "rooms": len(self._slots),
+            "days": self.days,
+            "bitmap_bytes": len(self._bits),
+            "catalogue_bytes": catalogue,
+        }
+
+
+_OCCUPANCY: Optional[OccupancyIndex] = None
+
+
+def enable_occupancy(
+    days: int = DEFAULT_HORIZON_DAYS, start: Optional[date] = None
+) -> OccupancyIndex:
+    """Build the in-memory index from the current database and start using it."""
+    global _OCCUPANCY
+    with connection() as conn:
+        _OCCUPANCY = OccupancyIndex.build(conn, start=start, days=days)
+    return _OCCUPANCY
+
+
+def disable_occupancy() -> None:
+    global _OCCUPANCY
+    _OCCUPANCY = None
+
+
+def get_occupancy() -> Optional[OccupancyIndex]:
+    return _OCCUPANCY
+
+
+def verify_occupancy() -> list[int]:
+    if _OCCUPANCY is None:
+        raise RuntimeError("Occupancy index is not enabled")
+    with connection() as conn:
+        return _OCCUPANCY.verify(conn)
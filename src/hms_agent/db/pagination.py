@@ -0,0 +1,42 @@
+import base64
+import json
+from typing import Callable, Optional, Sequence
+
+# Server-side ceiling for a single page, whatever the caller asks for; keeps
+# every tool response (and the tokens it costs the agent) bounded
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = 20
+
+
+def encode_cursor(kind: str, key: Sequence) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    raw = json.dumps([kind, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: Optional[str]) -> Optional[list]:
+    """Sort key stored in ``cursor``; raises ValueError if it is not ours."""
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_kind, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_kind != kind or not isinstance(key, list):
+        raise ValueError("Cursor does not belong to this search")
+    return key
+
+
+def page(
+    rows: list, limit: int, kind: str, key: Callable[[object], Sequence]
+) -> tuple[list, Optional[str]]:
+    """Split ``limit + 1`` fetched rows into a page and the next cursor.
+
+    Queries fetch one row more than they return, so the presence of a next
+    page is known without a COUNT.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, key(rows[-1]))
@@ -0,0 +1,215 @@
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional, TypeVar
+
+from db.connector import DEFAULT_POOL_SIZE, ConnectionPool, connection, get_pool
+from db.migrations import apply_migrations
+from db.writer import CommitHook, WriteFn, WriteQueue, execute_transaction
+
+T = TypeVar("T")
+
+# Bookings created in shard k get ids from k * SHARD_ID_STRIDE up, so the
+# shard of a booking follows from its id. Smaller ids predate the split and
+# are found by asking every shard.
+SHARD_ID_STRIDE = 1_000_000_000
+
+
+class Shard:
+    """One shard file with its own connection pool and optional writer."""
+
+    def __init__(self, shard_id: int, path: str, pool_size: int = DEFAULT_POOL_SIZE):
+        self.id = shard_id
+        self.path = path
+        self.pool = ConnectionPool(path, max_size=pool_size)
+        self.writer: Optional[WriteQueue] = None
+
+    @property
+    def booking_id_floor(self) -> int:
+        return self.id * SHARD_ID_STRIDE
+
+    def connection(self):
+        return self.pool.connection()
+
+    def write(self, fn: WriteFn, *args, on_commit: CommitHook = None) -> T:
+        """run_write_transaction against this shard."""
+        if self.writer is not None:
+            return self.writer.submit(fn, *args, on_commit=on_commit).result()
+        with self.pool.connection() as conn:
+            result = execute_transaction(conn, fn, *args)
+        if on_commit is not None:
+            on_commit(result)
+        return result
+
+    def start_writer(self) -> None:
+        if self.writer is None:
+            self.writer = WriteQueue(path=self.path)
+            self.writer.start()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+        self.pool.close()
+
+
+class ShardRouter:
+    """Routes locations, hotels, rooms and bookings to their shard.
+
+    The configured database stays the catalogue: locations, hotels, rooms and
+    customers, plus the shard map. Each shard file holds the locations, hotels
+    and rooms it owns and all of their bookings, so availability checks and
+    bookings touch one shard only and writers in different shards never wait
+    on the same file lock.
+    """
+
+    def __init__(self, shards: dict[int, Shard]):
+        self.shards = shards
+        self._lock = threading.Lock()
+        self._location_shards: dict[int, int] = {}
+        self._hotel_locations: dict[int, int] = {}
+        self._room_hotels: dict[int, int] = {}
+        self._fan_out = ThreadPoolExecutor(
+            max_workers=len(shards), thread_name_prefix="hms-shard"
+        )
+
+    @classmethod
+    def open(
+        cls, conn: sqlite3.Connection, base_dir: Path, pool_size: int
+    ) -> Optional["ShardRouter"]:
+        """Router for the shards listed in the catalogue, or None if unsplit."""
+        rows = conn.execute("SELECT id, path FROM shards ORDER BY id").fetchall()
+        if not rows:
+            return None
+        shards = {}
+        for shard_id, path in rows:
+            path = str(base_dir / path)
+            if not Path(path).exists():
+                raise RuntimeError(f"Shard {shard_id} is missing: {path}")
+            shards[shard_id] = Shard(shard_id, path, pool_size)
+            with shards[shard_id].connection() as shard_conn:
+                apply_migrations(shard_conn)
+        router = cls(shards)
+        router.refresh(conn)
+        return router
+
+    def refresh(self, conn: sqlite3.Connection) -> None:
+        """Reload the location, hotel and room maps from the catalogue."""
+        location_shards = {
+            row[0]: row[1]
+            for row in conn.execute("SELECT location_id, shard_id FROM location_shards")
+        }
+        hotel_locations = {
+            row[0]: row[1] for row in conn.execute("SELECT id, location_id FROM hotels")
+        }
+        room_hotels = {
+            row[0]: row[1] for row in conn.execute("SELECT id, hotel_id FROM rooms")
+        }
+        with self._lock:
+            self._location_shards = location_shards
+            self._hotel_locations = hotel_locations
+            self._room_hotels = room_hotels
+
+    def _lookup(self, mapping: str, key: int) -> Optional[int]:
+        value = getattr(self, mapping).get(key)
+        if value is None:
+            # Added to the catalogue after the maps were loaded
+            with connection() as conn:
+                self.refresh(conn)
+            value = getattr(self, mapping).get(key)
+        return value
+
+    def shard_for_location(self, location_id: int) -> Optional[Shard]:
+        shard_id = self._location_shards.get(location_id)
+        return self.shards.get(shard_id) if shard_id is not None else None
+
+    def shard_for_hotel(self, hotel_id: int) -> Optional[Shard]:
+        """The hotel's shard, or None if the catalogue has no such hotel.
+
+        Raises ValueError for a hotel whose location was added after the
+        split and so belongs to no shard.
+        """
+        location_id = self._lookup("_hotel_locations", hotel_id)
+        if not location_id:
+            return None
+        shard = self.shard_for_location(location_id)
+        if shard is None:
+            raise ValueError(f"Location {location_id} is not assigned to a shard")
+        return shard
+
+    def shard_for_room(self, room_id: int) -> Optional[Shard]:
+        hotel_id = self._lookup("_room_hotels", room_id)
+        return self.shard_for_hotel(hotel_id) if hotel_id else None
+
+    def find_booking_shard(self, booking_id: int) -> Optional[Shard]:
+        shard = self.shards.get(booking_id // SHARD_ID_STRIDE)
+        if shard is not None:
+            return shard
+
+        # A booking from before the split: ask every shard
+        def holds(shard: Shard) -> bool:
+            with shard.connection() as conn:
+                return (
+                    conn.execute(
+                        "SELECT 1 FROM bookings WHERE id = ?", (booking_id,)
+                    ).fetchone()
+                    is not None
+                )
+
+        shards = list(self.shards.values())
+        for shard, found in zip(shards, self.map(holds, shards)):
+            if found:
+                return shard
+        return None
+
+    def group_hotels(self, hotel_ids: Iterable[int]) -> dict[Shard, list[int]]:
+        """Hotels by shard; hotels missing from the catalogue are left out."""
+        groups: dict[Shard, list[int]] = {}
+        for hotel_id in hotel_ids:
+            shard = self.shard_for_hotel(hotel_id)
+            if shard is not None:
+                groups.setdefault(shard, []).append(hotel_id)
+        return groups
+
+    def map(self, fn: Callable[[Shard], T], shards: Iterable[Shard]) -> list[T]:
+        """Run ``fn(shard)`` on the given shards in parallel, in order."""
+        futures = [
+            self._fan_out.submit(contextvars.copy_context().run, fn, shard)
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+
+    def start_writers(self) -> None:
+        for shard in self.shards.values():
+            shard.start_writer()
+
+    def close(self) -> None:
+        self._fan_out.shutdown(wait=True)
+        for shard in self.shards.values():
+            shard.close()
+
+
+_ROUTER: Optional[ShardRouter] = None
+
+
+def enable_sharding(pool_size: int = DEFAULT_POOL_SIZE) -> Optional[ShardRouter]:
+    """Route to the shards of the configured database, if it has been split."""
+    global _ROUTER
+    disable_sharding()
+    base_dir = Path(get_pool().path).parent
+    with connection() as conn:
+        _ROUTER = ShardRouter.open(conn, base_dir, pool_size)
+    return _ROUTER
+
+
+def disable_sharding() -> None:
+    global _ROUTER
+    if _ROUTER is not None:
+        _ROUTER.close()
+        _ROUTER = None
+
+
+def get_router() -> Optional[ShardRouter]:
+    return _ROUTER
@@ -0,0 +1,199 @@
+import contextvars
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional, TypeVar
+
+from db.connector import connection, get_connection
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_SIZE = 128
+
+WriteFn = Callable[..., T]
+CommitHook = Optional[Callable[[T], None]]
+
+_STOP = object()
+
+
+class _Command:
+    __slots__ = ("fn", "args", "on_commit", "future", "context")
+
+    def __init__(self, fn: WriteFn, args: tuple, on_commit: CommitHook):
+        self.fn = fn
+        self.args = args
+        self.on_commit = on_commit
+        self.future: Future = Future()
+        # Run in the submitter's context so per-call metrics follow the write
+        self.context = contextvars.copy_context()
+
+
+class WriteQueue:
+    """A single writer thread that owns the only write connection.
+
+    Commands are ``fn(conn, *args)`` callables. The writer drains whatever is
+    queued (up to ``batch_size``), runs the batch inside one ``BEGIN
+    IMMEDIATE`` transaction with a savepoint per command, and commits once, so
+    many bookings share a single fsync. A command that raises only rolls back
+    its own savepoint; its caller gets the exception and the rest of the batch
+    still commits.
+    """
+
+    def __init__(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, path: Optional[str] = None
+    ):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.batch_size = batch_size
+        # Writes to the configured database unless given another file (a shard)
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._batches = 0
+        self._commands = 0
+        self._max_batch = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("Writer is already running")
+        self._conn = get_connection(self.path)
+        self._thread = threading.Thread(
+            target=self._run, name="hms-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._conn.close()
+        self._conn = None
+
+    def submit(self, fn: WriteFn, *args, on_commit: CommitHook = None) -> Future:
+        if self._thread is None:
+            raise RuntimeError("Writer is not running")
+        command = _Command(fn, args, on_commit)
+        self._queue.put(command)
+        return command.future
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch: list[_Command]) -> None:
+        conn = self._conn
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for command in batch:
+                conn.execute("SAVEPOINT command")
+                try:
+                    result = command.context.run(command.fn, conn, *command.args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO command")
+                    outcomes.append((command, None, e))
+                else:
+                    outcomes.append((command, result, None))
+                conn.execute("RELEASE command")
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for command in batch:
+                command.future.set_exception(e)
+            return
+
+        self._batches += 1
+        self._commands += len(batch)
+        self._max_batch = max(self._max_batch, len(batch))
+        for command, result, error in outcomes:
+            if error is not None:
+                command.future.set_exception(error)
+                continue
+            if command.on_commit is not None:
+                try:
+                    command.on_commit(result)
+                except Exception:
+                    # The write is already durable; a failing hook must not
+                    # take the writer thread down or fail the caller
+                    pass
+            command.future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "commands": self._commands,
+            "max_batch": self._max_batch,
+            "avg_batch": self._commands / self._batches if self._batches else 0.0,
+        }
+
+
+_WRITER: Optional[WriteQueue] = None
+
+
+def start_writer(batch_size: int = DEFAULT_BATCH_SIZE) -> WriteQueue:
+    global _WRITER
+    stop_writer()
+    _WRITER = WriteQueue(batch_size)
+    _WRITER.start()
+    return _WRITER
+
+
+def stop_writer() -> None:
+    global _WRITER
+    if _WRITER is not None:
+        _WRITER.stop()
+        _WRITER = None
+
+
+def get_writer() -> Optional[WriteQueue]:
+    return _WRITER
+
+
+def run_write_transaction(fn: WriteFn, *args, on_commit: CommitHook = None) -> T:
+    """Run ``fn(conn, *args)`` atomically and return its result.
+
+    Goes through the writer thread when it is running; otherwise runs directly
+    on a pooled connection under ``BEGIN IMMEDIATE``, so the check-and-write
+    in ``fn`` can never interleave with another writer.
+    """
+    if _WRITER is not None:
+        return _WRITER.submit(fn, *args, on_commit=on_commit).result()
+
+    with connection() as conn:
+        result = execute_transaction(conn, fn, *args)
+    if on_commit is not None:
+        on_commit(result)
+    return result
+
+
+def execute_transaction(conn: sqlite3.Connection, fn: WriteFn, *args) -> T:
+    """Run ``fn(conn, *args)`` inside ``BEGIN IMMEDIATE`` and commit it."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn(conn, *args)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return result
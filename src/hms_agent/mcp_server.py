@@ -1,69 +1,212 @@
+import functools
+import hashlib
+import importlib.metadata
+import os
+
+import pydantic_core
 from fastmcp import FastMCP
+from mcp.types import TextContent
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 from db.models import (
     HotelsInput,
+    HotelRoomsInput,
     SearchRoomsInput,
+    SearchLocationRoomsInput,
     CreateBookingInput,
+    GroupBookingInput,
+    BookStayInput,
     CancelBookingInput,
     CustomerSearchInput,
     CustomerCreateInput,
+    HotelOccupancyInput,
+    LocationRevenueInput,
 )
-from db.connector import set_db_path
+from db.connector import connection, set_db_path
+from db.migrations import apply_migrations
+from db.occupancy import enable_occupancy
+from db.shards import enable_sharding
+from db.writer import start_writer
+from db.executor import configure_executor, run_read, run_write
+from db.metrics import enable_metrics, instrument, metrics_enabled, render_metrics
+from db.pagination import MAX_PAGE_SIZE
 
-from tools.locations import get_locations
-from tools.hotels import get_hotels
-from tools.rooms import get_available_rooms
-from tools.bookings import create_booking, cancel_booking
-from tools.customers import get_customer, create_customer
+from tools.repository import open_repository
 from pathlib import Path
 
+try:
+    from fastmcp.tools import ToolResult
+except ImportError:  # fastmcp 2.x
+    from fastmcp.tools.tool import ToolResult
+
+try:
+    import orjson
+
+    JSON_ENCODER = "orjson"
+
+    def dump_json(payload) -> str:
+        return orjson.dumps(payload).decode()
+
+except ImportError:  # orjson is optional; pydantic-core's encoder is the fallback
+    JSON_ENCODER = "pydantic-core"
+
+    def dump_json(payload) -> str:
+        return pydantic_core.to_json(payload).decode()
+
+
 # Get the path relative to main.py
 BASE_DIR = Path(__file__).resolve().parent  # src/hms_agent
-DB_PATH = (
-    BASE_DIR.parent.parent / "bookings.db"
-)  # goes two folder up from hms_agent to the root of repo
+DB_PATH = Path(
+    os.environ.get("HMS_DB_PATH", BASE_DIR.parent.parent / "bookings.db")
+)  # defaults to two folders up from hms_agent, the root of the repo
+
+# Concurrency limits for the read and write lanes that run the blocking
+# SQLite calls off the event loop. Write-lane threads only hand commands to
+# the single writer and wait, so more of them means bigger group commits.
+READ_CONCURRENCY = int(os.environ.get("HMS_READ_CONCURRENCY", 8))
+WRITE_CONCURRENCY = int(os.environ.get("HMS_WRITE_CONCURRENCY", 8))
+
+# Per-tool latency and SQL counters served on /metrics. Enabled before the
+# pool opens any connection so every connection gets the statement hook.
+if os.environ.get("HMS_METRICS") == "1":
+    enable_metrics()
+
+# Set database path before creating the server; the pool gets one connection
+# per worker so lanes never wait on each other for a connection
+set_db_path(DB_PATH, pool_size=READ_CONCURRENCY + WRITE_CONCURRENCY)
+configure_executor(READ_CONCURRENCY, WRITE_CONCURRENCY)
+
+# Bring existing databases up to the current schema (indexes etc.)
+with connection() as conn:
+    apply_migrations(conn)
+
+# Rooms and bookings live in per-location shard files once the database has
+# been split with scripts/shard_db.py
+router = enable_sharding(pool_size=READ_CONCURRENCY + WRITE_CONCURRENCY)
 
-# Set database path before creating the server
-set_db_path(DB_PATH)
+# Optionally answer availability searches from the in-memory occupancy bitmap
+if os.environ.get("HMS_OCCUPANCY_ENGINE") == "1":
+    if router is not None:
+        raise RuntimeError("The occupancy engine does not support a sharded database")
+    enable_occupancy()
 
-mcp = FastMCP("HMS MCP Server")
+# Storage behind the tools: "sqlite" (default) or "memory", a snapshot of the
+# database held in Python structures whose writes are never persisted
+BACKEND = os.environ.get("HMS_BACKEND", "sqlite")
+if BACKEND == "memory" and router is not None:
+    raise RuntimeError("The memory backend does not support a sharded database")
+repository = open_repository(BACKEND)
 
+# All bookings, cancellations and customer entries go through one writer
+# thread per database file that group-commits them
+start_writer()
+if router is not None:
+    router.start_writers()
 
-@mcp.tool()
-def search_hotels(location_id: int | None = None):
+
+def _server_version() -> str:
+    """Package version plus a digest of this file, where every tool is declared.
+
+    Clients cache tool schemas by server version, so any change to a tool
+    signature or description must change it.
+    """
+    try:
+        version = importlib.metadata.version("hms_agent")
+    except importlib.metadata.PackageNotFoundError:
+        version = "0.1.0"
+    digest = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+    return f"{version}+{digest}"
+
+
+mcp = FastMCP("HMS MCP Server", version=_server_version())
+
+
+def json_result(fn):
+    """Encode a tool's dict result once with the fast JSON encoder.
+
+    FastMCP would otherwise serialize the dict twice and walk it again for
+    the structured content. Tool results are plain JSON types read from our
+    own database, so the structured content is attached as is.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        payload = await fn(*args, **kwargs)
+        result = ToolResult(content=[TextContent(type="text", text=dump_json(payload))])
+        result.structured_content = payload
+        return result
+
+    return wrapper
+
+
+def tool(fn):
+    """Register ``fn`` as an MCP tool with metrics and fast JSON encoding."""
+    return mcp.tool()(json_result(instrument(fn)))
+
+
+@tool
+async def search_hotels(
+    location_id: int | None = None, limit: int = 20, cursor: str | None = None
+):
     """
     Explore and list all available hotels.
     Use `location_id` to narrow down results to a specific city.
-    Returns a list of hotels including their IDs and names.
+    Returns a page of hotels including their IDs and names (at most `limit`, max 100).
+    If `next_cursor` is set, pass it as `cursor` to get more hotels.
     Important: Always show the user the hotel names, but use IDs for subsequent bookings.
     """
     try:
-        data = HotelsInput(location_id=location_id)
-        hotels = get_hotels(data)
-        return {"hotels": [hotel.model_dump() for hotel in hotels]}
+        # Oversized pages are clamped rather than rejected, so an agent asking
+        # for "everything" still gets a bounded page and a next_cursor
+        data = HotelsInput(
+            location_id=location_id, limit=min(limit, MAX_PAGE_SIZE), cursor=cursor
+        )
+        hotels, next_cursor = await run_read(repository.find_hotels, data)
+        return {"hotels": hotels, "next_cursor": next_cursor}
     except Exception as e:
         return {"error": str(e), "hotels": []}
 
 
-@mcp.tool()
-def search_locations():
+@tool
+async def search_locations():
     """
     Find and list available geographic locations (cities/countries) where we have hotels.
     Each location has a unique ID which is required by the `search_hotels` tool.
     """
     try:
-        locations = get_locations()
-        return {"locations": [location.model_dump() for location in locations]}
+        locations = await run_read(repository.list_locations)
+        return {"locations": locations}
     except Exception as e:
         return {"error": str(e), "locations": []}
 
 
-@mcp.tool()
-def search_rooms(
-    hotel_id: int, check_in_date: str, check_out_date: str, min_capacity: int
+@tool
+async def list_hotel_rooms(hotel_id: int):
+    """
+    List every room of a hotel with its type, capacity and nightly price, regardless of dates.
+    Use this to describe what a hotel offers; use `search_rooms` to check availability.
+    """
+    try:
+        data = HotelRoomsInput(hotel_id=hotel_id)
+        rooms = await run_read(repository.find_hotel_rooms, data)
+        return {"rooms": rooms}
+    except Exception as e:
+        return {"error": str(e), "rooms": []}
+
+
+@tool
+async def search_rooms(
+    hotel_id: int,
+    check_in_date: str,
+    check_out_date: str,
+    min_capacity: int,
+    limit: int = 20,
+    cursor: str | None = None,
 ):
     """
     Search for available rooms in a specific hotel for a given date range and capacity.
-    Returns a list of rooms with their ID, type, and nightly price.
+    Returns a page of rooms (smallest first, at most `limit`, max 100) with their ID, type, and nightly price.
+    If `next_cursor` is set, pass it as `cursor` to get more rooms.
     Note: Always confirm the room type and price with the user before booking.
     Dates must be in YYYY-MM-DD format.
     """
@@ -73,15 +216,51 @@ def search_rooms(
             check_in_date=check_in_date,
             check_out_date=check_out_date,
             min_capacity=min_capacity,
+            limit=min(limit, MAX_PAGE_SIZE),
+            cursor=cursor,
         )
-        rooms = get_available_rooms(data)
-        return {"rooms": [room.model_dump() for room in rooms]}
+        rooms, next_cursor = await run_read(repository.find_available_rooms, data)
+        return {"rooms": rooms, "next_cursor": next_cursor}
     except Exception as e:
         return {"error": str(e), "rooms": []}
 
 
-@mcp.tool()
-def create_reservation(
+@tool
+async def search_rooms_by_location(
+    check_in_date: str,
+    check_out_date: str,
+    min_capacity: int,
+    location_id: int | None = None,
+    hotel_ids: list[int] | None = None,
+    sort_by: str = "price_asc",
+    rooms_per_hotel: int = 5,
+    max_results: int = 50,
+):
+    """
+    Search available rooms across every hotel of a location (or a list of hotel IDs) in one call.
+    Provide either `location_id` or `hotel_ids`, plus dates (YYYY-MM-DD) and `min_capacity`.
+    Results are grouped by hotel and sorted by nightly price (`price_asc` or `price_desc`).
+    Use this instead of calling `search_rooms` once per hotel.
+    """
+    try:
+        data = SearchLocationRoomsInput(
+            location_id=location_id,
+            hotel_ids=hotel_ids,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            min_capacity=min_capacity,
+            sort_by=sort_by,
+            rooms_per_hotel=rooms_per_hotel,
+            max_results=max_results,
+        )
+        hotels = await run_read(repository.find_available_rooms_by_hotel, data)
+        return {"hotels": hotels}
+    except Exception as e:
+        return {"error": str(e), "hotels": []}
+
+
+@tool
+async def create_reservation(
     customer_id: int, room_id: int, check_in_date: str, check_out_date: str
 ):
     """
@@ -96,7 +275,7 @@ def create_reservation(
             check_in_date=check_in_date,
             check_out_date=check_out_date,
         )
-        result = create_booking(data)
+        result = await run_write(repository.create_booking, data)
         return result.model_dump()
     except ValueError as e:
         return {"error": str(e)}
@@ -104,12 +283,72 @@ def create_reservation(
         return {"error": f"Failed to create booking: {str(e)}"}
 
 
-@mcp.tool()
-def cancel_reservation(booking_id: int):
+@tool
+async def create_group_reservation(
+    customer_id: int, room_ids: list[int], check_in_date: str, check_out_date: str
+):
+    """
+    Book several rooms for one customer and the same dates (YYYY-MM-DD) at once, e.g. for a family or group.
+    All rooms are booked or, if any of them is taken, none are; the error names the taken rooms.
+    Requires a valid customer ID and room IDs from `search_rooms` (at most 50, all in one location).
+    On success, returns the confirm status and one booking ID per room.
+    """
+    try:
+        data = GroupBookingInput(
+            customer_id=customer_id,
+            room_ids=room_ids,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+        )
+        result = await run_write(repository.create_group_booking, data)
+        return result.model_dump()
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Failed to create group booking: {str(e)}"}
+
+
+@tool
+async def book_stay(
+    hotel_id: int,
+    check_in_date: str,
+    check_out_date: str,
+    name: str,
+    phone_number: str,
+    min_capacity: int = 1,
+    room_type: str | None = None,
+):
+    """
+    Book a stay for a guest in one step: finds the guest's profile by phone number (or creates it),
+    picks the smallest free room of the hotel that fits `min_capacity` guests (cheapest first,
+    optionally of `room_type`) and books it. Dates must be in YYYY-MM-DD format.
+    Returns the booking ID, the customer ID and the booked room with its type and nightly price.
+    Use this instead of `search_customers`, `create_customer_entry` and `create_reservation`.
+    """
+    try:
+        data = BookStayInput(
+            hotel_id=hotel_id,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            min_capacity=min_capacity,
+            room_type=room_type,
+            name=name,
+            phone_number=phone_number,
+        )
+        result = await run_write(repository.book_stay, data)
+        return result.model_dump()
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Failed to book stay: {str(e)}"}
+
+
+@tool
+async def cancel_reservation(booking_id: int):
     """Cancel an existing reservation using the booking ID."""
     try:
         data = CancelBookingInput(booking_id=booking_id)
-        cancel_booking(data)
+        await run_write(repository.cancel_booking, data)
         return {"status": "cancelled", "booking_id": booking_id}
     except ValueError as e:
         return {"error": str(e)}
@@ -117,23 +356,35 @@ def cancel_reservation(booking_id: int):
         return {"error": f"Failed to cancel booking: {str(e)}"}
 
 
-@mcp.tool()
-def search_customers(name: str | None = None, phone_number: str | None = None):
+@tool
+async def search_customers(
+    name: str | None = None,
+    phone_number: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+):
     """
     Lookup existing customers by name or phone number.
+    Name matches may be partial and are ranked best-first; phone formatting is ignored.
+    Returns at most `limit` customers (max 100); pass `next_cursor` back as `cursor` for more.
     Privacy Rule: Use this to confirm identity before booking, but never reveal existing details to the user.
     If no customer is found, use `create_customer_entry` to register the guest.
     """
     try:
-        data = CustomerSearchInput(name=name, phone_number=phone_number)
-        customers = get_customer(data)
-        return {"customers": [customer.model_dump() for customer in customers]}
+        data = CustomerSearchInput(
+            name=name,
+            phone_number=phone_number,
+            limit=min(limit, MAX_PAGE_SIZE),
+            cursor=cursor,
+        )
+        customers, next_cursor = await run_read(repository.find_customers, data)
+        return {"customers": customers, "next_cursor": next_cursor}
     except Exception as e:
         return {"error": str(e), "customers": []}
 
 
-@mcp.tool()
-def create_customer_entry(name: str, phone_number: str):
+@tool
+async def create_customer_entry(name: str, phone_number: str):
     """
     Register a new customer profile in the database.
     Should be called if `search_customers` returns no results for a new guest.
@@ -141,11 +392,63 @@ def create_customer_entry(name: str, phone_number: str):
     """
     try:
         data = CustomerCreateInput(name=name, phone_number=phone_number)
-        result = create_customer(data)
+        result = await run_write(repository.create_customer, data)
         return result.model_dump()
+    except ValueError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to create customer: {str(e)}"}
 
 
+@tool
+async def hotel_occupancy_report(hotel_id: int, start_date: str, end_date: str):
+    """
+    Report how full a hotel is and what it earns, day by day, for hotel staff.
+    Covers the nights from `start_date` up to, not including, `end_date` (YYYY-MM-DD, at most 366 days).
+    Returns the hotel's room count, the rooms booked, occupancy rate (0 to 1) and revenue
+    (in the unit of nightly prices) for every day, and the totals for the period.
+    """
+    try:
+        data = HotelOccupancyInput(
+            hotel_id=hotel_id, start_date=start_date, end_date=end_date
+        )
+        return await run_read(repository.find_hotel_occupancy, data)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@tool
+async def location_revenue_report(
+    start_date: str, end_date: str, location_id: int | None = None
+):
+    """
+    Report room nights sold, occupancy rate (0 to 1) and revenue per location, for hotel staff.
+    Covers the nights from `start_date` up to, not including, `end_date` (YYYY-MM-DD, at most 366 days).
+    Use `location_id` for one location; by default every location is reported.
+    """
+    try:
+        data = LocationRevenueInput(
+            location_id=location_id, start_date=start_date, end_date=end_date
+        )
+        locations = await run_read(repository.find_location_revenue, data)
+        return {
+            "start_date": data.start_date,
+            "end_date": data.end_date,
+            "locations": locations,
+        }
+    except Exception as e:
+        return {"error": str(e), "locations": []}
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint; 404 unless HMS_METRICS=1."""
+    if not metrics_enabled():
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Create the HTTP app - the endpoint will be at /mcp
 app = mcp.http_app()
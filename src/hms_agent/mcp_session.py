@@ -0,0 +1,101 @@
+import hashlib
+import importlib.metadata
+import json
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from llama_index.tools.mcp import BasicMCPClient
+from mcp import ClientSession, types
+
+# Tool schemas fetched from a server, one JSON file per server name and version
+TOOL_CACHE_DIR = Path(
+    os.environ.get("HMS_AGENT_CACHE_DIR", Path.home() / ".cache" / "hms_agent")
+)
+
+
+def _server_identity(session: ClientSession) -> Optional[tuple[str, str]]:
+    # The handshake's serverInfo; older SDKs do not keep it on the session
+    info = getattr(session, "server_info", None) or getattr(
+        session, "_server_info", None
+    )
+    if info is None or not getattr(info, "version", None):
+        return None
+    return info.name, str(info.version)
+
+
+class PersistentMCPClient(BasicMCPClient):
+    """BasicMCPClient that keeps one MCP session open between calls.
+
+    BasicMCPClient opens, initializes and closes a session for every call.
+    After ``connect()`` all calls share one session, and ``list_tools``
+    answers from a schema cache on disk for as long as the server reports
+    the same name and version. Without ``connect()`` it behaves like
+    BasicMCPClient. ``connect()`` and ``aclose()`` must run in the same task.
+    """
+
+    def __init__(self, *args, cache_dir: Optional[Path] = TOOL_CACHE_DIR, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_dir = cache_dir
+        self.server: Optional[tuple[str, str]] = None
+        self.tools_from_cache = False
+        self._stack: Optional[AsyncExitStack] = None
+        self._session: Optional[ClientSession] = None
+
+    async def connect(self) -> None:
+        if self._session is not None:
+            return
+        stack = AsyncExitStack()
+        try:
+            self._session = await stack.enter_async_context(super()._run_session())
+        except BaseException:
+            await stack.aclose()
+            raise
+        self._stack = stack
+        self.server = _server_identity(self._session)
+
+    async def aclose(self) -> None:
+        if self._stack is not None:
+            stack, self._stack, self._session = self._stack, None, None
+            await stack.aclose()
+
+    @asynccontextmanager
+    async def _run_session(self) -> AsyncIterator[ClientSession]:
+        if self._session is not None:
+            yield self._session
+        else:
+            async with super()._run_session() as session:
+                yield session
+
+    def _cache_path(self) -> Optional[Path]:
+        if self.cache_dir is None or self.server is None:
+            return None
+        # The SDK version is part of the key because it defines the Tool model
+        key = json.dumps(
+            [self.command_or_url, *self.server, importlib.metadata.version("mcp")]
+        )
+        return (
+            self.cache_dir
+            / f"tools-{hashlib.sha256(key.encode()).hexdigest()[:16]}.json"
+        )
+
+    async def list_tools(self) -> types.ListToolsResult:
+        path = self._cache_path()
+        if path is not None and path.exists():
+            try:
+                result = types.ListToolsResult.model_validate_json(path.read_text())
+                self.tools_from_cache = True
+                return result
+            except ValueError:
+                pass  # written by another SDK version or truncated; refetch
+
+        result = await super().list_tools()
+        self.tools_from_cache = False
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent agents never read half a file
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(result.model_dump_json(by_alias=True))
+            os.replace(tmp, path)
+        return result
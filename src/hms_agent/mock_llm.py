@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import Any, Optional, Sequence
+
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+    MessageRole,
+)
+from llama_index.core.llms.function_calling import FunctionCallingLLM
+from llama_index.core.llms.llm import ToolSelection
+from llama_index.core.tools.types import BaseTool
+from pydantic import Field
+
+
+class MockLLM(FunctionCallingLLM):
+    """Stand-in for Ollama that answers after a fixed delay without tool calls.
+
+    The reply echoes the last user message and counts the user turns it was
+    shown, so a test can tell whether a conversation kept its history; streamed
+    replies arrive word by word once the delay has passed. Used to load-test
+    the conversation service without a model.
+    """
+
+    latency: float = Field(default=0.05, description="Seconds per reply.")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MockLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="mock", is_function_calling_model=True)
+
+    def _reply(self, messages: Sequence[ChatMessage]) -> ChatResponse:
+        user_turns = [m for m in messages if m.role == MessageRole.USER]
+        last = user_turns[-1].content if user_turns else ""
+        text = f"[{len(user_turns)}] {last}"
+        return ChatResponse(
+            message=ChatMessage(role=MessageRole.ASSISTANT, content=text), delta=text
+        )
+
+    def _prepare_chat_with_tools(
+        self,
+        tools: Sequence[BaseTool],
+        user_msg: Optional[str | ChatMessage] = None,
+        chat_history: Optional[list[ChatMessage]] = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        messages = list(chat_history or [])
+        if isinstance(user_msg, str):
+            user_msg = ChatMessage(role=MessageRole.USER, content=user_msg)
+        if user_msg is not None:
+            messages.append(user_msg)
+        return {"messages": messages}
+
+    def get_tool_calls_from_response(
+        self, response: ChatResponse, error_on_no_tool_call: bool = True, **kwargs
+    ) -> list[ToolSelection]:
+        return []
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    def stream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseGen:
+        yield self.chat(messages)
+
+    async def achat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponse:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+    async def astream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseAsyncGen:
+        async def gen() -> ChatResponseAsyncGen:
+            # The whole delay comes before the first word, like prompt evaluation
+            text = (await self.achat(messages)).message.content
+            content = ""
+            for word in text.split(" "):
+                delta = f" {word}" if content else word
+                content += delta
+                yield ChatResponse(
+                    message=ChatMessage(role=MessageRole.ASSISTANT, content=content),
+                    delta=delta,
+                )
+                await asyncio.sleep(0)
+
+        return gen()
+
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        time.sleep(self.latency)
+        return CompletionResponse(text=prompt)
+
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseGen:
+        yield self.complete(prompt)
+
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        await asyncio.sleep(self.latency)
+        return CompletionResponse(text=prompt)
+
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseAsyncGen:
+        async def gen() -> CompletionResponseAsyncGen:
+            yield await self.acomplete(prompt)
+
+        return gen()
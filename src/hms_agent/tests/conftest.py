@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from db import connector, occupancy, shards, writer
+from db.cache import reference_cache
+from db.migrations import apply_migrations
+from db_utils import Base
+
+
+def _seed(path):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO locations (id, city, country) VALUES (?, ?, ?)",
+        [(1, "Paris", "France"), (2, "London", "UK")],
+    )
+    conn.executemany(
+        "INSERT INTO hotels (id, name, location_id) VALUES (?, ?, ?)",
+        [(1, "Hotel Lumiere", 1), (2, "Rive Gauche", 1), (3, "Thames View", 2)],
+    )
+    rooms = []
+    room_id = 1
+    for hotel_id in (1, 2, 3):
+        for number, (room_type, capacity, price) in enumerate(
+            [("Single", 1, 9000), ("Double", 2, 15000), ("Suite", 4, 32000)] * 2,
+            start=1,
+        ):
+            rooms.append(
+                (room_id, hotel_id, str(number), room_type, price + number, capacity)
+            )
+            room_id += 1
+    conn.executemany(
+        """
+        INSERT INTO rooms (id, hotel_id, room_number, room_type, price_per_night, capacity)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rooms,
+    )
+    conn.executemany(
+        "INSERT INTO customers (id, name, phone_number) VALUES (?, ?, ?)",
+        [(1, "Alice Smith", "555-0123"), (2, "Bob Jones", "(555) 987-6543")],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _create_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    _seed(path)
+
+
+@pytest.fixture
+def base_db_path(tmp_path):
+    """A seeded database with only the base tables, before any migration."""
+    path = tmp_path / "bookings.db"
+    _create_database(path)
+    connector.set_db_path(path)
+    yield path
+    connector.get_pool().close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A small seeded, fully migrated database wired into ``db.connector``."""
+    path = tmp_path / "bookings.db"
+    _create_database(path)
+    connector.set_db_path(path)
+    with connector.connection() as conn:
+        apply_migrations(conn)
+    yield path
+    writer.stop_writer()
+    shards.disable_sharding()
+    reference_cache.clear()
+    occupancy.disable_occupancy()
+    connector.get_pool().close()
@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+import db.cache
+from db.cache import ReferenceCache
+from db.connector import connection
+from db.models import HotelRoomsInput, HotelsInput
+from tools.hotels import get_cached_hotels
+from tools.locations import get_cached_locations
+from tools.rooms import get_cached_hotel_rooms
+
+
+@pytest.fixture
+def cache(db_path):
+    return ReferenceCache()
+
+
+def _loader(calls, value):
+    def load():
+        calls.append(1)
+        return value
+
+    return load
+
+
+def test_hits_until_catalogue_changes(cache):
+    calls = []
+    assert cache.get("key", _loader(calls, [1])) == [1]
+    assert cache.get("key", _loader(calls, [2])) == [1]
+    assert len(calls) == 1
+
+    with connection() as conn:
+        conn.execute("UPDATE hotels SET name = 'Hotel Soleil' WHERE id = 1")
+        conn.commit()
+    cache.invalidate()
+
+    assert cache.get("key", _loader(calls, [3])) == [3]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+
+
+def test_hits_do_not_query_the_database(cache, monkeypatch):
+    calls = []
+    cache.get("key", _loader(calls, [1]))
+
+    def no_query():
+        raise AssertionError("catalog_version was read")
+
+    monkeypatch.setattr(db.cache, "catalog_version", no_query)
+    assert cache.get("key", _loader(calls, [2])) == [1]
+
+
+def test_sees_other_processes_edits_after_the_interval(db_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(db.cache.time, "monotonic", lambda: now[0])
+    cache = ReferenceCache(check_interval=1.0)
+    calls = []
+    cache.get("key", _loader(calls, [1]))
+
+    # As a script would, without telling this process
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE hotels SET name = 'Hotel Soleil' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    now[0] += 0.5
+    assert cache.get("key", _loader(calls, [2])) == [1]
+    now[0] += 0.5
+    assert cache.get("key", _loader(calls, [3])) == [3]
+
+
+def test_bookings_do_not_invalidate(cache):
+    calls = []
+    cache.get("key", _loader(calls, "value"))
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 1, '2026-06-01', '2026-06-02', 'confirmed')
+            """
+        )
+        conn.commit()
+    cache.get("key", _loader(calls, "value"))
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("table", ["locations", "hotels", "rooms"])
+def test_every_reference_table_bumps_the_version(cache, table):
+    with connection() as conn:
+        before = conn.execute("SELECT version FROM catalog_version").fetchone()[0]
+        conn.execute(f"DELETE FROM {table} WHERE id = 1")
+        conn.commit()
+        after = conn.execute("SELECT version FROM catalog_version").fetchone()[0]
+    assert after == before + 1
+
+
+def test_cached_tools_return_serialized_payloads(cache):
+    assert get_cached_locations() == [
+        {"id": 1, "city": "Paris", "country": "France"},
+        {"id": 2, "city": "London", "country": "UK"},
+    ]
+    hotels = get_cached_hotels(HotelsInput(location_id=1))
+    assert hotels == (
+        [{"id": 1, "name": "Hotel Lumiere"}, {"id": 2, "name": "Rive Gauche"}],
+        None,
+    )
+    assert get_cached_hotels(HotelsInput(location_id=1)) is hotels
+    rooms = get_cached_hotel_rooms(HotelRoomsInput(hotel_id=3))
+    assert [room["id"] for room in rooms] == list(range(13, 19))
@@ -0,0 +1,120 @@
+import json
+import re
+
+from llama_index.core.base.llms.types import ChatMessage, MessageRole
+from mcp import types
+
+from compaction import ContextCompactor, compact_tool_text, tool_result_text
+
+
+def _tokens(text):
+    """About four characters per token, without loading a real tokenizer."""
+    return text[::4]
+
+
+def _turn(i: int, tool: str = "search_hotels") -> list[ChatMessage]:
+    rows = [
+        {
+            "id": 100 * i + r,
+            "room_number": str(r),
+            "room_type": "Double",
+            "price_per_night": 8000,
+            "capacity": 2,
+            "phone_number": "555-0000000",
+        }
+        for r in range(10)
+    ]
+    return [
+        ChatMessage(role=MessageRole.USER, content=f"Options in city {i}, please"),
+        ChatMessage(
+            role=MessageRole.ASSISTANT,
+            content="",
+            additional_kwargs={
+                "tool_calls": [
+                    {"function": {"name": tool, "arguments": {"location_id": i}}}
+                ]
+            },
+        ),
+        ChatMessage(
+            role=MessageRole.TOOL,
+            content=json.dumps({"results": rows, "next_cursor": "abc"}),
+        ),
+        ChatMessage(role=MessageRole.ASSISTANT, content=f"City {i} has 10 options."),
+    ]
+
+
+def test_tool_results_reach_the_llm_as_json():
+    result = types.CallToolResult(
+        content=[types.TextContent(type="text", text='{"hotels": []}')],
+        structuredContent={"hotels": [{"id": 1, "name": "Ritz"}]},
+    )
+    assert tool_result_text(result) == '{"hotels":[{"id":1,"name":"Ritz"}]}'
+    assert (
+        compact_tool_text('{"customers": [{"id": 4, "phone_number": "555"}]}')
+        == '{"customers":[4]}'
+    )
+
+
+def test_history_within_budget_is_untouched():
+    compactor = ContextCompactor(token_budget=10_000, tokenizer=_tokens)
+    messages = _turn(1) + _turn(2) + _turn(3)
+    assert compactor.compact(messages) is messages
+    assert compactor.stats()["compactions"] == 0
+
+
+def test_old_turns_are_summarized_keeping_every_id():
+    compactor = ContextCompactor(token_budget=600, keep_turns=2, tokenizer=_tokens)
+    messages = [m for i in range(1, 7) for m in _turn(i)]
+    compacted = compactor.compact(messages)
+
+    summary, recent = compacted[0], compacted[1:]
+    assert summary.role == MessageRole.SYSTEM
+    assert recent == messages[-8:]
+    ids = {int(n) for n in re.findall(r"\b\d{3}\b", summary.content)}
+    assert ids >= {100 * i + r for i in range(1, 5) for r in range(10)}
+    assert "search_hotels returned" in summary.content
+    assert "555-0000000" not in summary.content and "next_cursor" not in summary.content
+    assert compactor.last_saved > 0
+    assert compactor.count(compacted) < compactor.count(messages)
+
+    # The next compaction folds the summary in rather than stacking another
+    again = compactor.compact(compacted + _turn(7) + _turn(8))
+    assert sum(m.role == MessageRole.SYSTEM for m in again) == 1
+    assert re.search(r"\b100\b", again[0].content)
+    assert re.search(r"\b509\b", again[0].content)
+    assert compactor.stats()["compactions"] == 2
+
+
+def test_only_availability_results_are_dropped_to_fit():
+    compactor = ContextCompactor(token_budget=400, keep_turns=1, tokenizer=_tokens)
+    messages = _turn(1, "search_customers") + [
+        m for i in range(2, 12) for m in _turn(i, "search_rooms")
+    ]
+    summary = compactor.compact(messages)[0].content
+    assert "search_customers returned" in summary and re.search(r"\b100\b", summary)
+    assert summary.count("search_rooms returned") < 9
+
+
+def test_guest_lines_in_a_summary_stay_chat():
+    rooms = json.dumps({"rooms": [{"id": 700 + r} for r in range(10)]})
+    summary = ChatMessage(
+        role=MessageRole.SYSTEM,
+        content="\n".join(
+            [
+                "Summary of the earlier conversation.",
+                f"search_rooms returned {compact_tool_text(rooms)}",
+                "Guest: I returned the key " + "at the front desk " * 5,
+            ]
+        ),
+        additional_kwargs={"compaction_summary": True},
+    )
+    messages = [summary, *_turn(1), *_turn(2)]
+    recent = ContextCompactor(tokenizer=_tokens).count(messages[-4:])
+    compactor = ContextCompactor(
+        token_budget=recent + 80, keep_turns=1, tokenizer=_tokens
+    )
+
+    # Chat goes before availability, however the guest phrased it
+    content = compactor.compact(messages)[0].content
+    assert "I returned the key" not in content
+    assert "search_rooms returned" in content
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from db.connector import ConnectionPool, connection, pool_stats
+
+
+def test_connections_are_configured_once(base_db_path):
+    with connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        # synchronous=NORMAL is reported as 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        first = conn
+
+    with connection() as conn:
+        assert conn is first
+
+    stats = pool_stats()
+    assert stats["size"] == 1
+    assert stats["idle"] == 1
+    assert stats["acquisitions"] == 2
+
+
+def test_open_transaction_is_rolled_back_on_release(base_db_path):
+    with pytest.raises(RuntimeError):
+        with connection() as conn:
+            conn.execute("DELETE FROM customers")
+            raise RuntimeError("boom")
+
+    with connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == 2
+
+
+def test_pool_is_bounded_and_records_waits(base_db_path):
+    pool = ConnectionPool(str(base_db_path), max_size=1, timeout=5)
+    held = pool.acquire()
+    acquired = threading.Event()
+
+    def borrow():
+        with pool.connection():
+            acquired.set()
+
+    worker = threading.Thread(target=borrow)
+    worker.start()
+    assert not acquired.wait(0.05)
+    pool.release(held)
+    worker.join()
+
+    assert acquired.is_set()
+    stats = pool.stats()
+    assert stats["size"] == 1
+    assert stats["waits"] == 1
+    assert stats["wait_time_max"] > 0
+    pool.close()
+
+
+def test_pool_times_out_when_exhausted(base_db_path):
+    pool = ConnectionPool(str(base_db_path), max_size=1, timeout=0.01)
+    held = pool.acquire()
+    with pytest.raises(RuntimeError, match="Timed out"):
+        pool.acquire()
+    pool.release(held)
+    pool.close()
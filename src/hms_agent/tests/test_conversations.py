@@ -0,0 +1,91 @@
+import asyncio
+
+from conversations import ConversationService, FairLimiter
+from mock_llm import MockLLM
+
+
+def _service(**kwargs) -> ConversationService:
+    return ConversationService([], agent_llm=MockLLM(latency=0), **kwargs)
+
+
+def test_sessions_keep_separate_histories(tmp_path):
+    async def chat():
+        service = _service(store_dir=tmp_path)
+        replies = [
+            await service.handle("+33600000001", "hello"),
+            await service.handle("+33600000002", "bonjour"),
+            await service.handle("+33600000001", "a room please"),
+        ]
+        return replies, service.stats()
+
+    replies, stats = asyncio.run(chat())
+    assert replies == ["[1] hello", "[1] bonjour", "[2] a room please"]
+    assert stats["conversations"] == 2 and stats["messages"] == 3
+
+
+def test_evicted_conversations_reload_from_disk(tmp_path):
+    async def chat(store_dir):
+        service = _service(max_conversations=1, store_dir=store_dir)
+        await service.handle("a", "first")
+        await service.handle("b", "other")  # evicts a
+        reply = await service.handle("a", "second")
+        await service.aclose()
+        return reply, service.stats()
+
+    reply, stats = asyncio.run(chat(tmp_path))
+    assert reply == "[2] second"
+    assert stats["evictions"] == 2 and stats["reloads"] == 1
+
+    # aclose() persisted both, so a new service resumes them
+    async def resume():
+        return await _service(store_dir=tmp_path).handle("b", "back")
+
+    assert asyncio.run(resume()) == "[2] back"
+
+    # Without a store an evicted conversation starts over
+    reply, _ = asyncio.run(chat(None))
+    assert reply == "[1] second"
+
+
+def test_messages_of_one_session_are_answered_in_order(tmp_path):
+    async def burst():
+        service = ConversationService(
+            [], agent_llm=MockLLM(latency=0.001), store_dir=tmp_path
+        )
+        return await asyncio.gather(*(service.handle("a", f"m{i}") for i in range(5)))
+
+    assert asyncio.run(burst()) == [f"[{i + 1}] m{i}" for i in range(5)]
+
+
+def test_limiter_bounds_holders_and_admits_in_arrival_order():
+    async def run():
+        limiter = FairLimiter(2)
+        admitted, peak = [], 0
+
+        async def worker(i):
+            nonlocal peak
+            async with limiter:
+                admitted.append(i)
+                peak = max(peak, limiter.active)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(worker(i) for i in range(8)))
+        return admitted, peak, limiter.active
+
+    admitted, peak, active = asyncio.run(run())
+    assert admitted == list(range(8))
+    assert peak == 2 and active == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def run():
+        limiter = FairLimiter(1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        return limiter.active, limiter.waiting
+
+    assert asyncio.run(run()) == (0, 0)
@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db.connector import connection
+from db.migrations import apply_migrations
+from db.models import CustomerCreateInput, CustomerSearchInput, normalize_phone
+from db_utils import Customer
+from tools.customers import create_customer, get_customer
+
+
+def _names(**search):
+    return [customer.name for customer in get_customer(CustomerSearchInput(**search))]
+
+
+def test_name_search_is_partial_case_insensitive_and_ranked(db_path):
+    create_customer(CustomerCreateInput(name="John Smithson", phone_number="555-2000"))
+    create_customer(CustomerCreateInput(name="Mary Smith", phone_number="555-2001"))
+
+    assert set(_names(name="smith")) == {"Alice Smith", "John Smithson", "Mary Smith"}
+    # Shorter names match the trigram phrase more densely and rank first
+    assert _names(name="smith")[-1] == "John Smithson"
+    assert _names(name="smith", limit=1) != []
+    assert len(_names(name="smith", limit=2)) == 2
+    assert _names(name="Bo") == ["Bob Jones"]
+    assert _names(name="nobody") == []
+
+
+def test_fts_index_follows_updates_and_deletes(db_path):
+    with connection() as conn:
+        conn.execute("UPDATE customers SET name = 'Alicia Keys' WHERE id = 1")
+        conn.execute("DELETE FROM customers WHERE id = 2")
+        conn.commit()
+    assert _names(name="Alicia") == ["Alicia Keys"]
+    assert _names(name="Smith") == []
+    assert _names(name="Jones") == []
+
+
+@pytest.mark.parametrize("phone", ["5559876543", "555.987.6543", "(555) 987-6543"])
+def test_phone_lookup_ignores_formatting(db_path, phone):
+    assert _names(phone_number=phone) == ["Bob Jones"]
+
+
+def test_normalized_phone_is_unique(db_path):
+    with pytest.raises(ValueError, match="phone number already exists"):
+        create_customer(CustomerCreateInput(name="Bobby", phone_number="555 987 6543"))
+
+
+def test_rows_inserted_without_the_column_are_normalized(db_path):
+    with connection() as conn:
+        conn.execute(
+            "INSERT INTO customers (name, phone_number) VALUES ('Eve', '+1 (555) 111-2222')"
+        )
+        conn.commit()
+    assert _names(phone_number="15551112222") == ["Eve"]
+
+
+@pytest.mark.parametrize(
+    "phone", ["555-0100 ext. 12", "555/0100 x12", "tel 5550100-12"]
+)
+def test_trigger_normalizes_like_the_tools(db_path, phone):
+    with connection() as conn:
+        conn.execute(
+            "INSERT INTO customers (name, phone_number) VALUES ('Eve', ?)", (phone,)
+        )
+        conn.commit()
+    assert _names(phone_number="(555) 010-012") == ["Eve"]
+
+
+def test_trigger_agrees_with_normalize_phone(db_path):
+    phones = ["555-0100 ext. 12", "tel/555", "(555) 010", "no digits", "\u0663\u06635"]
+    # A plain connection, without anything registered by the application
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO customers (name, phone_number) VALUES ('Eve', ?)",
+        [(phone,) for phone in phones],
+    )
+    rows = conn.execute(
+        "SELECT phone_number, phone_normalized FROM customers WHERE name = 'Eve'"
+    ).fetchall()
+    conn.close()
+    assert rows == [(phone, normalize_phone(phone)) for phone in phones]
+
+
+def test_script_inserts_are_found_by_phone(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with Session(engine) as session:
+        session.add(Customer(name="Eve", phone_number="555.0100 ext 12"))
+        session.commit()
+    engine.dispose()
+    assert _names(phone_number="555010012") == ["Eve"]
+
+
+def test_migration_renormalizes_old_trigger_values(base_db_path):
+    conn = sqlite3.connect(base_db_path)
+    apply_migrations(conn, target=7)
+    # The version 4 trigger only stripped common separators
+    conn.execute(
+        "INSERT INTO customers (name, phone_number) VALUES ('Eve', '555-0100 ext. 12')"
+    )
+    conn.commit()
+    apply_migrations(conn)
+    normalized = conn.execute(
+        "SELECT phone_normalized FROM customers WHERE name = 'Eve'"
+    ).fetchone()[0]
+    conn.close()
+    assert normalized == "555010012"
+
+
+def test_backfill_keeps_oldest_duplicate(base_db_path):
+    conn = sqlite3.connect(base_db_path)
+    conn.execute(
+        "INSERT INTO customers (id, name, phone_number) VALUES (3, 'Bob Again', '555-987-6543')"
+    )
+    conn.commit()
+    apply_migrations(conn)
+    rows = conn.execute(
+        "SELECT id, phone_normalized FROM customers ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert rows == [(1, "5550123"), (2, "5559876543"), (3, None)]
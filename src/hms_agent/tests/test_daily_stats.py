@@ -0,0 +1,93 @@
+import sqlite3
+
+from db.connector import connection
+from db.daily_stats import rebuild_daily_stats, verify_daily_stats
+from db.migrations import apply_migrations
+from db.models import day_number
+
+
+def _stats(conn, hotel_id):
+    rows = conn.execute(
+        """
+        SELECT day, rooms_booked, revenue FROM hotel_daily_stats
+        WHERE hotel_id = ? AND rooms_booked != 0
+        ORDER BY day
+        """,
+        (hotel_id,),
+    )
+    return [tuple(row) for row in rows]
+
+
+def _nights(first, *stats):
+    return [(day_number(first) + offset, *row) for offset, row in enumerate(stats)]
+
+
+def test_triggers_follow_every_kind_of_write(db_path):
+    with connection() as conn:
+        # Written without day numbers, like the SQLAlchemy scripts do
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 1, '2026-06-01', '2026-06-03', 'confirmed'),
+                   (1, 2, '2026-06-02', '2026-06-03', 'confirmed'),
+                   (1, 3, '2026-06-01', '2026-06-02', 'cancelled')
+            """
+        )
+        assert _stats(conn, 1) == _nights("2026-06-01", (1, 9001), (2, 24003))
+
+        conn.execute(
+            "UPDATE bookings SET check_out_date = '2026-06-04' WHERE room_id = 2"
+        )
+        conn.execute("UPDATE bookings SET status = 'confirmed' WHERE room_id = 3")
+        conn.execute("UPDATE bookings SET status = 'cancelled' WHERE room_id = 1")
+        assert _stats(conn, 1) == _nights(
+            "2026-06-01", (1, 32003), (1, 15002), (1, 15002)
+        )
+
+        # Repriced and moved rooms count at their new price in their new hotel
+        conn.execute("UPDATE rooms SET price_per_night = 15000 WHERE id = 2")
+        conn.execute("UPDATE rooms SET hotel_id = 3, room_number = '7' WHERE id = 3")
+        conn.execute("DELETE FROM bookings WHERE room_id = 1")
+        assert _stats(conn, 1) == _nights("2026-06-02", (1, 15000), (1, 15000))
+        assert _stats(conn, 3) == _nights("2026-06-01", (1, 32003))
+        assert verify_daily_stats(conn) == []
+
+
+def test_verify_reports_drift_and_rebuild_repairs_it(db_path):
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 13, '2026-06-01', '2026-06-03', 'confirmed')
+            """
+        )
+        conn.execute(
+            "UPDATE hotel_daily_stats SET revenue = 1 WHERE day = ?",
+            (day_number("2026-06-02"),),
+        )
+        conn.execute(
+            "INSERT INTO hotel_daily_stats VALUES (2, ?, 1, 9007)",
+            (day_number("2026-07-01"),),
+        )
+        assert verify_daily_stats(conn) == [(2, "2026-07-01"), (3, "2026-06-02")]
+
+        assert rebuild_daily_stats(conn) == 2
+        assert verify_daily_stats(conn) == []
+        assert _stats(conn, 3) == _nights("2026-06-01", (1, 9001), (1, 9001))
+
+
+def test_migration_counts_existing_bookings(base_db_path):
+    conn = sqlite3.connect(base_db_path)
+    try:
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 7, '2026-06-01', '2026-06-02', 'confirmed'),
+                   (1, 8, '2026-06-01', '2026-06-02', 'confirmed')
+            """
+        )
+        conn.commit()
+        apply_migrations(conn)
+        assert _stats(conn, 2) == _nights("2026-06-01", (2, 9001 + 15002))
+    finally:
+        conn.close()
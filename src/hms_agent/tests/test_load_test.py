@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+
+from load_test import classify, parse_sse, run_load
+
+
+def _reply(payload: dict) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "result": {
+            "content": [{"type": "text", "text": json.dumps(payload)}],
+            "structuredContent": payload,
+            "isError": False,
+        },
+    }
+
+
+def test_parses_sse_bodies_and_classifies_replies():
+    body = (
+        'event: message\ndata: {"jsonrpc": "2.0", "method": "ping"}\n\n'
+        'event: message\ndata: {"jsonrpc": "2.0",\ndata: "id": 3}\n\n'
+    )
+    assert parse_sse(body) == [
+        {"jsonrpc": "2.0", "method": "ping"},
+        {"jsonrpc": "2.0", "id": 3},
+    ]
+
+    assert classify(_reply({"booking_id": 7, "status": "confirmed"})) == "ok"
+    assert (
+        classify(_reply({"error": "Room is not available for selected dates"}))
+        == "conflict"
+    )
+    assert classify(_reply({"error": "Booking not found"})) == "error"
+    assert classify({"jsonrpc": "2.0", "id": 1, "error": {"code": -32602}}) == "error"
+
+
+def _server(calls: list):
+    """A fake MCP endpoint that books every room exactly once."""
+    booked = set()
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.method == "DELETE":
+            return httpx.Response(200)
+        message = json.loads(request.content)
+        if "id" not in message:
+            return httpx.Response(202)
+        if message["method"] == "initialize":
+            result = {"protocolVersion": "2025-03-26", "capabilities": {}}
+        else:
+            name, arguments = (
+                message["params"]["name"],
+                message["params"]["arguments"],
+            )
+            calls.append(name)
+            payload = {
+                "search_locations": {"locations": [{"id": 1}]},
+                "search_hotels": {"hotels": [{"id": 1}]},
+                "list_hotel_rooms": {"rooms": [{"id": 1}, {"id": 2}]},
+            }.get(name)
+            if name == "create_reservation":
+                stay = (arguments["room_id"], arguments["check_in_date"])
+                if stay in booked:
+                    payload = {"error": "Room is not available for selected dates"}
+                else:
+                    booked.add(stay)
+                    payload = {"booking_id": len(booked), "status": "confirmed"}
+            elif payload is None:
+                payload = {"rooms": [], "next_cursor": None}
+            result = _reply(payload)["result"]
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream", "mcp-session-id": "s1"},
+            text=f"event: message\ndata: {json.dumps(reply)}\n\n",
+        )
+
+    return httpx.MockTransport(handle)
+
+
+def test_storm_reports_conflicts_per_tool():
+    calls = []
+    report = asyncio.run(
+        run_load(
+            "http://mcp.test/mcp",
+            "storm",
+            sessions=4,
+            rate=400,
+            duration=0.5,
+            hot_rooms=1,
+            transport=_server(calls),
+        )
+    )
+    assert calls[:3] == ["search_locations", "search_hotels", "list_hotel_rooms"]
+    bookings = report["tools"]["create_reservation"]
+    assert bookings["calls"] > 20
+    # One room over two weeks: almost every attempt finds it taken
+    assert bookings["conflict_rate"] > 0.5 and bookings["error_rate"] == 0
+    assert report["all"]["calls"] == len(calls) - 3
+    assert report["sse"]["parse_us_per_call"] > 0
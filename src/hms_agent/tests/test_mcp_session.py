@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from llama_index.tools.mcp import BasicMCPClient
+from mcp import types
+
+from mcp_session import PersistentMCPClient
+
+
+class FakeSession:
+    def __init__(self, version):
+        self.server_info = SimpleNamespace(name="HMS MCP Server", version=version)
+        self.list_calls = 0
+
+    async def list_tools(self):
+        self.list_calls += 1
+        return types.ListToolsResult(
+            tools=[
+                types.Tool(
+                    name="search_locations",
+                    description="Find locations",
+                    inputSchema={"type": "object", "properties": {}},
+                )
+            ]
+        )
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Replaces the transport: every opened session is recorded."""
+    state = SimpleNamespace(version="1", sessions=[])
+
+    @asynccontextmanager
+    async def run_session(self):
+        session = FakeSession(state.version)
+        state.sessions.append(session)
+        yield session
+
+    monkeypatch.setattr(BasicMCPClient, "_run_session", run_session)
+    return state
+
+
+def _start(tmp_path):
+    async def start():
+        client = PersistentMCPClient("http://mcp.test/mcp", cache_dir=tmp_path)
+        await client.connect()
+        tools = await client.list_tools()
+        from_cache = client.tools_from_cache
+        await client.list_tools()
+        await client.aclose()
+        return client, from_cache, [tool.name for tool in tools.tools]
+
+    return asyncio.run(start())
+
+
+def test_reuses_one_session_and_caches_tool_schemas(server, tmp_path):
+    client, from_cache, names = _start(tmp_path)
+    assert names == ["search_locations"] and not from_cache
+    assert len(server.sessions) == 1
+    assert server.sessions[0].list_calls == 1
+    assert client.server == ("HMS MCP Server", "1")
+
+    _, from_cache, names = _start(tmp_path)
+    assert names == ["search_locations"] and from_cache
+    assert server.sessions[1].list_calls == 0
+
+    # A new server version invalidates the schemas
+    server.version = "2"
+    _, from_cache, _ = _start(tmp_path)
+    assert not from_cache
+    assert server.sessions[2].list_calls == 1
+
+
+def test_without_connect_each_call_opens_a_session(server, tmp_path):
+    async def list_twice():
+        client = PersistentMCPClient("http://mcp.test/mcp", cache_dir=tmp_path)
+        await client.list_tools()
+        await client.list_tools()
+
+    asyncio.run(list_twice())
+    assert len(server.sessions) == 2
+    assert list(tmp_path.iterdir()) == []
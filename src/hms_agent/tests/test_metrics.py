@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from db import connector, metrics
+from db.executor import run_read, run_write
+from db.metrics import enable_metrics, instrument, render_metrics
+from db.models import CreateBookingInput, HotelsInput
+from db.writer import start_writer
+from tools.bookings import create_booking
+from tools.hotels import get_hotels
+
+
+@pytest.fixture
+def recorder(db_path):
+    recorder = enable_metrics()
+    # Reopen the pool so its connections carry the statement hook
+    connector.set_db_path(db_path)
+    yield recorder
+    metrics.disable_metrics()
+
+
+@instrument
+async def search_hotels(location_id=None):
+    try:
+        hotels = await run_read(get_hotels, HotelsInput(location_id=location_id))
+        return {"hotels": [hotel.model_dump() for hotel in hotels]}
+    except Exception as e:
+        return {"error": str(e), "hotels": []}
+
+
+@instrument
+async def create_reservation(room_id):
+    try:
+        data = CreateBookingInput(
+            customer_id=1,
+            room_id=room_id,
+            check_in_date="2026-05-01",
+            check_out_date="2026-05-03",
+        )
+        return (await run_write(create_booking, data)).model_dump()
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def test_records_calls_rows_and_statements(recorder):
+    asyncio.run(search_hotels(1))
+    asyncio.run(search_hotels(0))
+
+    assert recorder.calls["search_hotels"] == 2
+    assert recorder.errors["search_hotels"] == 1  # location_id=0 fails validation
+    assert recorder.rows["search_hotels"] == 2
+    statements = recorder.statements["search_hotels"]
+    assert (statements.count, statements.sum) == (2, 1)
+    assert recorder.latency["search_hotels"].count == 2
+
+
+def test_attributes_writer_statements_to_the_tool(recorder):
+    start_writer()
+    asyncio.run(create_reservation(1))
+    asyncio.run(create_reservation(1))
+
+    assert recorder.errors["create_reservation"] == 1
+    # Overlap check + insert (traced again when its day-number trigger runs
+    # and twice for its daily-stats trigger), then only the overlap check for
+    # the conflict
+    assert recorder.statements["create_reservation"].sum == 6
+
+
+def test_disabled_records_nothing(db_path):
+    metrics.disable_metrics()
+    recorder = metrics.get_metrics()
+    asyncio.run(search_hotels(1))
+    assert "search_hotels" not in recorder.calls
+
+
+def test_renders_prometheus_text(recorder):
+    asyncio.run(search_hotels(1))
+    text = render_metrics()
+
+    assert 'hms_tool_calls_total{tool="search_hotels"} 1' in text
+    assert 'hms_tool_duration_seconds_bucket{tool="search_hotels",le="+Inf"} 1' in text
+    assert 'hms_tool_sql_statements_count{tool="search_hotels"} 1' in text
+    assert "# TYPE hms_tool_duration_seconds histogram" in text
+    assert "hms_pool_size" in text
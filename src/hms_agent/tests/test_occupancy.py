@@ -0,0 +1,157 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from db.connector import connection
+from db.models import CancelBookingInput, CreateBookingInput, SearchRoomsInput
+from db.occupancy import OccupancyIndex, enable_occupancy, verify_occupancy
+from tools.bookings import cancel_booking, create_booking
+from tools.rooms import get_available_rooms
+
+START = date(2026, 6, 1)
+
+
+@pytest.fixture
+def index(db_path):
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 2, '2026-06-10', '2026-06-14', 'confirmed'),
+                   (1, 3, '2026-06-10', '2026-06-14', 'cancelled'),
+                   (1, 5, '2026-05-25', '2026-06-03', 'confirmed')
+            """
+        )
+        conn.commit()
+        return OccupancyIndex.build(conn, start=START, days=60)
+
+
+def _available(index, check_in, check_out, min_capacity=1):
+    rows = index.available_rooms(1, min_capacity, check_in, check_out)
+    return {row["id"] for row in rows}
+
+
+def test_range_checks(index):
+    assert _available(index, "2026-06-10", "2026-06-11") == {1, 3, 4, 5, 6}
+    # Back-to-back stays do not overlap
+    assert _available(index, "2026-06-14", "2026-06-16") == {1, 2, 3, 4, 5, 6}
+    assert _available(index, "2026-06-05", "2026-06-10") == {1, 2, 3, 4, 5, 6}
+    # Booking starting before the horizon is clipped, not dropped
+    assert 5 not in _available(index, "2026-06-01", "2026-06-02")
+    assert _available(index, "2026-06-01", "2026-06-20", min_capacity=4) == {3, 6}
+
+
+def test_covers_only_the_horizon(index):
+    assert index.covers("2026-06-01", "2026-07-31")
+    assert not index.covers("2026-05-31", "2026-06-02")
+    assert not index.covers("2026-07-30", "2026-08-01")
+
+
+def test_mark_and_clear_are_incremental(index):
+    index.mark(1, "2026-06-20", "2026-06-25")
+    assert 1 not in _available(index, "2026-06-24", "2026-06-26")
+    index.clear(1, "2026-06-20", "2026-06-25")
+    assert 1 in _available(index, "2026-06-24", "2026-06-26")
+
+
+def test_verify_reports_drift(index, db_path):
+    with connection() as conn:
+        assert index.verify(conn) == []
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 4, '2026-06-20', '2026-06-22', 'confirmed')
+            """
+        )
+        conn.commit()
+        assert index.verify(conn) == [4]
+
+
+def test_tools_keep_engine_in_sync(db_path):
+    engine = enable_occupancy()
+    check_in = engine.start.isoformat()
+    check_out = date.fromordinal(engine.start.toordinal() + 3).isoformat()
+    search = SearchRoomsInput(
+        hotel_id=1, check_in_date=check_in, check_out_date=check_out, min_capacity=2
+    )
+    assert {room.id for room in get_available_rooms(search)} == {2, 3, 5, 6}
+
+    booking = create_booking(
+        CreateBookingInput(
+            customer_id=1, room_id=3, check_in_date=check_in, check_out_date=check_out
+        )
+    )
+    assert {room.id for room in get_available_rooms(search)} == {2, 5, 6}
+
+    cancel_booking(CancelBookingInput(booking_id=booking.booking_id))
+    # Cancelling twice must not free a room booked by someone else meanwhile
+    create_booking(
+        CreateBookingInput(
+            customer_id=2, room_id=3, check_in_date=check_in, check_out_date=check_out
+        )
+    )
+    cancel_booking(CancelBookingInput(booking_id=booking.booking_id))
+    assert {room.id for room in get_available_rooms(search)} == {2, 5, 6}
+    assert verify_occupancy() == []
+
+
+def test_memory_footprint_is_one_bit_per_room_day(db_path):
+    conn = sqlite3.connect(db_path)
+    index = OccupancyIndex.build(conn, start=START, days=730)
+    conn.close()
+    assert index.memory_usage()["bitmap_bytes"] == 18 * 92
+
+
+def test_sync_loads_rooms_added_after_the_build(index, db_path):
+    with connection() as conn:
+        room_id = conn.execute(
+            """
+            INSERT INTO rooms (hotel_id, room_number, room_type, price_per_night, capacity)
+            VALUES (1, '901', 'Suite', 40000, 4)
+            """
+        ).lastrowid
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, ?, '2026-06-10', '2026-06-12', 'confirmed')
+            """,
+            (room_id,),
+        )
+        conn.commit()
+        assert room_id not in _available(index, "2026-06-20", "2026-06-21")
+
+        assert index.sync(conn)
+        assert not index.sync(conn)
+        assert room_id in _available(index, "2026-06-20", "2026-06-21")
+        assert room_id not in _available(index, "2026-06-11", "2026-06-12")
+        assert index.verify(conn) == []
+
+
+def test_tools_pick_up_new_rooms(db_path):
+    engine = enable_occupancy()
+    check_in = engine.start.isoformat()
+    check_out = date.fromordinal(engine.start.toordinal() + 3).isoformat()
+    search = SearchRoomsInput(
+        hotel_id=1, check_in_date=check_in, check_out_date=check_out, min_capacity=4
+    )
+    with connection() as conn:
+        room_id = conn.execute(
+            """
+            INSERT INTO rooms (hotel_id, room_number, room_type, price_per_night, capacity)
+            VALUES (1, '901', 'Suite', 40000, 4)
+            """
+        ).lastrowid
+        conn.commit()
+    assert room_id in {room.id for room in get_available_rooms(search)}
+
+    create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=room_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+        )
+    )
+    assert room_id not in {room.id for room in get_available_rooms(search)}
+    assert verify_occupancy() == []
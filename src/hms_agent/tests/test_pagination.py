@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from db.connector import connection
+from db.models import CustomerSearchInput, HotelsInput, SearchRoomsInput
+from db.occupancy import enable_occupancy
+from db.pagination import MAX_PAGE_SIZE, encode_cursor
+from tools.customers import find_customers
+from tools.hotels import find_hotels
+from tools.rooms import find_available_rooms
+
+
+def _collect(find, model, **fields):
+    """Walk every page and return the ids in order plus the page sizes."""
+    ids, sizes, cursor = [], [], None
+    while True:
+        items, cursor = find(model(**fields, cursor=cursor))
+        ids.extend(item["id"] for item in items)
+        sizes.append(len(items))
+        if cursor is None:
+            return ids, sizes
+
+
+def test_hotels_page_in_id_order(db_path):
+    assert _collect(find_hotels, HotelsInput, limit=2) == ([1, 2, 3], [2, 1])
+    assert _collect(find_hotels, HotelsInput, location_id=1, limit=1) == (
+        [1, 2],
+        [1, 1],
+    )
+    # An exactly full last page does not announce an empty next page
+    assert _collect(find_hotels, HotelsInput, limit=3) == ([1, 2, 3], [3])
+
+
+@pytest.mark.parametrize("engine", ["sql", "occupancy"])
+def test_rooms_page_by_capacity_then_id(db_path, engine):
+    with connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+            VALUES (1, 4, '2026-06-10', '2026-06-18', 'confirmed')
+            """
+        )
+        conn.commit()
+    if engine == "occupancy":
+        enable_occupancy(start=date(2026, 1, 1))
+
+    ids, sizes = _collect(
+        find_available_rooms,
+        SearchRoomsInput,
+        hotel_id=1,
+        check_in_date="2026-06-15",
+        check_out_date="2026-06-20",
+        min_capacity=1,
+        limit=2,
+    )
+    # Singles 1 (4 is booked), doubles 2 and 5, suites 3 and 6
+    assert ids == [1, 2, 5, 3, 6]
+    assert sizes == [2, 2, 1]
+
+
+def test_customers_page_by_rank_and_by_id(db_path):
+    with connection() as conn:
+        conn.executemany(
+            "INSERT INTO customers (name, phone_number) VALUES (?, ?)",
+            [(f"Carol Smith {i}", f"555-1{i:03d}") for i in range(5)],
+        )
+        conn.commit()
+
+    ranked, _ = _collect(find_customers, CustomerSearchInput, name="Smith", limit=2)
+    everything, _ = find_customers(CustomerSearchInput(name="Smith", limit=100))
+    assert ranked == [customer["id"] for customer in everything]
+    assert sorted(ranked) == [1, 3, 4, 5, 6, 7]
+
+    # Fragments too short for the trigram index page on id
+    assert _collect(find_customers, CustomerSearchInput, name="Sm", limit=4) == (
+        [1, 3, 4, 5, 6, 7],
+        [4, 2],
+    )
+
+
+def test_rejects_foreign_and_malformed_cursors(db_path):
+    with pytest.raises(ValueError, match="does not belong"):
+        find_hotels(HotelsInput(cursor=encode_cursor("rooms", [1, 1])))
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        find_hotels(HotelsInput(cursor="not-a-cursor"))
+
+
+def test_page_size_is_capped():
+    with pytest.raises(ValueError):
+        HotelsInput(limit=MAX_PAGE_SIZE + 1)
+    with pytest.raises(ValueError):
+        CustomerSearchInput(name="x", limit=MAX_PAGE_SIZE + 1)
@@ -0,0 +1,111 @@
+import sqlite3
+from datetime import date
+
+from sqlalchemy import create_engine
+
+from db_utils import Base, migrate_database
+from db.daily_stats import verify_daily_stats
+from db.migrations import DAILY_STATS_TRIGGERS
+from populate_db import RoomCalendar, generate_bulk
+
+
+def _empty_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    migrate_database(str(path))
+
+
+def _generate(path, seed=7):
+    conn = sqlite3.connect(path)
+    try:
+        report = generate_bulk(
+            conn,
+            seed=seed,
+            num_hotels_per_location=1,
+            num_rooms_per_hotel=3,
+            num_customers=50,
+            num_bookings=2000,
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 3, 31),
+            chunk_size=100,
+        )
+        rows = {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("hotels", "rooms", "customers", "bookings")
+        }
+    finally:
+        conn.close()
+    return report, rows
+
+
+def test_room_calendar_rejects_overlaps_only():
+    calendar = RoomCalendar()
+    assert calendar.try_add(10, 15)
+    assert calendar.try_add(15, 20)  # Check-out day is free again
+    assert calendar.try_add(5, 10)
+    assert not calendar.try_add(12, 13)
+    assert not calendar.try_add(0, 6)
+    assert not calendar.try_add(19, 25)
+    assert calendar.starts == [5, 10, 15]
+
+
+def test_generate_bulk_is_deterministic(tmp_path):
+    first, second = tmp_path / "first.db", tmp_path / "second.db"
+    _empty_database(first)
+    _empty_database(second)
+
+    report, rows = _generate(first)
+    _, other_rows = _generate(second)
+
+    assert rows == other_rows
+    assert report["customers"][0] == 50
+    assert report["bookings"][0] == len(rows["bookings"])
+
+
+def test_generate_bulk_respects_existing_bookings(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
+        VALUES (1, 1, '2026-01-01', '2026-04-01', 'confirmed')
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    _generate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    overlaps = conn.execute(
+        """
+        SELECT COUNT(*)
+        FROM bookings a
+        JOIN bookings b
+          ON a.room_id = b.room_id
+         AND a.id < b.id
+         AND a.check_in_date < b.check_out_date
+         AND b.check_in_date < a.check_out_date
+        WHERE a.status = 'confirmed' AND b.status = 'confirmed'
+        """
+    ).fetchone()[0]
+    missing_phones = conn.execute(
+        "SELECT COUNT(*) FROM customers WHERE phone_normalized IS NULL"
+    ).fetchone()[0]
+    conn.close()
+    assert overlaps == 0
+    assert missing_phones == 0
+
+
+def test_generate_bulk_rebuilds_daily_stats_and_keeps_triggers(db_path):
+    _generate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    drifted = verify_daily_stats(conn)
+    triggers = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    }
+    conn.close()
+    assert drifted == []
+    assert set(DAILY_STATS_TRIGGERS) <= triggers
@@ -0,0 +1,421 @@
+import pytest
+
+from db.models import (
+    BookStayInput,
+    CancelBookingInput,
+    CreateBookingInput,
+    CustomerCreateInput,
+    CustomerSearchInput,
+    GroupBookingInput,
+    HotelOccupancyInput,
+    HotelRoomsInput,
+    HotelsInput,
+    LocationRevenueInput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+)
+from tools.repository import BACKENDS, open_repository
+
+# Conformance suite: every storage backend must pass all of these against the
+# seeded database from conftest.
+
+
+@pytest.fixture(params=BACKENDS)
+def repository(request, db_path):
+    return open_repository(request.param)
+
+
+def _ids(rows):
+    return [row["id"] for row in rows]
+
+
+def _free_rooms(repository, check_in, check_out, **search):
+    search = {"hotel_id": 1, "min_capacity": 1, "limit": 100} | search
+    rooms, _ = repository.find_available_rooms(
+        SearchRoomsInput(check_in_date=check_in, check_out_date=check_out, **search)
+    )
+    return _ids(rooms)
+
+
+def _book(repository, room_id, check_in, check_out):
+    return repository.create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=room_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+        )
+    )
+
+
+def test_lists_locations(repository):
+    assert repository.list_locations() == [
+        {"id": 1, "city": "Paris", "country": "France"},
+        {"id": 2, "city": "London", "country": "UK"},
+    ]
+
+
+def test_pages_hotels(repository):
+    hotels, cursor = repository.find_hotels(HotelsInput(limit=2))
+    assert hotels == [
+        {"id": 1, "name": "Hotel Lumiere"},
+        {"id": 2, "name": "Rive Gauche"},
+    ]
+    hotels, cursor = repository.find_hotels(HotelsInput(limit=2, cursor=cursor))
+    assert (_ids(hotels), cursor) == ([3], None)
+
+    hotels, cursor = repository.find_hotels(HotelsInput(location_id=1))
+    assert (_ids(hotels), cursor) == ([1, 2], None)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        repository.find_hotels(HotelsInput(cursor="nonsense"))
+
+
+def test_lists_hotel_rooms(repository):
+    rooms = repository.find_hotel_rooms(HotelRoomsInput(hotel_id=1))
+    assert _ids(rooms) == [1, 2, 3, 4, 5, 6]
+    assert rooms[0] == {
+        "id": 1,
+        "room_number": "1",
+        "room_type": "Single",
+        "price_per_night": 9001,
+        "capacity": 1,
+    }
+    assert repository.find_hotel_rooms(HotelRoomsInput(hotel_id=99)) == []
+
+
+def test_pages_free_rooms_by_capacity(repository):
+    search = SearchRoomsInput(
+        hotel_id=1,
+        check_in_date="2026-05-01",
+        check_out_date="2026-05-03",
+        min_capacity=2,
+        limit=2,
+    )
+    rooms, cursor = repository.find_available_rooms(search)
+    assert _ids(rooms) == [2, 5]
+    rooms, cursor = repository.find_available_rooms(
+        search.model_copy(update={"cursor": cursor})
+    )
+    assert (_ids(rooms), cursor) == ([3, 6], None)
+
+
+def test_bookings_block_overlapping_stays(repository):
+    booking = _book(repository, 2, "2026-05-01", "2026-05-04")
+    assert booking.status == "confirmed"
+
+    for check_in, check_out in [
+        ("2026-05-02", "2026-05-03"),
+        ("2026-04-28", "2026-05-02"),
+        ("2026-05-03", "2026-05-09"),
+        ("2026-04-01", "2026-06-01"),
+    ]:
+        with pytest.raises(ValueError, match="not available"):
+            _book(repository, 2, check_in, check_out)
+        assert 2 not in _free_rooms(repository, check_in, check_out)
+
+    # Stays may start on the day another one ends
+    _book(repository, 2, "2026-05-04", "2026-05-06")
+    _book(repository, 2, "2026-04-29", "2026-05-01")
+    assert 2 in _free_rooms(repository, "2026-05-06", "2026-05-07")
+
+
+def test_bookings_need_an_existing_room(repository):
+    with pytest.raises(ValueError, match="Room not found"):
+        _book(repository, 9999, "2026-05-01", "2026-05-04")
+    assert _book(repository, 1, "2026-05-01", "2026-05-04").booking_id == 1
+
+
+@pytest.mark.parametrize(
+    "model, fields",
+    [
+        (CreateBookingInput, {"customer_id": 1, "room_id": 1}),
+        (SearchRoomsInput, {"hotel_id": 1, "min_capacity": 1}),
+        (SearchLocationRoomsInput, {"location_id": 1, "min_capacity": 1}),
+        (GroupBookingInput, {"customer_id": 1, "room_ids": [1, 2]}),
+    ],
+)
+def test_inputs_reject_impossible_dates(model, fields):
+    with pytest.raises(ValueError, match="2026-02-30 is not a calendar date"):
+        model(check_in_date="2026-02-30", check_out_date="2026-03-02", **fields)
+    with pytest.raises(ValueError, match="2026-13-01 is not a calendar date"):
+        model(check_in_date="2026-12-30", check_out_date="2026-13-01", **fields)
+    with pytest.raises(ValueError, match="2026-04-31 is not a calendar date"):
+        HotelOccupancyInput(hotel_id=1, start_date="2026-04-31", end_date="2026-05-02")
+
+
+@pytest.mark.parametrize(
+    "model, fields",
+    [
+        (CreateBookingInput, {"customer_id": 1, "room_id": 1}),
+        (BookStayInput, {"hotel_id": 1, "name": "Eve", "phone_number": "555-0199"}),
+        (GroupBookingInput, {"customer_id": 1, "room_ids": [1, 2]}),
+    ],
+)
+@pytest.mark.parametrize(
+    "check_in, check_out", [("2026-05-05", "2026-05-01"), ("2026-05-05", "2026-05-05")]
+)
+def test_stays_last_at_least_one_night(model, fields, check_in, check_out):
+    with pytest.raises(ValueError, match="check_out_date must be after check_in_date"):
+        model(check_in_date=check_in, check_out_date=check_out, **fields)
+
+
+def test_impossible_dates_leave_nothing_behind(repository):
+    # Inputs that skipped validation, as a caller building them by hand might
+    stay = {"check_in_date": "2026-02-30", "check_out_date": "2026-03-02"}
+    with pytest.raises(ValueError):
+        repository.create_booking(
+            CreateBookingInput.model_construct(customer_id=1, room_id=1, **stay)
+        )
+    with pytest.raises(ValueError):
+        repository.create_group_booking(
+            GroupBookingInput.model_construct(customer_id=1, room_ids=[1, 2], **stay)
+        )
+    with pytest.raises(ValueError):
+        repository.book_stay(
+            BookStayInput.model_construct(
+                hotel_id=1,
+                min_capacity=1,
+                room_type=None,
+                name="Eve",
+                phone_number="555-0199",
+                **stay,
+            )
+        )
+
+    assert _book(repository, 1, "2026-03-01", "2026-03-02").booking_id == 1
+    assert _book(repository, 2, "2026-03-01", "2026-03-02").booking_id == 2
+    customers, _ = repository.find_customers(
+        CustomerSearchInput(phone_number="555-0199")
+    )
+    assert customers == []
+
+
+def test_cancelling_frees_the_room(repository):
+    booking = _book(repository, 3, "2026-07-01", "2026-07-05")
+    repository.cancel_booking(CancelBookingInput(booking_id=booking.booking_id))
+    assert 3 in _free_rooms(repository, "2026-07-02", "2026-07-03")
+    _book(repository, 3, "2026-07-02", "2026-07-03")
+
+    with pytest.raises(ValueError, match="Booking not found"):
+        repository.cancel_booking(CancelBookingInput(booking_id=999_999))
+
+
+def test_group_bookings_are_all_or_nothing(repository):
+    def book_group(room_ids, check_in="2026-09-01", check_out="2026-09-04"):
+        return repository.create_group_booking(
+            GroupBookingInput(
+                customer_id=1,
+                room_ids=room_ids,
+                check_in_date=check_in,
+                check_out_date=check_out,
+            )
+        )
+
+    _book(repository, 3, "2026-09-03", "2026-09-05")
+    with pytest.raises(ValueError, match="Rooms 3 are not available"):
+        book_group([1, 2, 3])
+    with pytest.raises(ValueError, match="Room not found: 999"):
+        book_group([1, 999])
+    assert {1, 2} <= set(_free_rooms(repository, "2026-09-01", "2026-09-04"))
+
+    group = book_group([2, 1])
+    assert group.status == "confirmed"
+    assert [booking.room_id for booking in group.bookings] == [2, 1]
+    assert len({booking.booking_id for booking in group.bookings}) == 2
+    assert {1, 2}.isdisjoint(_free_rooms(repository, "2026-09-02", "2026-09-03"))
+
+    repository.cancel_booking(
+        CancelBookingInput(booking_id=group.bookings[0].booking_id)
+    )
+    assert 2 in _free_rooms(repository, "2026-09-02", "2026-09-03")
+    with pytest.raises(ValueError, match="only be booked once"):
+        book_group([4, 4])
+
+
+def test_groups_free_rooms_by_hotel(repository):
+    _book(repository, 12, "2026-05-01", "2026-05-03")
+    hotels = repository.find_available_rooms_by_hotel(
+        SearchLocationRoomsInput(
+            location_id=1,
+            check_in_date="2026-05-02",
+            check_out_date="2026-05-03",
+            min_capacity=4,
+            sort_by="price_desc",
+            rooms_per_hotel=1,
+        )
+    )
+    assert [(hotel["hotel_id"], _ids(hotel["rooms"])) for hotel in hotels] == [
+        (1, [6]),
+        (2, [9]),
+    ]
+
+    hotels = repository.find_available_rooms_by_hotel(
+        SearchLocationRoomsInput(
+            hotel_ids=[3, 1],
+            check_in_date="2026-05-02",
+            check_out_date="2026-05-03",
+            min_capacity=1,
+            max_results=3,
+        )
+    )
+    assert [(hotel["hotel_id"], _ids(hotel["rooms"])) for hotel in hotels] == [
+        (1, [1, 4]),
+        (3, [13]),
+    ]
+
+
+def test_finds_customers_by_name_and_phone(repository):
+    def names(**search):
+        customers, _ = repository.find_customers(CustomerSearchInput(**search))
+        return sorted(customer["name"] for customer in customers)
+
+    assert names(name="smi") == ["Alice Smith"]
+    assert names(name="JONES") == ["Bob Jones"]
+    assert names(name="Bo") == ["Bob Jones"]
+    assert names(name="nobody") == []
+    assert names(phone_number="555 987 6543") == ["Bob Jones"]
+    assert names(phone_number="(555) 987-6543") == ["Bob Jones"]
+    assert names(name="Alice", phone_number="555-987-6543") == []
+
+
+def test_creates_customers_with_unique_phones(repository):
+    customer = repository.create_customer(
+        CustomerCreateInput(name="Carol White", phone_number="555-3000")
+    )
+    customers, _ = repository.find_customers(
+        CustomerSearchInput(phone_number="5553000")
+    )
+    assert customers == [customer.model_dump()]
+    assert customer.id == 3
+
+    with pytest.raises(ValueError, match="phone number already exists"):
+        repository.create_customer(
+            CustomerCreateInput(name="Bobby", phone_number="555.987.6543")
+        )
+
+
+def _stay(repository, phone_number, **stay):
+    stay = {
+        "hotel_id": 1,
+        "check_in_date": "2026-08-01",
+        "check_out_date": "2026-08-03",
+        "name": "Carol White",
+    } | stay
+    return repository.book_stay(BookStayInput(phone_number=phone_number, **stay))
+
+
+def test_book_stay_resolves_the_guest_and_picks_the_smallest_room(repository):
+    stay = _stay(repository, "555 987 6543", name="Robert Jones", min_capacity=2)
+    assert (stay.customer_id, stay.customer_created) == (2, False)
+    assert stay.room.model_dump() == {
+        "id": 2,
+        "room_number": "2",
+        "room_type": "Double",
+        "price_per_night": 15002,
+        "capacity": 2,
+    }
+    assert stay.status == "confirmed" and stay.hotel_id == 1
+
+    # The next party of two gets the other double, then a suite
+    assert _stay(repository, "555-0123", min_capacity=2).room.id == 5
+    assert _stay(repository, "555-0123", min_capacity=2).room.id == 3
+    assert _stay(repository, "555-0123", room_type="suite").room.id == 6
+    assert 6 not in _free_rooms(repository, "2026-08-02", "2026-08-03")
+
+    new = _stay(repository, "555-4000")
+    assert new.customer_created and new.room.id == 1
+    customers, _ = repository.find_customers(
+        CustomerSearchInput(phone_number="5554000")
+    )
+    assert customers == [
+        {"id": new.customer_id, "name": "Carol White", "phone_number": "555-4000"}
+    ]
+
+
+def test_book_stay_registers_no_one_when_nothing_is_free(repository):
+    _stay(repository, "555-0123", room_type="Suite")
+    _stay(repository, "555-0123", room_type="Suite")
+    with pytest.raises(ValueError, match="No matching room"):
+        _stay(repository, "555-5000", room_type="Suite")
+    with pytest.raises(ValueError, match="No matching room"):
+        _stay(repository, "555-5000", min_capacity=5)
+
+    customers, _ = repository.find_customers(
+        CustomerSearchInput(phone_number="5555000")
+    )
+    assert customers == []
+
+
+def test_reports_hotel_occupancy_per_day(repository):
+    _book(repository, 1, "2026-06-01", "2026-06-03")
+    _book(repository, 2, "2026-06-02", "2026-06-04")
+    cancelled = _book(repository, 4, "2026-06-01", "2026-06-05")
+    repository.cancel_booking(CancelBookingInput(booking_id=cancelled.booking_id))
+
+    period = {"start_date": "2026-06-01", "end_date": "2026-06-05"}
+    report = repository.find_hotel_occupancy(HotelOccupancyInput(hotel_id=1, **period))
+    assert [
+        (day["date"], day["rooms_booked"], day["revenue"]) for day in report["days"]
+    ] == [
+        ("2026-06-01", 1, 9001),
+        ("2026-06-02", 2, 24003),
+        ("2026-06-03", 1, 15002),
+        ("2026-06-04", 0, 0),
+    ]
+    assert report["days"][1]["occupancy_rate"] == 0.3333
+    assert report | {"days": None} == {
+        "hotel_id": 1,
+        "hotel_name": "Hotel Lumiere",
+        "rooms": 6,
+        "start_date": "2026-06-01",
+        "end_date": "2026-06-05",
+        "room_nights": 4,
+        "revenue": 48006,
+        "occupancy_rate": 0.1667,
+        "days": None,
+    }
+
+    with pytest.raises(ValueError, match="Hotel not found"):
+        repository.find_hotel_occupancy(HotelOccupancyInput(hotel_id=99, **period))
+    with pytest.raises(ValueError, match="1 to 366 days"):
+        HotelOccupancyInput(hotel_id=1, start_date="2026-06-05", end_date="2026-06-05")
+    with pytest.raises(ValueError, match="1 to 366 days"):
+        HotelOccupancyInput(hotel_id=1, start_date="2026-01-01", end_date="2027-01-03")
+
+
+def test_reports_revenue_per_location(repository):
+    _book(repository, 1, "2026-06-01", "2026-06-03")
+    _book(repository, 7, "2026-06-09", "2026-06-12")  # the last night is outside
+    _book(repository, 13, "2026-06-05", "2026-06-06")
+
+    period = {"start_date": "2026-06-01", "end_date": "2026-06-11"}
+    locations = repository.find_location_revenue(LocationRevenueInput(**period))
+    assert locations == [
+        {
+            "location_id": 1,
+            "city": "Paris",
+            "country": "France",
+            "hotels": 2,
+            "rooms": 12,
+            "room_nights": 4,
+            "revenue": 4 * 9001,
+            "occupancy_rate": 0.0333,
+        },
+        {
+            "location_id": 2,
+            "city": "London",
+            "country": "UK",
+            "hotels": 1,
+            "rooms": 6,
+            "room_nights": 1,
+            "revenue": 9001,
+            "occupancy_rate": 0.0167,
+        },
+    ]
+    assert repository.find_location_revenue(
+        LocationRevenueInput(location_id=2, **period)
+    ) == [locations[1]]
+    assert (
+        repository.find_location_revenue(LocationRevenueInput(location_id=9, **period))
+        == []
+    )
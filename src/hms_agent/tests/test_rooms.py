@@ -0,0 +1,211 @@
+import sqlite3
+
+import pytest
+
+from db.connector import connection
+from db.migrations import SCHEMA_VERSION, apply_migrations, get_schema_version
+from db.models import (
+    CreateBookingInput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+    day_number,
+)
+from tools.bookings import OVERLAP_QUERY, create_booking
+from tools.rooms import (
+    AVAILABLE_ROOMS_QUERY,
+    LOCATION_ROOMS_QUERY,
+    find_available_rooms,
+    find_available_rooms_by_hotel,
+    get_available_rooms,
+    get_available_rooms_by_hotel,
+)
+
+
+def _query_plan(query, params):
+    with connection() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row["detail"] for row in rows]
+
+
+def _days(*dates):
+    return [day_number(value) for value in dates]
+
+
+def _assert_no_full_scan(plan):
+    # Scanning a CTE or subquery that was already built from index lookups is fine
+    derived = {step.split(" ", 1)[1] for step in plan if step.startswith("CO-ROUTINE")}
+    scans = [
+        step
+        for step in plan
+        if step.startswith("SCAN") and step.split(" ", 1)[1] not in derived
+    ]
+    assert not scans, f"query plan contains a full scan: {plan}"
+
+
+def test_migrations_are_idempotent(base_db_path):
+    with connection() as conn:
+        assert apply_migrations(conn) == list(range(1, SCHEMA_VERSION + 1))
+        assert apply_migrations(conn) == []
+        assert get_schema_version(conn) == SCHEMA_VERSION
+
+
+def test_availability_query_uses_indexes(db_path):
+    plan = _query_plan(
+        AVAILABLE_ROOMS_QUERY, (1, 2, 2, 5, *_days("2026-06-20", "2026-06-15"), 21)
+    )
+    _assert_no_full_scan(plan)
+    assert any("idx_rooms_hotel_capacity" in step for step in plan)
+    # Pages come out in index order, without sorting the hotel's rooms
+    assert not any("TEMP B-TREE" in step for step in plan)
+    assert any("COVERING INDEX idx_bookings_room_status_days" in step for step in plan)
+
+
+def test_overlap_query_uses_index(db_path):
+    plan = _query_plan(OVERLAP_QUERY, (1, *_days("2026-06-20", "2026-06-15")))
+    _assert_no_full_scan(plan)
+    assert any("COVERING INDEX idx_bookings_room_status_days" in step for step in plan)
+
+
+def test_available_rooms_excludes_overlapping_bookings(db_path):
+    search = SearchRoomsInput(
+        hotel_id=1,
+        check_in_date="2026-06-15",
+        check_out_date="2026-06-20",
+        min_capacity=2,
+    )
+    before = {room.id for room in get_available_rooms(search)}
+    # Hotel 1 rooms with capacity >= 2
+    assert before == {2, 3, 5, 6}
+
+    create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=2,
+            check_in_date="2026-06-18",
+            check_out_date="2026-06-22",
+        )
+    )
+    # A stay ending on the check-in day does not overlap
+    create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=3,
+            check_in_date="2026-06-10",
+            check_out_date="2026-06-15",
+        )
+    )
+
+    assert {room.id for room in get_available_rooms(search)} == {3, 5, 6}
+
+
+def test_migration_adds_indexes_to_existing_database(base_db_path):
+    conn = sqlite3.connect(base_db_path)
+    apply_migrations(conn)
+    indexes = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    conn.close()
+    assert {
+        "idx_bookings_room_status_days",
+        "idx_rooms_hotel_capacity",
+        "idx_hotels_location",
+    } <= indexes
+
+
+def test_day_numbers_are_backfilled_and_kept_in_step(base_db_path):
+    insert = """
+        INSERT INTO bookings (id, customer_id, room_id, check_in_date, check_out_date, status)
+        VALUES (?, 1, 1, ?, ?, 'confirmed')
+    """
+    conn = sqlite3.connect(base_db_path)
+    conn.execute(insert, (1, "1970-01-02", "2026-01-01"))
+    conn.commit()
+    apply_migrations(conn)
+    # Writers that leave the day numbers out still get them
+    conn.execute(insert, (2, "2026-06-15", "2026-06-20"))
+    conn.execute("UPDATE bookings SET check_out_date = '2026-06-21' WHERE id = 2")
+    rows = conn.execute(
+        "SELECT check_in_day, check_out_day FROM bookings ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert rows == [(1, 20454), tuple(_days("2026-06-15", "2026-06-21"))]
+    assert day_number("2026-01-01") == 20454
+
+
+def test_location_search_groups_and_limits(db_path):
+    create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=2,
+            check_in_date="2026-06-15",
+            check_out_date="2026-06-20",
+        )
+    )
+    search = SearchLocationRoomsInput(
+        location_id=1,
+        check_in_date="2026-06-15",
+        check_out_date="2026-06-20",
+        min_capacity=2,
+        rooms_per_hotel=2,
+    )
+    hotels = get_available_rooms_by_hotel(search)
+
+    # Location 1 holds hotels 1 and 2; hotel 3 is in London
+    assert {hotel.hotel_id for hotel in hotels} == {1, 2}
+    by_hotel = {hotel.hotel_id: [room.id for room in hotel.rooms] for hotel in hotels}
+    # Cheapest two free rooms with capacity >= 2; room 2 is booked
+    assert by_hotel == {1: [5, 3], 2: [8, 11]}
+
+    capped = get_available_rooms_by_hotel(
+        search.model_copy(update={"max_results": 3, "sort_by": "price_desc"})
+    )
+    assert sum(len(hotel.rooms) for hotel in capped) == 3
+    for hotel in capped:
+        prices = [room.price_per_night for room in hotel.rooms]
+        assert prices == sorted(prices, reverse=True)
+
+
+def test_dict_results_match_validated_models(db_path):
+    rooms = SearchRoomsInput(
+        hotel_id=1,
+        check_in_date="2026-06-15",
+        check_out_date="2026-06-20",
+        min_capacity=1,
+    )
+    assert find_available_rooms(rooms) == (
+        [room.model_dump() for room in get_available_rooms(rooms)],
+        None,
+    )
+
+    location = SearchLocationRoomsInput(
+        location_id=1,
+        check_in_date="2026-06-15",
+        check_out_date="2026-06-20",
+        min_capacity=2,
+    )
+    assert find_available_rooms_by_hotel(location) == [
+        hotel.model_dump() for hotel in get_available_rooms_by_hotel(location)
+    ]
+
+
+def test_location_search_requires_one_scope():
+    with pytest.raises(ValueError):
+        SearchLocationRoomsInput(
+            location_id=1,
+            hotel_ids=[1],
+            check_in_date="2026-06-15",
+            check_out_date="2026-06-20",
+            min_capacity=1,
+        )
+
+
+@pytest.mark.parametrize(
+    "hotel_filter, params",
+    [("h.location_id = ?", (1,)), ("h.id IN (?, ?)", (1, 2))],
+)
+def test_location_query_uses_indexes(db_path, hotel_filter, params):
+    query = LOCATION_ROOMS_QUERY.format(hotel_filter=hotel_filter, direction="ASC")
+    plan = _query_plan(query, (*params, 2, *_days("2026-06-20", "2026-06-15"), 5, 50))
+    _assert_no_full_scan(plan)
+    assert any("COVERING INDEX idx_bookings_room_status_days" in step for step in plan)
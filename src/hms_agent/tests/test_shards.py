@@ -0,0 +1,255 @@
+import pytest
+
+from db import connector
+from db.models import (
+    BookStayInput,
+    CancelBookingInput,
+    CreateBookingInput,
+    GroupBookingInput,
+    HotelOccupancyInput,
+    LocationRevenueInput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+)
+from db.shards import SHARD_ID_STRIDE, enable_sharding
+from shard_db import plan_shards, split_database
+from tools.bookings import (
+    book_stay,
+    cancel_booking,
+    create_booking,
+    create_group_booking,
+)
+from tools.reports import find_hotel_occupancy, find_location_revenue
+from tools.rooms import find_available_rooms, find_available_rooms_by_hotel
+
+
+def _book(room_id, check_in="2026-05-01", check_out="2026-05-03"):
+    return create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=room_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+        )
+    )
+
+
+@pytest.fixture
+def sharded(db_path, tmp_path):
+    """The seeded database split in two shards, one per location."""
+    legacy = _book(1)  # made before the split, so outside any shard's id range
+    connector.get_pool().close()
+    split_database(db_path, tmp_path / "split", 2)
+    connector.set_db_path(tmp_path / "split" / db_path.name)
+    router = enable_sharding()
+    yield router, legacy.booking_id
+
+
+def test_split_moves_bookings_into_the_owning_shard(sharded, tmp_path):
+    router, legacy_id = sharded
+    assert len(router.shards) == 2
+    with connector.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 0
+
+    paris, london = router.shard_for_location(1), router.shard_for_location(2)
+    assert paris is not london
+    assert router.shard_for_hotel(3) is london
+    assert router.shard_for_room(1) is paris
+    with paris.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT id FROM bookings")] == [
+            legacy_id
+        ]
+        assert conn.execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 12
+    assert (tmp_path / "bookings.db").exists()  # the source is left alone
+
+
+def test_plan_spreads_locations_without_bookings(db_path):
+    with connector.connection() as conn:
+        assert plan_shards(conn, 2) == {1: 1, 2: 2}
+
+
+def test_bookings_get_ids_in_their_shard_range(sharded):
+    router, _ = sharded
+    paris = router.shard_for_room(1)
+
+    first = _book(2)
+    second = _book(2, "2026-06-01", "2026-06-02")
+    assert first.booking_id == paris.booking_id_floor
+    assert second.booking_id == paris.booking_id_floor + 1
+    assert router.find_booking_shard(first.booking_id) is paris
+
+    with pytest.raises(ValueError, match="not available"):
+        _book(2)
+    with pytest.raises(ValueError, match="Room not found"):
+        _book(999)
+
+
+def test_group_bookings_stay_in_one_shard(sharded):
+    router, _ = sharded
+    london = router.shard_for_hotel(3)
+
+    def book_group(room_ids):
+        return create_group_booking(
+            GroupBookingInput(
+                customer_id=1,
+                room_ids=room_ids,
+                check_in_date="2026-05-01",
+                check_out_date="2026-05-03",
+            )
+        )
+
+    group = book_group([13, 14])
+    assert [booking.booking_id for booking in group.bookings] == [
+        london.booking_id_floor,
+        london.booking_id_floor + 1,
+    ]
+    with pytest.raises(ValueError, match="same location"):
+        book_group([2, 15])
+    with pytest.raises(ValueError, match="Room not found"):
+        book_group([15, 999])
+
+
+def test_book_stay_books_in_the_hotel_shard(sharded):
+    router, _ = sharded
+    london = router.shard_for_hotel(3)
+    data = BookStayInput(
+        hotel_id=3,
+        check_in_date="2026-05-01",
+        check_out_date="2026-05-03",
+        name="Carol White",
+        phone_number="555-4000",
+    )
+    stay = book_stay(data)
+    assert stay.booking_id == london.booking_id_floor
+    assert (stay.room.id, stay.customer_created) == (13, True)
+    with connector.connection() as conn:
+        assert (
+            conn.execute(
+                "SELECT name FROM customers WHERE id = ?", (stay.customer_id,)
+            ).fetchone()[0]
+            == "Carol White"
+        )
+
+    with pytest.raises(ValueError, match="Hotel not found"):
+        book_stay(data.model_copy(update={"hotel_id": 99}))
+
+
+def test_availability_reads_the_shard(sharded):
+    _book(13)  # first room of hotel 3, in London
+
+    rooms, _ = find_available_rooms(
+        SearchRoomsInput(
+            hotel_id=3,
+            check_in_date="2026-05-02",
+            check_out_date="2026-05-04",
+            min_capacity=1,
+        )
+    )
+    assert 13 not in [room["id"] for room in rooms]
+    assert len(rooms) == 5
+
+
+def test_reports_read_the_shards(sharded):
+    _book(13)  # London; the Paris shard holds the booking from before the split
+    period = {"start_date": "2026-05-01", "end_date": "2026-05-04"}
+
+    report = find_hotel_occupancy(HotelOccupancyInput(hotel_id=1, **period))
+    assert [day["rooms_booked"] for day in report["days"]] == [1, 1, 0]
+    assert report["revenue"] == 2 * 9001
+    with pytest.raises(ValueError, match="Hotel not found"):
+        find_hotel_occupancy(HotelOccupancyInput(hotel_id=99, **period))
+
+    locations = find_location_revenue(LocationRevenueInput(**period))
+    assert [
+        (location["location_id"], location["city"], location["room_nights"])
+        for location in locations
+    ] == [(1, "Paris", 2), (2, "London", 2)]
+    assert find_location_revenue(LocationRevenueInput(location_id=2, **period)) == [
+        locations[1]
+    ]
+
+
+def test_locations_added_after_the_split_have_no_shard(sharded):
+    with connector.connection() as conn:
+        location_id = conn.execute(
+            "INSERT INTO locations (city, country) VALUES ('Rome', 'Italy')"
+        ).lastrowid
+        hotel_id = conn.execute(
+            "INSERT INTO hotels (name, location_id) VALUES ('Hotel Roma', ?)",
+            (location_id,),
+        ).lastrowid
+        room_id = conn.execute(
+            """
+            INSERT INTO rooms (hotel_id, room_number, room_type, price_per_night, capacity)
+            VALUES (?, '1', 'Single', 9000, 1)
+            """,
+            (hotel_id,),
+        ).lastrowid
+        conn.commit()
+
+    unassigned = f"Location {location_id} is not assigned to a shard"
+    with pytest.raises(ValueError, match=unassigned):
+        _book(room_id)
+    with pytest.raises(ValueError, match=unassigned):
+        book_stay(
+            BookStayInput(
+                hotel_id=hotel_id,
+                check_in_date="2026-05-01",
+                check_out_date="2026-05-03",
+                name="Eve",
+                phone_number="555-0199",
+            )
+        )
+    with pytest.raises(ValueError, match=unassigned):
+        find_available_rooms(
+            SearchRoomsInput(
+                hotel_id=hotel_id,
+                check_in_date="2026-05-01",
+                check_out_date="2026-05-03",
+                min_capacity=1,
+            )
+        )
+    with pytest.raises(ValueError, match=unassigned):
+        find_hotel_occupancy(
+            HotelOccupancyInput(
+                hotel_id=hotel_id, start_date="2026-05-01", end_date="2026-05-03"
+            )
+        )
+
+
+def test_cancels_bookings_from_before_the_split(sharded):
+    _, legacy_id = sharded
+    cancel_booking(CancelBookingInput(booking_id=legacy_id))
+    _book(1)  # the room is free again
+
+    with pytest.raises(ValueError, match="Booking not found"):
+        cancel_booking(CancelBookingInput(booking_id=123))
+    with pytest.raises(ValueError, match="Booking not found"):
+        cancel_booking(CancelBookingInput(booking_id=3 * SHARD_ID_STRIDE))
+
+
+def test_hotel_search_merges_shards_like_one_database(db_path, tmp_path):
+    search = SearchLocationRoomsInput(
+        hotel_ids=[3, 1, 2],
+        check_in_date="2026-05-01",
+        check_out_date="2026-05-03",
+        min_capacity=2,
+        sort_by="price_desc",
+        rooms_per_hotel=2,
+        max_results=5,
+    )
+    _book(6)
+    expected = find_available_rooms_by_hotel(search)
+
+    connector.get_pool().close()
+    split_database(db_path, tmp_path / "split", 2)
+    connector.set_db_path(tmp_path / "split" / db_path.name)
+    enable_sharding()
+
+    assert find_available_rooms_by_hotel(search) == expected
+
+
+def test_refuses_to_split_twice(sharded, tmp_path):
+    with pytest.raises(ValueError, match="already been split"):
+        split_database(tmp_path / "split" / "bookings.db", tmp_path / "again", 2)
+    assert not (tmp_path / "again" / "bookings.db").exists()
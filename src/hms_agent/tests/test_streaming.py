@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from llama_index.core.memory import ChatMemoryBuffer
+from llama_index.core.workflow import Context
+
+from agent import build_agent, split_sentences, stream_user_message
+from compaction import ContextCompactor
+from conversations import ConversationService, _stream_lines
+from mock_llm import MockLLM
+
+
+def test_split_sentences_keeps_the_unfinished_rest():
+    assert split_sentences("Room 12 is free. It costs 80.50 EUR") == (
+        ["Room 12 is free."],
+        "It costs 80.50 EUR",
+    )
+    assert split_sentences('Booked! "Enjoy." See you\nBye') == (
+        ["Booked!", '"Enjoy."', "See you"],
+        "Bye",
+    )
+    assert split_sentences("Dates?") == ([], "Dates?")
+
+
+def _stream(message, by_sentence):
+    async def run():
+        llm = MockLLM(latency=0.01)
+        agent = build_agent([], agent_llm=llm)
+        memory = ChatMemoryBuffer.from_defaults(llm=llm)
+        return [
+            event
+            async for event in stream_user_message(
+                message,
+                agent,
+                Context(agent),
+                memory,
+                by_sentence,
+                ContextCompactor(tokenizer=list),
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_streams_deltas_then_reports_timings():
+    events = _stream("a room for two", by_sentence=False)
+    assert [e.text for e in events if e.kind == "text"] == [
+        "[1]",
+        " a",
+        " room",
+        " for",
+        " two",
+    ]
+    done = events[-1]
+    assert done.kind == "done" and done.text == "[1] a room for two"
+    assert 0.01 <= done.data["time_to_first_token"] <= done.data["duration"]
+    assert done.data["history_tokens"] == 0 and done.data["tokens_saved"] == 0
+
+
+def test_streams_whole_sentences():
+    events = _stream("Hello there. Any rooms? Two guests", by_sentence=True)
+    assert [e.text for e in events if e.kind == "text"] == [
+        "[1] Hello there.",
+        "Any rooms?",
+        "Two guests",
+    ]
+
+
+def test_service_streams_newline_delimited_json(tmp_path):
+    async def run():
+        service = ConversationService(
+            [], agent_llm=MockLLM(latency=0), store_dir=tmp_path
+        )
+        return [line async for line in _stream_lines(service, "a", "Hi. Bye")]
+
+    lines = [json.loads(line) for line in asyncio.run(run())]
+    assert lines[:2] == [{"text": "[1] Hi."}, {"text": "Bye"}]
+    assert lines[2]["reply"] == "[1] Hi. Bye" and "time_to_first_token" in lines[2]
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+from llama_index.core.tools import FunctionTool
+from pydantic import BaseModel
+
+from tool_cache import ToolCallCache, cache_tools
+
+
+class HotelsSchema(BaseModel):
+    location_id: Optional[int] = None
+    limit: int = 20
+
+
+class ReservationSchema(BaseModel):
+    room_id: int
+
+
+def _tools(calls):
+    """Fake MCP tools that record their calls and return CallToolResult-likes."""
+
+    async def search_hotels(**kwargs):
+        calls.append(("search_hotels", kwargs))
+        if kwargs.get("location_id") == 0:
+            return SimpleNamespace(isError=False, structuredContent={"error": "bad"})
+        return SimpleNamespace(
+            isError=False, structuredContent={"hotels": [len(calls)]}
+        )
+
+    async def create_reservation(**kwargs):
+        calls.append(("create_reservation", kwargs))
+        return SimpleNamespace(isError=False, structuredContent={"booking_id": 1})
+
+    return [
+        FunctionTool.from_defaults(
+            async_fn=search_hotels, name="search_hotels", fn_schema=HotelsSchema
+        ),
+        FunctionTool.from_defaults(
+            async_fn=create_reservation,
+            name="create_reservation",
+            fn_schema=ReservationSchema,
+        ),
+    ]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _call(tools, name, **kwargs):
+    tool = next(tool for tool in tools if tool.metadata.name == name)
+    return asyncio.run(tool.acall(**kwargs)).raw_output
+
+
+def test_memoizes_equivalent_reads():
+    calls = []
+    cache = ToolCallCache()
+    tools = cache_tools(_tools(calls), cache)
+
+    first = _call(tools, "search_hotels", location_id=1)
+    assert _call(tools, "search_hotels", location_id="1", limit=20) is first
+    assert _call(tools, "search_hotels", location_id=1, limit=5) is not first
+    assert _call(tools, "search_hotels") is not first
+    assert _call(tools, "search_hotels", location_id=None) is _call(
+        tools, "search_hotels"
+    )
+
+    assert len(calls) == 3
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 3,
+        "hit_rate": 0.5,
+        "invalidations": 0,
+        "entries": 3,
+    }
+
+
+def test_entries_expire_after_their_ttl():
+    calls = []
+    clock = Clock()
+    tools = cache_tools(_tools(calls), ToolCallCache({"search_hotels": 10}, clock))
+
+    _call(tools, "search_hotels", location_id=1)
+    clock.now = 9.9
+    _call(tools, "search_hotels", location_id=1)
+    clock.now = 10.0
+    _call(tools, "search_hotels", location_id=1)
+    assert len(calls) == 2
+
+
+def test_writes_invalidate_and_errors_are_not_cached():
+    calls = []
+    cache = ToolCallCache()
+    tools = cache_tools(_tools(calls), cache)
+
+    _call(tools, "search_hotels", location_id=1)
+    _call(tools, "create_reservation", room_id=3)
+    _call(tools, "create_reservation", room_id=3)
+    _call(tools, "search_hotels", location_id=1)
+    assert [name for name, _ in calls].count("create_reservation") == 2
+    assert [name for name, _ in calls].count("search_hotels") == 2
+    assert cache.stats()["invalidations"] == 1
+
+    _call(tools, "search_hotels", location_id=0)
+    _call(tools, "search_hotels", location_id=0)
+    assert len(calls) == 6
@@ -0,0 +1,162 @@
+import random
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from db.connector import connection
+from db.models import CancelBookingInput, CreateBookingInput
+from db.writer import WriteQueue, get_writer, start_writer
+from tools.bookings import cancel_booking, create_booking
+
+HOT_ROOMS = [1, 2, 3]
+
+
+def _overlapping_pairs():
+    with connection() as conn:
+        return conn.execute(
+            """
+            SELECT COUNT(*)
+            FROM bookings a
+            JOIN bookings b
+              ON a.room_id = b.room_id
+             AND a.id < b.id
+             AND a.check_in_date < b.check_out_date
+             AND b.check_in_date < a.check_out_date
+            WHERE a.status = 'confirmed' AND b.status = 'confirmed'
+            """
+        ).fetchone()[0]
+
+
+@pytest.mark.parametrize("use_writer", [True, False], ids=["writer", "direct"])
+def test_concurrent_bookings_never_overlap(db_path, use_writer, monkeypatch):
+    threads, per_thread = 32, 75
+    outcomes = {"booked": 0, "conflicts": 0}
+    lock = threading.Lock()
+
+    def guest(seed):
+        rng = random.Random(seed)
+        booked = conflicts = 0
+        for _ in range(per_thread):
+            check_in = date(2026, 7, 1) + timedelta(days=rng.randint(0, 60))
+            check_out = check_in + timedelta(days=rng.randint(1, 5))
+            try:
+                create_booking(
+                    CreateBookingInput(
+                        customer_id=1,
+                        room_id=rng.choice(HOT_ROOMS),
+                        check_in_date=check_in.isoformat(),
+                        check_out_date=check_out.isoformat(),
+                    )
+                )
+                booked += 1
+            except ValueError:
+                conflicts += 1
+        with lock:
+            outcomes["booked"] += booked
+            outcomes["conflicts"] += conflicts
+
+    workers = [threading.Thread(target=guest, args=(i,)) for i in range(threads)]
+    if use_writer:
+        writer = start_writer()
+        submitted = threading.Semaphore(0)
+        submit = writer.submit
+
+        def counting_submit(*args, **kwargs):
+            future = submit(*args, **kwargs)
+            submitted.release()
+            return future
+
+        monkeypatch.setattr(writer, "submit", counting_submit)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block(conn):
+            started.set()
+            release.wait()
+
+        blocker = submit(block)
+        started.wait()
+    for worker in workers:
+        worker.start()
+    if use_writer:
+        # Every guest's first booking queues while the writer is busy
+        for _ in range(threads):
+            submitted.acquire()
+        release.set()
+        blocker.result()
+    for worker in workers:
+        worker.join()
+
+    total = threads * per_thread
+    assert outcomes["booked"] + outcomes["conflicts"] == total
+    assert outcomes["booked"] > 0
+    assert _overlapping_pairs() == 0
+    with connection() as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+    assert stored == outcomes["booked"]
+
+    if use_writer:
+        stats = get_writer().stats()
+        assert stats["commands"] == total + 1
+        # Concurrent submitters must have been grouped into shared commits
+        assert stats["max_batch"] == threads
+
+
+def test_failed_command_does_not_abort_its_batch(db_path):
+    writer = WriteQueue()
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait()
+
+    def insert(conn, name):
+        conn.execute(
+            "INSERT INTO customers (name, phone_number) VALUES (?, ?)", (name, name)
+        )
+
+    writer.start()
+    try:
+        blocker = writer.submit(block)
+        started.wait()
+        # Queued while the writer is busy, so these three share one batch
+        first = writer.submit(insert, "555-1000")
+        duplicate = writer.submit(insert, "555-0123")
+        last = writer.submit(insert, "555-1001")
+        release.set()
+
+        blocker.result()
+        first.result()
+        last.result()
+        with pytest.raises(Exception, match="UNIQUE"):
+            duplicate.result()
+        assert writer.stats()["max_batch"] == 3
+    finally:
+        writer.stop()
+
+    with connection() as conn:
+        phones = {row[0] for row in conn.execute("SELECT phone_number FROM customers")}
+    assert {"555-1000", "555-1001"} <= phones
+
+
+def test_cancel_through_writer(db_path):
+    start_writer()
+    booking = create_booking(
+        CreateBookingInput(
+            customer_id=1,
+            room_id=1,
+            check_in_date="2026-08-01",
+            check_out_date="2026-08-03",
+        )
+    )
+    cancel_booking(CancelBookingInput(booking_id=booking.booking_id))
+    with pytest.raises(ValueError, match="Booking not found"):
+        cancel_booking(CancelBookingInput(booking_id=9999))
+
+    with connection() as conn:
+        status = conn.execute(
+            "SELECT status FROM bookings WHERE id = ?", (booking.booking_id,)
+        ).fetchone()[0]
+    assert status == "cancelled"
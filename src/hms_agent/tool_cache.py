@@ -0,0 +1,161 @@
+import json
+import time
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from llama_index.core.tools import FunctionTool
+
+# Seconds a read-only tool result is reused within a conversation. Reference
+# data barely changes; availability, customers and reports can be changed by
+# other sessions, so they are only reused for a short while.
+DEFAULT_TTLS: dict[str, float] = {
+    "search_locations": 600.0,
+    "search_hotels": 600.0,
+    "list_hotel_rooms": 600.0,
+    "search_rooms": 30.0,
+    "search_rooms_by_location": 30.0,
+    "search_customers": 30.0,
+    "hotel_occupancy_report": 30.0,
+    "location_revenue_report": 30.0,
+}
+
+# Tools that change data; any of them drops every cached result
+WRITE_TOOLS = frozenset(
+    {
+        "create_reservation",
+        "create_group_reservation",
+        "cancel_reservation",
+        "create_customer_entry",
+        "book_stay",
+    }
+)
+
+
+def structured_content(result: Any) -> Any:
+    """The structured payload of a CallToolResult (renamed in mcp 2)."""
+    structured = getattr(result, "structuredContent", None)
+    if structured is None:
+        structured = getattr(result, "structured_content", None)
+    return structured
+
+
+def _is_error(result: Any) -> bool:
+    """Whether an MCP tool result reports a failure, which is never cached."""
+    if getattr(result, "isError", False) or getattr(result, "is_error", False):
+        return True
+    structured = structured_content(result)
+    return isinstance(structured, dict) and "error" in structured
+
+
+class ToolCallCache:
+    """Memoizes read-only MCP tool calls for one conversation.
+
+    Results are keyed by tool name and normalized arguments and reused until
+    their tool's TTL runs out or a write tool is called. Create one cache per
+    conversation; results are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] = DEFAULT_TTLS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttls = dict(ttls)
+        self._clock = clock
+        self._entries: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def key(tool_name: str, kwargs: Mapping[str, Any]) -> tuple[str, str]:
+        """Cache key: omitted and null arguments are the same, strings are
+        compared without surrounding whitespace and argument order is ignored."""
+
+        def normalize(value):
+            if isinstance(value, str):
+                return value.strip()
+            if isinstance(value, (list, tuple)):
+                return [normalize(item) for item in value]
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items() if v is not None}
+            return value
+
+        return tool_name, json.dumps(
+            normalize(dict(kwargs)), sort_keys=True, default=str
+        )
+
+    async def call(
+        self, tool_name: str, kwargs: Mapping[str, Any], fn: Callable[[], Awaitable]
+    ) -> Any:
+        """Result of the tool call ``fn()``, from the cache when still fresh."""
+        if tool_name in WRITE_TOOLS:
+            try:
+                return await fn()
+            finally:
+                self.invalidate()
+
+        ttl = self.ttls.get(tool_name)
+        if ttl is None:
+            return await fn()
+
+        key = self.key(tool_name, kwargs)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self._hits += 1
+            return entry[1]
+
+        self._misses += 1
+        result = await fn()
+        if not _is_error(result):
+            self._entries[key] = (self._clock() + ttl, result)
+        return result
+
+    def invalidate(self) -> None:
+        if self._entries:
+            self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "invalidations": self._invalidations,
+            "entries": len(self._entries),
+        }
+
+
+def _normalized_kwargs(tool: FunctionTool, kwargs: dict) -> dict:
+    # Validate against the tool's schema so "3" and 3, or an omitted default
+    # and the default itself, share a cache entry; the server validates again
+    schema = tool.metadata.fn_schema
+    if schema is None:
+        return kwargs
+    try:
+        return schema(**kwargs).model_dump()
+    except Exception:
+        return kwargs
+
+
+def cache_tools(
+    tools: list[FunctionTool], cache: Optional[ToolCallCache] = None
+) -> list[FunctionTool]:
+    """Wrap MCP tools so their calls go through ``cache``."""
+    cache = cache or ToolCallCache()
+
+    def wrap(tool: FunctionTool) -> FunctionTool:
+        name = tool.metadata.get_name()
+
+        async def cached_fn(**kwargs):
+            return await cache.call(
+                name, _normalized_kwargs(tool, kwargs), lambda: tool.async_fn(**kwargs)
+            )
+
+        return FunctionTool.from_defaults(
+            async_fn=cached_fn,
+            tool_metadata=tool.metadata,
+            partial_params=tool.partial_params,
+        )
+
+    return [wrap(tool) for tool in tools]
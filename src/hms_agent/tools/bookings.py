@@ -1,82 +1,364 @@
-from db.connector import get_connection
-from db.models import CreateBookingInput, BookingOutput, CancelBookingInput
+import sqlite3
+from typing import Optional
+
+from db.models import (
+    ROOM_COLUMNS,
+    BookStayInput,
+    BookStayOutput,
+    CreateBookingInput,
+    BookingOutput,
+    CancelBookingInput,
+    CustomerCreateInput,
+    GroupBookingInput,
+    GroupBookingOutput,
+    day_number,
+)
+from db.occupancy import get_occupancy
+from db.shards import get_router
+from db.writer import run_write_transaction
+from tools.customers import find_or_insert_customer
+
+# Whether the room is taken for the stay, from (room_id, check_out_day,
+# check_in_day); no row when the room does not exist, as foreign keys are not
+# enforced. Two stays overlap when each one starts before the other ends.
+OVERLAP_QUERY = """
+    SELECT EXISTS (
+      SELECT 1 FROM bookings
+      WHERE room_id = ?1
+        AND status = 'confirmed'
+        AND check_in_day < ?2
+        AND check_out_day > ?3
+    )
+    FROM rooms
+    WHERE id = ?1
+"""
+
+# Inside a shard, new bookings take the next id of the shard's own id range so
+# that the id alone says where the booking lives
+SHARD_INSERT_QUERY = """
+    INSERT INTO bookings (
+      id, customer_id, room_id, check_in_date, check_out_date, status,
+      check_in_day, check_out_day
+    )
+    VALUES (
+      (SELECT COALESCE(MAX(id), ?) + 1 FROM bookings WHERE id >= ?),
+      ?, ?, ?, ?, 'confirmed', ?, ?
+    )
+"""
+
+# New bookings carry their day numbers, so the insert trigger has no work
+INSERT_QUERY = """
+    INSERT INTO bookings (
+      customer_id, room_id, check_in_date, check_out_date, status,
+      check_in_day, check_out_day
+    )
+    VALUES (?, ?, ?, ?, 'confirmed', ?, ?)
+"""
+
+# Every room of a group with whether it is taken for the stay, in one
+# statement; rooms that do not exist are missing from the result. The room id
+# list is filled in by insert_group_booking.
+GROUP_OVERLAP_QUERY = """
+    SELECT r.id, EXISTS (
+      SELECT 1 FROM bookings b
+      WHERE b.room_id = r.id
+        AND b.status = 'confirmed'
+        AND b.check_in_day < ?
+        AND b.check_out_day > ?
+    )
+    FROM rooms r
+    WHERE r.id IN ({room_ids})
+"""
+
+# The room book_stay picks: the smallest free room of the hotel that fits the
+# party, cheapest first, optionally of one room type
+STAY_ROOM_QUERY = """
+    SELECT r.id, r.room_number, r.room_type, r.price_per_night, r.capacity
+    FROM rooms r
+    WHERE r.hotel_id = ?
+      AND r.capacity >= ?
+      AND (? IS NULL OR r.room_type = ? COLLATE NOCASE)
+      AND NOT EXISTS (
+        SELECT 1 FROM bookings b
+        WHERE b.room_id = r.id
+          AND b.status = 'confirmed'
+          AND b.check_in_day < ?
+          AND b.check_out_day > ?
+      )
+    ORDER BY r.capacity, r.price_per_night, r.id
+    LIMIT 1
+"""
+
+
+def insert_booking(
+    conn: sqlite3.Connection, data: CreateBookingInput, id_floor: Optional[int] = None
+) -> BookingOutput:
+    """Check availability and insert the booking. Must run in a write transaction.
+
+    ``id_floor`` is the first booking id of the shard ``conn`` belongs to.
+    """
+    cur = conn.cursor()
+    check_in_day = day_number(data.check_in_date)
+    check_out_day = day_number(data.check_out_date)
+
+    # Availability check (date overlap)
+    cur.execute(OVERLAP_QUERY, (data.room_id, check_out_day, check_in_day))
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError("Room not found")
+    if row[0]:
+        raise ValueError("Room is not available for selected dates")
+
+    booking = (
+        data.customer_id,
+        data.room_id,
+        data.check_in_date,
+        data.check_out_date,
+        check_in_day,
+        check_out_day,
+    )
+    if id_floor is None:
+        cur.execute(INSERT_QUERY, booking)
+    else:
+        cur.execute(SHARD_INSERT_QUERY, (id_floor - 1, id_floor, *booking))
+
+    return BookingOutput(
+        booking_id=cur.lastrowid,
+        status="confirmed",
+    )
+
+
+def _mark_booked(data: CreateBookingInput):
+    def on_commit(_result: BookingOutput) -> None:
+        occupancy = get_occupancy()
+        if occupancy is not None:
+            occupancy.mark(data.room_id, data.check_in_date, data.check_out_date)
+
+    return on_commit
 
 
 def create_booking(data: CreateBookingInput) -> BookingOutput:
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # Availability check (date overlap)
-        cur.execute(
-            """
-            SELECT 1 FROM bookings
-            WHERE room_id = ?
-              AND status = 'confirmed'
-              AND NOT (
-                check_out_date <= ?
-                OR check_in_date >= ?
-              )
-            """,
-            (data.room_id, data.check_in_date, data.check_out_date),
+    router = get_router()
+    if router is None:
+        return run_write_transaction(insert_booking, data, on_commit=_mark_booked(data))
+
+    shard = router.shard_for_room(data.room_id)
+    if shard is None:
+        raise ValueError("Room not found")
+    return shard.write(
+        insert_booking, data, shard.booking_id_floor, on_commit=_mark_booked(data)
+    )
+
+
+def insert_group_booking(
+    conn: sqlite3.Connection, data: GroupBookingInput, id_floor: Optional[int] = None
+) -> GroupBookingOutput:
+    """Check every room of the group at once and book them all, or none.
+    Must run in a write transaction."""
+    cur = conn.cursor()
+    check_in_day = day_number(data.check_in_date)
+    check_out_day = day_number(data.check_out_date)
+    cur.execute(
+        GROUP_OVERLAP_QUERY.format(room_ids=", ".join("?" * len(data.room_ids))),
+        (check_out_day, check_in_day, *data.room_ids),
+    )
+    taken = dict(cur.fetchall())
+    missing = [room_id for room_id in data.room_ids if room_id not in taken]
+    if missing:
+        raise ValueError(f"Room not found: {', '.join(map(str, missing))}")
+    busy = [room_id for room_id in data.room_ids if taken[room_id]]
+    if busy:
+        raise ValueError(
+            f"Rooms {', '.join(map(str, busy))} are not available for selected dates"
         )
 
-        if cur.fetchone():
-            raise ValueError("Room is not available for selected dates")
-
-        cur.execute(
-            """
-            INSERT INTO bookings (customer_id, room_id, check_in_date, check_out_date, status)
-            VALUES (?, ?, ?, ?, 'confirmed')
-            """,
-            (
-                data.customer_id,
-                data.room_id,
-                data.check_in_date,
-                data.check_out_date,
-            ),
+    bookings = []
+    for room_id in data.room_ids:
+        booking = (
+            data.customer_id,
+            room_id,
+            data.check_in_date,
+            data.check_out_date,
+            check_in_day,
+            check_out_day,
         )
+        if id_floor is None:
+            cur.execute(INSERT_QUERY, booking)
+        else:
+            cur.execute(SHARD_INSERT_QUERY, (id_floor - 1, id_floor, *booking))
+        bookings.append({"booking_id": cur.lastrowid, "room_id": room_id})
+
+    return GroupBookingOutput(status="confirmed", bookings=bookings)
+
+
+def _mark_group_booked(data: GroupBookingInput):
+    def on_commit(_result: GroupBookingOutput) -> None:
+        occupancy = get_occupancy()
+        if occupancy is not None:
+            for room_id in data.room_ids:
+                occupancy.mark(room_id, data.check_in_date, data.check_out_date)
+
+    return on_commit
 
-        conn.commit()
-        booking_id = cur.lastrowid
 
-        return BookingOutput(
-            booking_id=booking_id,
-            status="confirmed",
+def create_group_booking(data: GroupBookingInput) -> GroupBookingOutput:
+    """Book all rooms of ``data`` in one transaction, or none of them."""
+    router = get_router()
+    if router is None:
+        return run_write_transaction(
+            insert_group_booking, data, on_commit=_mark_group_booked(data)
         )
-    except Exception:
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
 
+    # Only one shard's transaction can hold the whole group
+    shards = {router.shard_for_room(room_id) for room_id in data.room_ids}
+    if None in shards:
+        raise ValueError("Room not found")
+    if len(shards) > 1:
+        raise ValueError("All rooms of a group booking must be in the same location")
+    shard = shards.pop()
+    return shard.write(
+        insert_group_booking,
+        data,
+        shard.booking_id_floor,
+        on_commit=_mark_group_booked(data),
+    )
 
-def cancel_booking(data: CancelBookingInput) -> None:
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            UPDATE bookings
-            SET status = 'cancelled'
-            WHERE id = ?
-            """,
-            (data.booking_id,),
+
+def insert_stay(
+    conn: sqlite3.Connection,
+    data: BookStayInput,
+    customer_id: int,
+    customer_created: bool = False,
+    id_floor: Optional[int] = None,
+) -> BookStayOutput:
+    """Pick a free room matching ``data`` and book it for ``customer_id``.
+    Must run in a write transaction."""
+    row = conn.execute(
+        STAY_ROOM_QUERY,
+        (
+            data.hotel_id,
+            data.min_capacity,
+            data.room_type,
+            data.room_type,
+            day_number(data.check_out_date),
+            day_number(data.check_in_date),
+        ),
+    ).fetchone()
+    if row is None:
+        raise ValueError("No matching room is available for selected dates")
+    room = dict(zip(ROOM_COLUMNS, row))
+
+    booking = insert_booking(
+        conn,
+        CreateBookingInput(
+            customer_id=customer_id,
+            room_id=room["id"],
+            check_in_date=data.check_in_date,
+            check_out_date=data.check_out_date,
+        ),
+        id_floor,
+    )
+    return BookStayOutput(
+        booking_id=booking.booking_id,
+        status=booking.status,
+        customer_id=customer_id,
+        customer_created=customer_created,
+        hotel_id=data.hotel_id,
+        room=room,
+        check_in_date=data.check_in_date,
+        check_out_date=data.check_out_date,
+    )
+
+
+def insert_guest_stay(conn: sqlite3.Connection, data: BookStayInput) -> BookStayOutput:
+    """Resolve or register the guest by phone, then ``insert_stay``. Must run
+    in a write transaction, so a stay that cannot be booked registers no one."""
+    customer, created = find_or_insert_customer(
+        conn, CustomerCreateInput(name=data.name, phone_number=data.phone_number)
+    )
+    return insert_stay(conn, data, customer.id, created)
+
+
+def _mark_stay(result: BookStayOutput) -> None:
+    occupancy = get_occupancy()
+    if occupancy is not None:
+        occupancy.mark(result.room.id, result.check_in_date, result.check_out_date)
+
+
+def book_stay(data: BookStayInput) -> BookStayOutput:
+    """Find or register the guest, pick a free room and book it in one call."""
+    router = get_router()
+    if router is None:
+        return run_write_transaction(insert_guest_stay, data, on_commit=_mark_stay)
+
+    shard = router.shard_for_hotel(data.hotel_id)
+    if shard is None:
+        raise ValueError("Hotel not found")
+    # Customers live in the catalogue and bookings in the shard, so the two
+    # writes cannot share a transaction; a guest registered for a stay that
+    # then fails keeps the profile
+    customer, created = run_write_transaction(
+        find_or_insert_customer,
+        CustomerCreateInput(name=data.name, phone_number=data.phone_number),
+    )
+    return shard.write(
+        insert_stay,
+        data,
+        customer.id,
+        created,
+        shard.booking_id_floor,
+        on_commit=_mark_stay,
+    )
+
+
+def mark_booking_cancelled(
+    conn: sqlite3.Connection, data: CancelBookingInput
+) -> sqlite3.Row:
+    """Cancel the booking and return its previous row. Must run in a write transaction."""
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT room_id, check_in_date, check_out_date, status
+        FROM bookings
+        WHERE id = ?
+        """,
+        (data.booking_id,),
+    )
+    booking = cur.fetchone()
+
+    cur.execute(
+        """
+        UPDATE bookings
+        SET status = 'cancelled'
+        WHERE id = ?
+        """,
+        (data.booking_id,),
+    )
+
+    if cur.rowcount == 0:
+        raise ValueError("Booking not found")
+
+    return booking
+
+
+def _release_nights(booking: sqlite3.Row) -> None:
+    occupancy = get_occupancy()
+    if occupancy is not None and booking["status"] == "confirmed":
+        occupancy.clear(
+            booking["room_id"],
+            booking["check_in_date"],
+            booking["check_out_date"],
         )
 
-        if cur.rowcount == 0:
-            raise ValueError("Booking not found")
-
-        conn.commit()
-    except Exception:
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
+
+def cancel_booking(data: CancelBookingInput) -> None:
+    router = get_router()
+    if router is None:
+        run_write_transaction(mark_booking_cancelled, data, on_commit=_release_nights)
+        return
+
+    shard = router.find_booking_shard(data.booking_id)
+    if shard is None:
+        raise ValueError("Booking not found")
+    shard.write(mark_booking_cancelled, data, on_commit=_release_nights)
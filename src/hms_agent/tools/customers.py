@@ -1,66 +1,141 @@
-from db.connector import get_connection
-from db.models import CustomerSearchInput, CustomerCreateInput, CustomerOutput
+import sqlite3
+from typing import Optional
 
+from db.connector import connection
+from db.models import (
+    CustomerCreateInput,
+    CustomerOutput,
+    CustomerSearchInput,
+    customer_list_adapter,
+    normalize_phone,
+)
+from db.pagination import decode_cursor, page
+from db.writer import run_write_transaction
 
-def get_customer(data: CustomerSearchInput) -> list[CustomerOutput]:
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
 
-        query = "SELECT id, name, phone_number FROM customers WHERE 1=1"
-        params = []
+# Trigram matching needs at least three characters; shorter fragments fall
+# back to a (bounded) LIKE scan
+MIN_FTS_QUERY_LENGTH = 3
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def find_customers(
+    data: CustomerSearchInput,
+) -> tuple[list[dict], Optional[str]]:
+    """A page of matching customers, best match first, and the next cursor.
+
+    Name searches page on (rank, id); rank depends on the whole index, so
+    customers added between two pages can shift the boundary slightly.
+    Other searches page on id.
+    """
+    with connection() as conn:
+        cur = conn.cursor()
 
-        if data.name:
-            query += " AND name LIKE ?"
-            params.append(f"%{data.name}%")
+        name = data.name.strip() if data.name else None
+        if name and len(name) >= MIN_FTS_QUERY_LENGTH:
+            kind = "customers-ranked"
+            query = """
+                SELECT c.id, c.name, c.phone_number, f.rank
+                FROM customers_fts f
+                JOIN customers c ON c.id = f.rowid
+                WHERE customers_fts MATCH ?
+            """
+            params = [_fts_phrase(name)]
+            keyset = " AND (f.rank, c.id) > (?, ?)"
+            order = " ORDER BY f.rank, c.id"
+        else:
+            kind = "customers"
+            query = """
+                SELECT c.id, c.name, c.phone_number
+                FROM customers c
+                WHERE 1=1
+            """
+            params = []
+            keyset = " AND c.id > ?"
+            order = " ORDER BY c.id"
+            if name:
+                query += " AND c.name LIKE ?"
+                params.append(f"%{name}%")
 
         if data.phone_number:
-            query += " AND phone_number = ?"
-            params.append(data.phone_number)
+            query += " AND (c.phone_normalized = ? OR c.phone_number = ?)"
+            params.extend([normalize_phone(data.phone_number), data.phone_number])
+
+        after = decode_cursor(kind, data.cursor)
+        if after is not None:
+            query += keyset
+            params.extend(after)
 
-        cur.execute(query, params)
+        cur.execute(query + order + " LIMIT ?", (*params, data.limit + 1))
         rows = cur.fetchall()
 
-        return [
-            CustomerOutput(
-                id=row["id"],
-                name=row["name"],
-                phone_number=row["phone_number"],
-            )
-            for row in rows
-        ]
-    finally:
-        if conn:
-            conn.close()
+    if kind == "customers-ranked":
+        rows, next_cursor = page(rows, data.limit, kind, lambda row: [row[3], row[0]])
+    else:
+        rows, next_cursor = page(rows, data.limit, kind, lambda row: [row[0]])
+    customers = [{"id": row[0], "name": row[1], "phone_number": row[2]} for row in rows]
+    return customers, next_cursor
 
 
-def create_customer(data: CustomerCreateInput) -> CustomerOutput:
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
+def get_customer(data: CustomerSearchInput) -> list[CustomerOutput]:
+    customers, _ = find_customers(data)
+    return customer_list_adapter.validate_python(customers)
 
-        cur.execute(
-            """
-            INSERT INTO customers (name, phone_number)
-            VALUES (?, ?)
-            """,
-            (data.name, data.phone_number),
-        )
-
-        conn.commit()
-        customer_id = cur.lastrowid
-
-        return CustomerOutput(
-            id=customer_id,
-            name=data.name,
-            phone_number=data.phone_number,
-        )
-    except Exception:
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
+
+def _customer_by_phone(conn: sqlite3.Connection, phone_number: str):
+    return conn.execute(
+        """
+        SELECT id, name, phone_number
+        FROM customers
+        WHERE phone_normalized = ? OR phone_number = ?
+        ORDER BY id
+        LIMIT 1
+        """,
+        (normalize_phone(phone_number), phone_number),
+    ).fetchone()
+
+
+def insert_customer(
+    conn: sqlite3.Connection, data: CustomerCreateInput
+) -> CustomerOutput:
+    """Insert a new customer. Must run in a write transaction."""
+    if _customer_by_phone(conn, data.phone_number) is not None:
+        raise ValueError("A customer with this phone number already exists")
+
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        INSERT INTO customers (name, phone_number, phone_normalized)
+        VALUES (?, ?, ?)
+        """,
+        (data.name, data.phone_number, normalize_phone(data.phone_number)),
+    )
+
+    return CustomerOutput(
+        id=cur.lastrowid,
+        name=data.name,
+        phone_number=data.phone_number,
+    )
+
+
+def find_or_insert_customer(
+    conn: sqlite3.Connection, data: CustomerCreateInput
+) -> tuple[CustomerOutput, bool]:
+    """The customer with ``data``'s phone number, inserting them if there is
+    none, and whether they were inserted. Must run in a write transaction.
+
+    The phone number identifies the guest; the stored name is kept even if
+    ``data`` spells it differently.
+    """
+    row = _customer_by_phone(conn, data.phone_number)
+    if row is not None:
+        return CustomerOutput(id=row[0], name=row[1], phone_number=row[2]), False
+    return insert_customer(conn, data), True
+
+
+def create_customer(data: CustomerCreateInput) -> CustomerOutput:
+    return run_write_transaction(insert_customer, data)
@@ -1,39 +1,58 @@
-from db.connector import get_connection
+from typing import Optional
+
+from db.cache import reference_cache
+from db.connector import connection
 from db.models import HotelsInput
 from db.models import HotelsOutput
+from db.pagination import decode_cursor, page
 
 
-def get_hotels(data: HotelsInput) -> list[HotelsOutput]:
-    conn = None
-    try:
-        conn = get_connection()
+def find_hotels(data: HotelsInput) -> tuple[list[dict], Optional[str]]:
+    """One page of hotels in id order, and the cursor of the next page."""
+    after = decode_cursor("hotels", data.cursor)
+    after_id = after[0] if after else 0
+
+    with connection() as conn:
         cur = conn.cursor()
+        # id is the rowid, so both queries walk an index in order
         if data.location_id is not None:
             cur.execute(
                 """
-                SELECT h.*
+                SELECT h.id, h.name
                 FROM hotels h
                 WHERE h.location_id = ?
+                  AND h.id > ?
+                ORDER BY h.id
+                LIMIT ?
                 """,
-                (data.location_id,),
+                (data.location_id, after_id, data.limit + 1),
             )
         else:
             cur.execute(
                 """
-                SELECT h.*
+                SELECT h.id, h.name
                 FROM hotels h
-                """
+                WHERE h.id > ?
+                ORDER BY h.id
+                LIMIT ?
+                """,
+                (after_id, data.limit + 1),
             )
 
         rows = cur.fetchall()
 
-        return [
-            HotelsOutput(
-                id=row["id"],
-                name=row["name"],
-            )
-            for row in rows
-        ]
-    finally:
-        if conn:
-            conn.close()
+    rows, next_cursor = page(rows, data.limit, "hotels", lambda row: [row[0]])
+    return [{"id": row[0], "name": row[1]} for row in rows], next_cursor
+
+
+def get_hotels(data: HotelsInput) -> list[HotelsOutput]:
+    hotels, _ = find_hotels(data)
+    return [HotelsOutput(**hotel) for hotel in hotels]
+
+
+def get_cached_hotels(data: HotelsInput) -> tuple[list[dict], Optional[str]]:
+    """A page of hotels from the reference cache. Do not mutate the result."""
+    return reference_cache.get(
+        ("hotels", data.location_id, data.limit, data.cursor),
+        lambda: find_hotels(data),
+    )
@@ -1,11 +1,10 @@
-from db.connector import get_connection
+from db.cache import reference_cache
+from db.connector import connection
 from db.models import LocationsOutput
 
 
 def get_locations() -> list[LocationsOutput]:
-    conn = None
-    try:
-        conn = get_connection()
+    with connection() as conn:
         cur = conn.cursor()
 
         cur.execute(
@@ -25,6 +24,11 @@ def get_locations() -> list[LocationsOutput]:
             )
             for row in rows
         ]
-    finally:
-        if conn:
-            conn.close()
+
+
+def get_cached_locations() -> list[dict]:
+    """Serialized locations from the reference cache. Do not mutate the result."""
+    return reference_cache.get(
+        ("locations",),
+        lambda: [location.model_dump() for location in get_locations()],
+    )
@@ -0,0 +1,112 @@
+from db.connector import connection
+from db.daily_stats import hotel_occupancy_report, location_revenue
+from db.models import HotelOccupancyInput, LocationRevenueInput, day_number
+from db.shards import get_router
+
+HOTEL_QUERY = """
+    SELECT h.name, (SELECT COUNT(*) FROM rooms r WHERE r.hotel_id = h.id)
+    FROM hotels h
+    WHERE h.id = ?
+"""
+
+# One primary-key range read of hotel_daily_stats, a row per booked day
+HOTEL_DAILY_STATS_QUERY = """
+    SELECT day, rooms_booked, revenue
+    FROM hotel_daily_stats
+    WHERE hotel_id = ? AND day >= ? AND day < ?
+    ORDER BY day
+"""
+
+# Per-location totals in LOCATION_REVENUE_COLUMNS order: every hotel of the
+# locations reads its range of hotel_daily_stats, so the cost grows with
+# hotels x days and not with bookings. The location filter is filled in by
+# find_location_revenue.
+LOCATION_REVENUE_QUERY = """
+    WITH hotel_totals AS (
+      SELECT h.id,
+             h.location_id,
+             (SELECT COUNT(*) FROM rooms r WHERE r.hotel_id = h.id) AS rooms,
+             COALESCE(SUM(s.rooms_booked), 0) AS room_nights,
+             COALESCE(SUM(s.revenue), 0) AS revenue
+      FROM hotels h
+      LEFT JOIN hotel_daily_stats s
+        ON s.hotel_id = h.id AND s.day >= ? AND s.day < ?
+      WHERE {location_filter}
+      GROUP BY h.id
+    )
+    SELECT t.location_id, l.city, l.country, COUNT(*), SUM(t.rooms),
+           SUM(t.room_nights), SUM(t.revenue)
+    FROM hotel_totals t
+    JOIN locations l ON l.id = t.location_id
+    GROUP BY t.location_id
+    ORDER BY t.location_id
+"""
+
+
+def find_hotel_occupancy(data: HotelOccupancyInput) -> dict:
+    """Rooms booked, occupancy and revenue of a hotel for each day of the
+    period, from the maintained daily stats."""
+    start_day = day_number(data.start_date)
+    end_day = day_number(data.end_date)
+
+    def report(conn) -> dict:
+        hotel = conn.execute(HOTEL_QUERY, (data.hotel_id,)).fetchone()
+        if hotel is None:
+            raise ValueError("Hotel not found")
+        stats = conn.execute(
+            HOTEL_DAILY_STATS_QUERY, (data.hotel_id, start_day, end_day)
+        ).fetchall()
+        return hotel_occupancy_report(
+            data.hotel_id, hotel[0], hotel[1], start_day, end_day, stats
+        )
+
+    router = get_router()
+    if router is None:
+        with connection() as conn:
+            return report(conn)
+
+    shard = router.shard_for_hotel(data.hotel_id)
+    if shard is None:
+        raise ValueError("Hotel not found")
+    with shard.connection() as conn:
+        return report(conn)
+
+
+def find_location_revenue(data: LocationRevenueInput) -> list[dict]:
+    """Room nights, occupancy and revenue per location over the period, in
+    location id order; locations without hotels are left out."""
+    start_day = day_number(data.start_date)
+    end_day = day_number(data.end_date)
+    if data.location_id is not None:
+        location_filter, params = "h.location_id = ?", [data.location_id]
+    else:
+        location_filter, params = "h.location_id IS NOT NULL", []
+
+    def query(conn) -> list:
+        return conn.execute(
+            LOCATION_REVENUE_QUERY.format(location_filter=location_filter),
+            (start_day, end_day, *params),
+        ).fetchall()
+
+    router = get_router()
+    if router is None:
+        with connection() as conn:
+            rows = query(conn)
+    elif data.location_id is not None:
+        shard = router.shard_for_location(data.location_id)
+        rows = []
+        if shard is not None:
+            with shard.connection() as conn:
+                rows = query(conn)
+    else:
+        # Each shard holds whole locations, so the shards' rows only need
+        # merging
+        def report(shard) -> list:
+            with shard.connection() as conn:
+                return query(conn)
+
+        shards = list(router.shards.values())
+        rows = [row for rows in router.map(report, shards) for row in rows]
+        rows.sort(key=lambda row: row[0])
+
+    return [location_revenue(row, end_day - start_day) for row in rows]
@@ -0,0 +1,150 @@
+from typing import Optional, Protocol
+
+from db.connector import connection
+from db.memory import MemoryRepository
+from db.models import (
+    BookingOutput,
+    BookStayInput,
+    BookStayOutput,
+    CancelBookingInput,
+    CreateBookingInput,
+    CustomerCreateInput,
+    CustomerOutput,
+    CustomerSearchInput,
+    GroupBookingInput,
+    GroupBookingOutput,
+    HotelOccupancyInput,
+    HotelRoomsInput,
+    HotelsInput,
+    LocationRevenueInput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+)
+from tools.bookings import (
+    book_stay,
+    cancel_booking,
+    create_booking,
+    create_group_booking,
+)
+from tools.customers import create_customer, find_customers
+from tools.hotels import get_cached_hotels
+from tools.locations import get_cached_locations
+from tools.reports import find_hotel_occupancy, find_location_revenue
+from tools.rooms import (
+    find_available_rooms,
+    find_available_rooms_by_hotel,
+    get_cached_hotel_rooms,
+)
+
+
+class Repository(Protocol):
+    """Storage operations behind the MCP tools.
+
+    Results are the plain dicts the tools return to clients; paged searches
+    also return the cursor of the next page. Returned values may be shared
+    and must not be mutated. Domain errors (conflicts, unknown bookings and
+    rooms, duplicate customers) raise ValueError with the same message in
+    every backend.
+
+    Backends agree on which rows match, not always on their order: name
+    searches are ranked on SQLite and in id order in memory. Cursors are
+    therefore only valid with the backend that issued them.
+    """
+
+    def list_locations(self) -> list[dict]: ...
+
+    def find_hotels(self, data: HotelsInput) -> tuple[list[dict], Optional[str]]: ...
+
+    def find_hotel_rooms(self, data: HotelRoomsInput) -> list[dict]: ...
+
+    def find_available_rooms(
+        self, data: SearchRoomsInput
+    ) -> tuple[list[dict], Optional[str]]: ...
+
+    def find_available_rooms_by_hotel(
+        self, data: SearchLocationRoomsInput
+    ) -> list[dict]: ...
+
+    def find_customers(
+        self, data: CustomerSearchInput
+    ) -> tuple[list[dict], Optional[str]]: ...
+
+    def create_customer(self, data: CustomerCreateInput) -> CustomerOutput: ...
+
+    def create_booking(self, data: CreateBookingInput) -> BookingOutput: ...
+
+    def create_group_booking(self, data: GroupBookingInput) -> GroupBookingOutput: ...
+
+    def book_stay(self, data: BookStayInput) -> BookStayOutput: ...
+
+    def cancel_booking(self, data: CancelBookingInput) -> None: ...
+
+    def find_hotel_occupancy(self, data: HotelOccupancyInput) -> dict: ...
+
+    def find_location_revenue(self, data: LocationRevenueInput) -> list[dict]: ...
+
+
+class SQLiteRepository:
+    """The SQLite tool functions, with reference data from the cache."""
+
+    def list_locations(self) -> list[dict]:
+        return get_cached_locations()
+
+    def find_hotels(self, data: HotelsInput) -> tuple[list[dict], Optional[str]]:
+        return get_cached_hotels(data)
+
+    def find_hotel_rooms(self, data: HotelRoomsInput) -> list[dict]:
+        return get_cached_hotel_rooms(data)
+
+    def find_available_rooms(
+        self, data: SearchRoomsInput
+    ) -> tuple[list[dict], Optional[str]]:
+        return find_available_rooms(data)
+
+    def find_available_rooms_by_hotel(
+        self, data: SearchLocationRoomsInput
+    ) -> list[dict]:
+        return find_available_rooms_by_hotel(data)
+
+    def find_customers(
+        self, data: CustomerSearchInput
+    ) -> tuple[list[dict], Optional[str]]:
+        return find_customers(data)
+
+    def create_customer(self, data: CustomerCreateInput) -> CustomerOutput:
+        return create_customer(data)
+
+    def create_booking(self, data: CreateBookingInput) -> BookingOutput:
+        return create_booking(data)
+
+    def create_group_booking(self, data: GroupBookingInput) -> GroupBookingOutput:
+        return create_group_booking(data)
+
+    def book_stay(self, data: BookStayInput) -> BookStayOutput:
+        return book_stay(data)
+
+    def cancel_booking(self, data: CancelBookingInput) -> None:
+        cancel_booking(data)
+
+    def find_hotel_occupancy(self, data: HotelOccupancyInput) -> dict:
+        return find_hotel_occupancy(data)
+
+    def find_location_revenue(self, data: LocationRevenueInput) -> list[dict]:
+        return find_location_revenue(data)
+
+
+BACKENDS = ("sqlite", "memory")
+
+
+def open_repository(backend: str = "sqlite") -> Repository:
+    """Repository for ``backend``, reading from the configured database.
+
+    The memory backend loads a snapshot of the database once; its writes are
+    kept in memory only.
+    """
+    if backend == "sqlite":
+        return SQLiteRepository()
+    if backend == "memory":
+        with connection() as conn:
+            return MemoryRepository.from_connection(conn)
+    raise ValueError(f"Unknown storage backend {backend!r}; use one of {BACKENDS}")
@@ -1,49 +1,228 @@
-from typing import List
-from db.connector import get_connection
-from db.models import SearchRoomsInput, RoomOutput
+from typing import List, Optional
+
+from db.cache import reference_cache
+from db.connector import connection
+from db.models import (
+    ROOM_COLUMNS,
+    HotelRoomsInput,
+    HotelRoomsOutput,
+    RoomOutput,
+    SearchLocationRoomsInput,
+    SearchRoomsInput,
+    day_number,
+    hotel_rooms_list_adapter,
+    room_list_adapter,
+)
+from db.occupancy import get_occupancy
+from db.pagination import decode_cursor, page
+from db.shards import get_router
+
+# Hotel-scoped anti-join: only the searched hotel's rooms are probed, each via
+# idx_bookings_room_status_days, instead of scanning every confirmed booking.
+# Rooms come back in idx_rooms_hotel_capacity order, (capacity, id), which is
+# also the keyset the page cursor continues from.
+AVAILABLE_ROOMS_QUERY = """
+    SELECT r.id, r.room_number, r.room_type, r.price_per_night, r.capacity
+    FROM rooms r
+    WHERE r.hotel_id = ?
+      AND r.capacity >= ?
+      AND (r.capacity, r.id) > (?, ?)
+      AND NOT EXISTS (
+        SELECT 1 FROM bookings b
+        WHERE b.room_id = r.id
+          AND b.status = 'confirmed'
+          AND b.check_in_day < ?
+          AND b.check_out_day > ?
+      )
+    ORDER BY r.capacity, r.id
+    LIMIT ?
+"""
+
+
+# Free rooms across several hotels in one statement. The hotel filter and the
+# sort direction are filled in by get_available_rooms_by_hotel.
+LOCATION_ROOMS_QUERY = """
+    WITH candidates AS (
+      SELECT h.id AS hotel_id,
+             h.name AS hotel_name,
+             r.id,
+             r.room_number,
+             r.room_type,
+             r.price_per_night,
+             r.capacity,
+             ROW_NUMBER() OVER (
+               PARTITION BY h.id ORDER BY r.price_per_night {direction}, r.id
+             ) AS hotel_rank
+      FROM hotels h
+      JOIN rooms r ON r.hotel_id = h.id
+      WHERE {hotel_filter}
+        AND r.capacity >= ?
+        AND NOT EXISTS (
+          SELECT 1 FROM bookings b
+          WHERE b.room_id = r.id
+            AND b.status = 'confirmed'
+            AND b.check_in_day < ?
+            AND b.check_out_day > ?
+        )
+    )
+    SELECT * FROM candidates
+    WHERE hotel_rank <= ?
+    ORDER BY price_per_night {direction}, id
+    LIMIT ?
+"""
+
+_SORT_DIRECTIONS = {"price_asc": "ASC", "price_desc": "DESC"}
+
+
+def find_available_rooms(
+    data: SearchRoomsInput,
+) -> tuple[list[dict], Optional[str]]:
+    """A page of free rooms as RoomOutput-shaped dicts, and the next cursor.
+
+    Rows come from our own schema, so they are not validated again; use
+    get_available_rooms for model instances.
+    """
+    after = decode_cursor("rooms", data.cursor)
+    after_capacity, after_id = after if after else (0, 0)
+
+    occupancy = get_occupancy()
+    if occupancy is not None and occupancy.covers(
+        data.check_in_date, data.check_out_date
+    ):
+        # One primary-key read; rooms added since the load are picked up
+        with connection() as conn:
+            occupancy.sync(conn)
+        rooms = occupancy.available_rooms(
+            data.hotel_id,
+            data.min_capacity,
+            data.check_in_date,
+            data.check_out_date,
+            after=(after_capacity, after_id),
+            limit=data.limit + 1,
+        )
+    else:
+        params = (
+            data.hotel_id,
+            data.min_capacity,
+            after_capacity,
+            after_id,
+            day_number(data.check_out_date),
+            day_number(data.check_in_date),
+            data.limit + 1,
+        )
+        router = get_router()
+        if router is None:
+            with connection() as conn:
+                rows = conn.execute(AVAILABLE_ROOMS_QUERY, params).fetchall()
+        else:
+            # The hotel's bookings live in its shard; a hotel missing from
+            # the catalogue has nothing bookable
+            shard = router.shard_for_hotel(data.hotel_id)
+            rows = []
+            if shard is not None:
+                with shard.connection() as conn:
+                    rows = conn.execute(AVAILABLE_ROOMS_QUERY, params).fetchall()
+        rooms = [dict(zip(ROOM_COLUMNS, row)) for row in rows]
+
+    return page(rooms, data.limit, "rooms", lambda room: [room["capacity"], room["id"]])
 
 
 def get_available_rooms(data: SearchRoomsInput) -> List[RoomOutput]:
-    conn = None
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
+    rooms, _ = find_available_rooms(data)
+    return room_list_adapter.validate_python(rooms)
+
+
+def find_available_rooms_by_hotel(data: SearchLocationRoomsInput) -> list[dict]:
+    """Free rooms grouped per hotel as HotelRoomsOutput-shaped dicts."""
+    direction = _SORT_DIRECTIONS[data.sort_by]
+
+    def query(conn, hotel_filter: str, hotel_params: list) -> list:
+        return conn.execute(
+            LOCATION_ROOMS_QUERY.format(hotel_filter=hotel_filter, direction=direction),
+            (
+                *hotel_params,
+                data.min_capacity,
+                day_number(data.check_out_date),
+                day_number(data.check_in_date),
+                data.rooms_per_hotel,
+                data.max_results,
+            ),
+        ).fetchall()
 
-        cur.execute(
+    def hotels_in(hotel_ids: list[int]) -> tuple[str, list]:
+        return f"h.id IN ({', '.join('?' * len(hotel_ids))})", list(hotel_ids)
+
+    router = get_router()
+    if router is None:
+        with connection() as conn:
+            if data.location_id is not None:
+                rows = query(conn, "h.location_id = ?", [data.location_id])
+            else:
+                rows = query(conn, *hotels_in(data.hotel_ids))
+    elif data.location_id is not None:
+        shard = router.shard_for_location(data.location_id)
+        rows = []
+        if shard is not None:
+            with shard.connection() as conn:
+                rows = query(conn, "h.location_id = ?", [data.location_id])
+    else:
+        # Hotels spread over several shards: run the search on each shard in
+        # parallel and merge the per-shard top results
+        groups = router.group_hotels(data.hotel_ids)
+
+        def search(shard) -> list:
+            with shard.connection() as conn:
+                return query(conn, *hotels_in(groups[shard]))
+
+        rows = [row for rows in router.map(search, groups) for row in rows]
+        sign = -1 if direction == "DESC" else 1
+        rows.sort(key=lambda row: (sign * row[5], row[2]))
+        del rows[data.max_results :]
+
+    # Hotels keep the order of their best-ranked room; columns 2-6 of the
+    # candidates CTE are the room in ROOM_COLUMNS order
+    hotels: dict[int, dict] = {}
+    for row in rows:
+        hotel = hotels.get(row[0])
+        if hotel is None:
+            hotel = hotels[row[0]] = {
+                "hotel_id": row[0],
+                "hotel_name": row[1],
+                "rooms": [],
+            }
+        hotel["rooms"].append(dict(zip(ROOM_COLUMNS, row[2:7])))
+
+    return list(hotels.values())
+
+
+def get_available_rooms_by_hotel(
+    data: SearchLocationRoomsInput,
+) -> List[HotelRoomsOutput]:
+    return hotel_rooms_list_adapter.validate_python(find_available_rooms_by_hotel(data))
+
+
+def find_hotel_rooms(data: HotelRoomsInput) -> list[dict]:
+    with connection() as conn:
+        rows = conn.execute(
             """
-            SELECT r.*
+            SELECT r.id, r.room_number, r.room_type, r.price_per_night, r.capacity
             FROM rooms r
             WHERE r.hotel_id = ?
-              AND r.capacity >= ?
-              AND r.id NOT IN (
-                SELECT room_id FROM bookings
-                WHERE status = 'confirmed'
-                  AND NOT (
-                    check_out_date <= ?
-                    OR check_in_date >= ?
-                  )
-              )
+            ORDER BY r.id
             """,
-            (
-                data.hotel_id,
-                data.min_capacity,
-                data.check_in_date,
-                data.check_out_date,
-            ),
-        )
+            (data.hotel_id,),
+        ).fetchall()
+
+    return [dict(zip(ROOM_COLUMNS, row)) for row in rows]
+
+
+def get_hotel_rooms(data: HotelRoomsInput) -> List[RoomOutput]:
+    return room_list_adapter.validate_python(find_hotel_rooms(data))
+
+
+def get_cached_hotel_rooms(data: HotelRoomsInput) -> list[dict]:
+    """Serialized room catalogue of a hotel from the reference cache.
 
-        rows = cur.fetchall()
-
-        return [
-            RoomOutput(
-                id=row["id"],
-                room_number=row["room_number"],
-                room_type=row["room_type"],
-                price_per_night=row["price_per_night"],
-                capacity=row["capacity"],
-            )
-            for row in rows
-        ]
-    finally:
-        if conn:
-            conn.close()
+    Do not mutate the result.
+    """
+    return reference_cache.get(("rooms", data.hotel_id), lambda: find_hotel_rooms(data))